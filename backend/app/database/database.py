@@ -1,9 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 import pathlib
+import time
+from typing import Any, Dict
+
+from app.services.metrics import stage_duration
 
 # Load environment variables
 load_dotenv()
@@ -13,7 +19,10 @@ BASE_DIR = pathlib.Path(__file__).parent.parent.parent.absolute()
 
 # Check if we're running in Docker (data directory exists)
 DATA_DIR = os.path.join(BASE_DIR, "data")
-if os.path.exists(DATA_DIR):
+if os.getenv("SQLITE_DB_FILE"):
+    # Explicit database file (e.g. a scratch database for benchmarks)
+    SQLITE_DB_FILE = os.getenv("SQLITE_DB_FILE")
+elif os.path.exists(DATA_DIR):
     # Use the data directory for SQLite database in Docker
     SQLITE_DB_FILE = os.path.join(DATA_DIR, "review_analysis.db")
 else:
@@ -23,17 +32,168 @@ else:
 # Create SQLite database URL
 DATABASE_URL = f"sqlite:///{SQLITE_DB_FILE}"
 
+# SQLite tuning profile applied to every new connection: "performance"
+# (WAL, relaxed fsync, larger caches) or "default" (SQLite's own settings)
+DB_PROFILE = os.getenv("DB_PROFILE", "performance")
+
+SQLITE_PROFILES = {
+    "performance": {
+        # Readers no longer block the writer and vice versa
+        "journal_mode": "WAL",
+        # Safe with WAL: a power loss can only lose the last commits, never corrupt the file
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MiB
+        "cache_size": -65536,  # Negative means KiB: 64 MiB per connection
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    },
+    "default": {}
+}
+
+if DB_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"DB_PROFILE must be one of: {', '.join(SQLITE_PROFILES)}")
+
+# Individual pragmas can be overridden, e.g. SQLITE_SYNCHRONOUS=FULL
+SQLITE_PRAGMAS = {
+    name: os.getenv(f"SQLITE_{name.upper()}", value)
+    for name, value in SQLITE_PROFILES[DB_PROFILE].items()
+}
+if os.getenv("SQLITE_BUSY_TIMEOUT"):
+    SQLITE_PRAGMAS["busy_timeout"] = os.getenv("SQLITE_BUSY_TIMEOUT")
+
+# Connection pool, sized for the request threadpool (40 threads by default)
+# plus the background job workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "40"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+def create_database_engine(
+    url: str,
+    pragmas: Dict[str, Any],
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT
+) -> Engine:
+    """Create a pooled SQLite engine that applies the given pragmas on every connect"""
+    connect_args = {"check_same_thread": False}
+    if "busy_timeout" in pragmas:
+        # Keep the driver's own lock wait in line with the pragma
+        connect_args["timeout"] = int(pragmas["busy_timeout"]) / 1000
+
+    database_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout
+    )
+
+    @event.listens_for(database_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return database_engine
+
 # Create SQLAlchemy engine with SQLite
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_database_engine(DATABASE_URL, SQLITE_PRAGMAS)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@event.listens_for(SessionLocal, "before_commit")
+def start_commit_timer(session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(SessionLocal, "after_commit")
+def observe_commit(session):
+    """Time each commit, including the flush of pending changes"""
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        stage_duration.observe(time.perf_counter() - started, service="database", stage="db_commit")
+
 # Create base class for models
 Base = declarative_base()
 
+def _unique_indexes():
+    """Unique indexes of tables with an id column, which tell duplicate rows apart"""
+    for table in Base.metadata.sorted_tables:
+        if "id" not in table.columns:
+            continue
+        for index in table.indexes:
+            if index.unique:
+                yield table, index
+
+def count_duplicate_rows(table, index) -> int:
+    """Rows beyond the first for each key of a unique index"""
+    key = ", ".join(column.name for column in index.columns)
+    with engine.connect() as connection:
+        return connection.execute(text(
+            f"SELECT COALESCE(SUM(n - 1), 0) FROM "
+            f"(SELECT COUNT(*) AS n FROM {table.name} GROUP BY {key} HAVING COUNT(*) > 1)"
+        )).scalar()
+
+def delete_duplicate_rows() -> Dict[str, int]:
+    """Delete rows that would break a unique index, keeping the newest (highest id) row of each key
+
+    Returns the number of rows deleted per table. Counters derived from the
+    deleted rows (trend buckets) are left for the caller to rebuild.
+    """
+    inspector = inspect(engine)
+    deleted = {}
+    for table, index in _unique_indexes():
+        if not inspector.has_table(table.name):
+            continue
+        key = ", ".join(column.name for column in index.columns)
+        with engine.begin() as connection:
+            result = connection.execute(text(
+                f"DELETE FROM {table.name} WHERE id NOT IN "
+                f"(SELECT MAX(id) FROM {table.name} GROUP BY {key})"
+            ))
+        deleted[table.name] = deleted.get(table.name, 0) + result.rowcount
+    return deleted
+
+def ensure_indexes():
+    """Create indexes declared on models that predate their tables (create_all skips existing tables)
+
+    A unique index cannot be created over duplicate rows left by older
+    versions; those raise RuntimeError until `python manage.py dedupe-analyses`
+    has removed them.
+    """
+    inspector = inspect(engine)
+    unique_indexes = {index.name for _, index in _unique_indexes()}
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)} if inspector.has_table(table.name) else set()
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.name in unique_indexes and inspector.has_table(table.name):
+                duplicates = count_duplicate_rows(table, index)
+                if duplicates:
+                    raise RuntimeError(
+                        f"Cannot create unique index {index.name}: {table.name} has {duplicates} duplicate rows. "
+                        f"Run `python manage.py dedupe-analyses` to remove them (the newest row of each key is kept)"
+                    )
+            index.create(bind=engine, checkfirst=True)
+
+def ensure_columns():
+    """Add columns declared on models that are missing from existing tables
+
+    Only columns that are nullable or have a server default can be added this way.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
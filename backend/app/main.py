@@ -1,13 +1,30 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
+import os
+import time
 
-from app.database.database import engine, Base
-from app.routers import reviews, sentiment, aspects, summarization
+from app.database.database import engine, Base, SessionLocal, ensure_columns, ensure_indexes
+from app.routers import reviews, sentiment, aspects, summarization, jobs, exports, pipeline, profiling
 from app.database.database import get_db
+from app.services.result_cache import get_cache_stats, clear_caches
+from app.services.model_registry import get_model_status, get_warmup_state, get_warmup_services, start_warmup
+from app.services.job_service import job_manager
+from app.services.micro_batcher import get_batcher_stats
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE, http_request_duration, render_metrics
+from app.services.profiling import (
+    PROFILE_HEADER, PROFILE_MODES, PROFILING_ENABLED, RequestProfile, current_request_profile, profile_arming
+)
+from app.services.aspect_rollup import ensure_aspect_rollup
+
+# Services to load in the background at startup ("all", a comma-separated list, or empty for fully lazy loading)
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "")
 
-# Create database tables
+# Create database tables and any columns or indexes added since they were created
 Base.metadata.create_all(bind=engine)
+ensure_columns()
+ensure_indexes()
 
 app = FastAPI(
     title="Review Analysis API",
@@ -28,13 +45,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Record request latency by route template (unmatched paths share one label)"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_duration.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=str(response.status_code)
+    )
+    return response
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Profile the handler of requests that ask for it (X-Profile header) or were armed by path"""
+    if not PROFILING_ENABLED:
+        return await call_next(request)
+    
+    mode = request.headers.get(PROFILE_HEADER) or profile_arming.take(request.url.path)
+    if mode not in PROFILE_MODES:
+        return await call_next(request)
+    
+    request_profile = RequestProfile(mode, f"{request.method} {request.url.path}")
+    token = current_request_profile.set(request_profile)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_profile.reset(token)
+    if request_profile.profile_id is not None:
+        response.headers["X-Profile-Id"] = request_profile.profile_id
+    return response
+
 # Include routers
 app.include_router(reviews.router, prefix="/api/reviews", tags=["Reviews"])
 app.include_router(sentiment.router, prefix="/api/sentiment", tags=["Sentiment Analysis"])
 app.include_router(aspects.router, prefix="/api/aspects", tags=["Aspect Extraction"])
 app.include_router(summarization.router, prefix="/api/summarization", tags=["Summarization"])
+app.include_router(pipeline.router, prefix="/api/pipeline", tags=["Pipeline"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
+app.include_router(profiling.router, prefix="/profiling", tags=["Profiling"])
+
+@app.on_event("startup")
+def warm_up_models():
+    """Start loading the configured models in the background"""
+    names = [name.strip() for name in MODEL_WARMUP.split(",") if name.strip()]
+    start_warmup(names)
+
+@app.on_event("startup")
+def backfill_aspect_rollup():
+    """Build the aspect rollup table for databases created before it existed"""
+    db = SessionLocal()
+    try:
+        ensure_aspect_rollup(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def resume_jobs():
+    """Pick up analysis jobs whose process stopped (restarted, or a worker that exited)"""
+    job_manager.resume_unfinished()
 
 @app.get("/")
 def read_root():
@@ -42,4 +118,40 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    if get_warmup_state() == "running":
+        return {"status": "starting"}
     return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check():
+    """Per-model load state; 503 until the warm-up models are loaded"""
+    models_status = get_model_status()
+    warmup_state = get_warmup_state()
+    ready = warmup_state != "running" and all(
+        models_status[name]["state"] == "loaded" for name in get_warmup_services()
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "warmup": warmup_state, "models": models_status}
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Request latency, per-stage timings, batch sizes, sentiment paths and cache hit ratios for Prometheus"""
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and sizes of the inference result caches"""
+    return get_cache_stats()
+
+@app.get("/batching/stats")
+def batching_stats():
+    """Queue depth and batch size distribution of the request coalescers"""
+    return get_batcher_stats()
+
+@app.post("/cache/clear")
+def cache_clear():
+    """Drop all cached inference results"""
+    clear_caches()
+    return {"status": "cleared"}
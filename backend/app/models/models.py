@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -7,6 +7,12 @@ from app.database.database import Base
 class Review(Base):
     """Model for storing user-submitted reviews"""
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Keyset pagination order, newest first
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        # Same order within one source
+        Index("ix_reviews_source_created_at_id", "source", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
@@ -22,6 +28,12 @@ class Review(Base):
 class SentimentAnalysis(Base):
     """Model for storing sentiment analysis results"""
     __tablename__ = "sentiment_analyses"
+    __table_args__ = (
+        # One analysis per review; target of the bulk upsert
+        Index("ux_sentiment_analyses_review_id", "review_id", unique=True),
+        # Covers the label check when listing reviews by sentiment
+        Index("ix_sentiment_analyses_review_id_label", "review_id", "sentiment_label"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     review_id = Column(Integer, ForeignKey("reviews.id"))
@@ -36,6 +48,11 @@ class SentimentAnalysis(Base):
 class AspectAnalysis(Base):
     """Model for storing aspect-based sentiment analysis results"""
     __tablename__ = "aspect_analyses"
+    __table_args__ = (
+        # Covers GROUP BY aspect aggregation of scores and labels
+        Index("ix_aspect_analyses_aspect_score_label", "aspect", "sentiment_score", "sentiment_label"),
+        Index("ix_aspect_analyses_review_id", "review_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     review_id = Column(Integer, ForeignKey("reviews.id"))
@@ -52,6 +69,10 @@ class AspectAnalysis(Base):
 class ReviewSummary(Base):
     """Model for storing AI-generated review summaries"""
     __tablename__ = "review_summaries"
+    __table_args__ = (
+        # One summary per review; target of the bulk upsert
+        Index("ux_review_summaries_review_id", "review_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     review_id = Column(Integer, ForeignKey("reviews.id"))
@@ -61,14 +82,83 @@ class ReviewSummary(Base):
     # Relationship
     review = relationship("Review", back_populates="summary")
 
+class AspectRollup(Base):
+    """Model for incrementally maintained per-aspect totals"""
+    __tablename__ = "aspect_rollups"
+
+    aspect = Column(String(255), primary_key=True)
+    mention_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    positive_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class ReviewTrend(Base):
     """Model for storing historical review trends"""
     __tablename__ = "review_trends"
+    __table_args__ = (
+        Index("ux_review_trends_granularity_date", "granularity", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(DateTime, nullable=False)
+    granularity = Column(String(10), nullable=False, server_default="day")  # "hour" or "day"
+    date = Column(DateTime, nullable=False)  # Start of the bucket (by review creation time)
     total_reviews = Column(Integer, nullable=False)
     avg_sentiment = Column(Float, nullable=False)
     sentiment_distribution = Column(JSON, nullable=False)  # {"positive": 10, "neutral": 5, "negative": 2}
     top_aspects = Column(JSON, nullable=False)  # [{"aspect": "battery", "count": 5, "avg_sentiment": 0.8}, ...]
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Running totals the derived columns above are computed from
+    sentiment_sum = Column(Float, nullable=False, server_default="0")
+    positive_count = Column(Integer, nullable=False, server_default="0")
+    neutral_count = Column(Integer, nullable=False, server_default="0")
+    negative_count = Column(Integer, nullable=False, server_default="0")
+
+class TrendAspectBucket(Base):
+    """Model for per-aspect running totals of a trend bucket"""
+    __tablename__ = "trend_aspect_buckets"
+    __table_args__ = (
+        Index("ux_trend_aspect_buckets_key", "granularity", "date", "aspect", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)
+    date = Column(DateTime, nullable=False)
+    aspect = Column(String(255), nullable=False)
+    mention_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+
+class AnalysisJob(Base):
+    """Model for background bulk analysis jobs"""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # "sentiment", "aspects" or "summarization"
+    status = Column(String(50), nullable=False, default="queued", index=True)  # "queued", "running", "completed", "failed", "cancelled"
+    total_items = Column(Integer, nullable=False)
+    processed_items = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    owner_pid = Column(Integer, nullable=True)  # Process running the job
+    heartbeat_at = Column(DateTime, nullable=True)  # Renewed by the owner while it holds the job
+    
+    # Relationship
+    items = relationship("AnalysisJobItem", back_populates="job")
+
+class AnalysisJobItem(Base):
+    """Model for the per-review progress and result of an analysis job"""
+    __tablename__ = "analysis_job_items"
+    __table_args__ = (UniqueConstraint("job_id", "review_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("analysis_jobs.id"), nullable=False, index=True)
+    review_id = Column(Integer, nullable=False)
+    status = Column(String(50), nullable=False, default="pending")  # "pending", "done" or "missing"
+    result = Column(JSON, nullable=True)
+    
+    # Relationship
+    job = relationship("AnalysisJob", back_populates="items")
@@ -71,6 +71,7 @@ class ReviewSummaryResponse(ReviewSummaryBase):
 
 # Review Trend Schemas
 class ReviewTrendBase(BaseModel):
+    granularity: str = "day"
     date: datetime
     total_reviews: int
     avg_sentiment: float
@@ -98,13 +99,51 @@ class ReviewAnalysisResponse(BaseModel):
 class TextAnalysisRequest(BaseModel):
     text: str
 
+class SummarizeRequest(TextAnalysisRequest):
+    policy: Optional[str] = None  # Decoding tier: "quality", "balanced" or "fast" (server default when omitted)
+    strategy: Optional[str] = None  # Override the tier's strategy: "greedy", "beam" or "sampling"
+    max_output_tokens: Optional[int] = None  # Override the tier's summary length cap
+
 class FileUploadResponse(BaseModel):
     filename: str
     reviews_processed: int
     success: bool
+    rows_rejected: int = 0
+    duration_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
 
 class AnalysisRequest(BaseModel):
     review_id: int
 
 class BulkAnalysisRequest(BaseModel):
     review_ids: List[int]
+
+class PipelineRequest(BulkAnalysisRequest):
+    stages: Optional[List[str]] = None  # Any of "sentiment", "aspects", "summary" (all when omitted)
+    policy: Optional[str] = None  # Decoding tier of the summary stage
+
+class FullAnalysisRequest(BaseModel):
+    review_ids: Optional[List[int]] = None  # When omitted, every review matching the filters
+    source: Optional[str] = None
+    min_rating: Optional[float] = None
+    max_rating: Optional[float] = None
+    sentiment: Optional[str] = None
+
+# Job Schemas
+class JobCreate(BaseModel):
+    kind: str  # "sentiment", "aspects" or "summarization"
+    review_ids: List[int]
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    total_items: int
+    processed_items: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
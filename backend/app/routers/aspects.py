@@ -4,15 +4,21 @@ from typing import List, Dict, Any
 
 from app.database.database import get_db
 from app.models import models, schemas
-from app.services.aspect_service import aspect_service
+from app.services.aspect_service import aspect_service, aspect_batcher
+from app.services.analysis_store import store_aspect_results, store_in_chunks
+from app.services.aspect_rollup import top_aspects_from_rollup, top_aspects_live
+from app.services.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/extract", response_model=List[Dict[str, Any]])
 def extract_aspects(request: schemas.TextAnalysisRequest):
     """Extract aspects from text and analyze their sentiment without storing in database"""
     try:
-        result = aspect_service.extract_aspects(request.text)
+        if aspect_batcher is not None:
+            result = aspect_batcher.submit(request.text)
+        else:
+            result = aspect_service.extract_aspects(request.text)
         return result
     except Exception as e:
         raise HTTPException(
@@ -32,24 +38,8 @@ def analyze_review_aspects(review_id: int, db: Session = Depends(get_db)):
         # Extract aspects
         aspects = aspect_service.extract_aspects(review.text)
         
-        # Delete existing aspect analyses for this review
-        db.query(models.AspectAnalysis).filter(
-            models.AspectAnalysis.review_id == review_id
-        ).delete()
-        
-        # Create new aspect analyses
-        db_aspects = []
-        for aspect in aspects:
-            db_aspect = models.AspectAnalysis(
-                review_id=review_id,
-                aspect=aspect["aspect"],
-                sentiment_score=aspect["sentiment_score"],
-                sentiment_label=aspect["sentiment_label"],
-                confidence=aspect["confidence"],
-                relevant_text=aspect["relevant_text"]
-            )
-            db.add(db_aspect)
-            db_aspects.append(db_aspect)
+        # Replace existing aspect analyses for this review (keeps the aspect rollup in step)
+        db_aspects = store_aspect_results(db, [review], [aspects])
         
         # Commit changes
         db.commit()
@@ -76,34 +66,12 @@ def analyze_batch_aspects(request: schemas.BulkAnalysisRequest, db: Session = De
         raise HTTPException(status_code=404, detail="No reviews found")
     
     try:
-        results = {}
-        
-        for review in reviews:
-            # Extract aspects
-            aspects = aspect_service.extract_aspects(review.text)
-            
-            # Delete existing aspect analyses
-            db.query(models.AspectAnalysis).filter(
-                models.AspectAnalysis.review_id == review.id
-            ).delete()
-            
-            # Create new aspect analyses
-            for aspect in aspects:
-                db_aspect = models.AspectAnalysis(
-                    review_id=review.id,
-                    aspect=aspect["aspect"],
-                    sentiment_score=aspect["sentiment_score"],
-                    sentiment_label=aspect["sentiment_label"],
-                    confidence=aspect["confidence"],
-                    relevant_text=aspect["relevant_text"]
-                )
-                db.add(db_aspect)
-            
-            # Store results
-            results[str(review.id)] = aspects
+        # Extract aspects for all reviews in one streamed batch
+        batch_aspects = aspect_service.analyze_aspects_batch([review.text for review in reviews])
         
-        # Commit changes
-        db.commit()
+        # Store results in database, committing in bounded chunks
+        store_in_chunks(db, store_aspect_results, reviews, batch_aspects)
+        results = {str(review.id): aspects for review, aspects in zip(reviews, batch_aspects)}
         
         return results
     
@@ -117,52 +85,14 @@ def analyze_batch_aspects(request: schemas.BulkAnalysisRequest, db: Session = De
 @router.get("/top", response_model=List[Dict[str, Any]])
 def get_top_aspects(
     limit: int = 10,
+    live: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Get top aspects mentioned across all reviews"""
-    # This is a more complex query that would typically use raw SQL or ORM aggregation
-    # For simplicity, we'll use a basic approach here
-    
-    # Get all aspect analyses
-    aspect_analyses = db.query(models.AspectAnalysis).all()
-    
-    # Count occurrences of each aspect
-    aspect_counts = {}
-    aspect_sentiments = {}
-    
-    for analysis in aspect_analyses:
-        aspect = analysis.aspect
-        
-        # Count occurrences
-        if aspect in aspect_counts:
-            aspect_counts[aspect] += 1
-            aspect_sentiments[aspect].append(analysis.sentiment_score)
-        else:
-            aspect_counts[aspect] = 1
-            aspect_sentiments[aspect] = [analysis.sentiment_score]
-    
-    # Calculate average sentiment for each aspect
-    results = []
-    for aspect, count in aspect_counts.items():
-        avg_sentiment = sum(aspect_sentiments[aspect]) / len(aspect_sentiments[aspect])
-        
-        # Determine sentiment label
-        if avg_sentiment > 0.3:
-            sentiment_label = "positive"
-        elif avg_sentiment < -0.3:
-            sentiment_label = "negative"
-        else:
-            sentiment_label = "neutral"
-        
-        results.append({
-            "aspect": aspect,
-            "count": count,
-            "avg_sentiment": avg_sentiment,
-            "sentiment_label": sentiment_label
-        })
-    
-    # Sort by count (descending)
-    results.sort(key=lambda x: x["count"], reverse=True)
-    
-    # Limit results
-    return results[:limit]
+    """Get top aspects mentioned across all reviews
+
+    Reads the incrementally maintained per-aspect rollup table; live=true
+    aggregates aspect_analyses with a GROUP BY query instead.
+    """
+    if live:
+        return top_aspects_live(db, limit)
+    return top_aspects_from_rollup(db, limit)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from app.database.database import SessionLocal
+from app.services.export_service import EXPORT_FORMATS, iter_export_bytes, gzip_stream
+from app.services.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/reviews")
+def export_reviews(
+    format: str = "ndjson",
+    gzip: bool = False,
+    after_id: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """Stream every review with its sentiment, aspects and summary, in id order
+
+    Rows are read with a server-side cursor and encoded chunk by chunk, so
+    memory stays flat for any table size. To resume an interrupted export,
+    pass the id of the last complete row received as after_id.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    def pieces():
+        db = SessionLocal()
+        try:
+            yield from iter_export_bytes(db, format, after_id=after_id, limit=limit)
+        finally:
+            db.close()
+
+    filename = f"reviews.{format}"
+    if gzip:
+        return StreamingResponse(
+            gzip_stream(pieces()),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'}
+        )
+    return StreamingResponse(
+        pieces(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
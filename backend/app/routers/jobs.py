@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+import asyncio
+import json
+
+from app.database.database import get_db, SessionLocal
+from app.models import models, schemas
+from app.services.job_service import job_manager, JOB_KINDS, TERMINAL_STATUSES
+from app.services.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+def get_job_or_404(job_id: int, db: Session) -> models.AnalysisJob:
+    """Load a job or raise 404"""
+    job = db.query(models.AnalysisJob).filter(models.AnalysisJob.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/", response_model=schemas.JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(request: schemas.JobCreate, db: Session = Depends(get_db)):
+    """Submit a bulk analysis job and return immediately with its ID"""
+    if request.kind not in JOB_KINDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind '{request.kind}', expected one of: {', '.join(JOB_KINDS)}"
+        )
+    if not request.review_ids:
+        raise HTTPException(status_code=400, detail="No review IDs given")
+    
+    return job_manager.submit(db, request.kind, request.review_ids)
+
+@router.get("/", response_model=List[schemas.JobResponse])
+def list_jobs(limit: int = 20, db: Session = Depends(get_db)):
+    """List the most recent jobs"""
+    return db.query(models.AnalysisJob).order_by(models.AnalysisJob.id.desc()).limit(limit).all()
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status and progress of a job"""
+    return get_job_or_404(job_id, db)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: int, interval: float = 1.0):
+    """Stream job progress as server-sent events until the job finishes"""
+    def read_job() -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            job = db.query(models.AnalysisJob).filter(models.AnalysisJob.id == job_id).first()
+            return schemas.JobResponse.model_validate(job).model_dump(mode="json") if job else None
+        finally:
+            db.close()
+    
+    # The queries run in the threadpool so polling clients never block the event loop
+    if await run_in_threadpool(read_job) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        while True:
+            job = await run_in_threadpool(read_job)
+            yield f"data: {json.dumps(job)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(max(interval, 0.1))
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/{job_id}/results", response_model=Dict[str, Any])
+def get_job_results(job_id: int, db: Session = Depends(get_db)):
+    """Get the results finished so far, keyed by review ID"""
+    get_job_or_404(job_id, db)
+    
+    items = db.query(models.AnalysisJobItem).filter(
+        models.AnalysisJobItem.job_id == job_id,
+        models.AnalysisJobItem.status == "done"
+    ).order_by(models.AnalysisJobItem.id).all()
+    
+    return {str(item.review_id): item.result for item in items}
+
+@router.post("/{job_id}/cancel", response_model=schemas.JobResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """Cancel a queued or running job; finished reviews keep their results"""
+    job = get_job_or_404(job_id, db)
+    return job_manager.cancel(db, job)
+
+@router.post("/{job_id}/resume", response_model=schemas.JobResponse)
+def resume_job(job_id: int, db: Session = Depends(get_db)):
+    """Resume a failed or cancelled job with only its unfinished reviews"""
+    job = get_job_or_404(job_id, db)
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(status_code=400, detail=f"Job is {job.status} and cannot be resumed")
+    return job_manager.resume(db, job)
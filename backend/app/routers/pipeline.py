@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.database.database import get_db
+from app.models import models, schemas
+from app.routers.summarization import get_policy
+from app.services.pipeline_service import pipeline_runner, resolve_stages, store_pipeline_results
+from app.services.review_queries import full_analysis, with_full_analysis
+from app.services.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+def get_stages(stages: Optional[List[str]]) -> List[str]:
+    """Resolve requested pipeline stages, as a 400 when invalid"""
+    try:
+        return resolve_stages(stages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/analyze-review/{review_id}", response_model=schemas.ReviewAnalysisResponse)
+def analyze_review(
+    review_id: int,
+    stages: Optional[List[str]] = Query(None, description="Stages to run: sentiment, aspects, summary (all by default)"),
+    policy: Optional[str] = Query(None, description="Decoding tier of the summary stage"),
+    db: Session = Depends(get_db)
+):
+    """Run the selected analyses of a review in one pass and store them in one transaction"""
+    stages = get_stages(stages)
+    decoding_policy = get_policy(policy)
+    
+    # Get review
+    review = db.query(models.Review).filter(models.Review.id == review_id).first()
+    if review is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    
+    try:
+        results = pipeline_runner.analyze([review.text], stages, decoding_policy)
+        
+        # Store every stage and commit once
+        store_pipeline_results(db, [review], results)
+        db.commit()
+        
+        review = with_full_analysis(db.query(models.Review)).filter(models.Review.id == review_id).one()
+        return full_analysis(review)
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing review: {str(e)}"
+        )
+
+@router.post("/analyze-batch", response_model=Dict[str, Dict[str, Any]])
+def analyze_batch(request: schemas.PipelineRequest, db: Session = Depends(get_db)):
+    """Run the selected analyses of multiple reviews in one pass and store them in one transaction"""
+    stages = get_stages(request.stages)
+    decoding_policy = get_policy(request.policy)
+    
+    # Get reviews
+    reviews = db.query(models.Review).filter(models.Review.id.in_(request.review_ids)).all()
+    if not reviews:
+        raise HTTPException(status_code=404, detail="No reviews found")
+    
+    try:
+        results = pipeline_runner.analyze([review.text for review in reviews], stages, decoding_policy)
+        
+        # Store every stage and commit once
+        store_pipeline_results(db, reviews, results)
+        db.commit()
+        
+        return {str(review.id): result for review, result in zip(reviews, results)}
+    
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing reviews: {str(e)}"
+        )
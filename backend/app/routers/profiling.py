@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import List, Dict, Any
+
+from app.services.profiling import (
+    PROFILE_MAX_WINDOW_SECONDS,
+    PROFILE_MODES,
+    PROFILING_ENABLED,
+    list_profiles,
+    profile_arming,
+    profile_path,
+    profile_window
+)
+
+router = APIRouter()
+
+def require_profiling():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING_ENABLED=true)")
+
+@router.post("/arm", response_model=Dict[str, Dict[str, Any]])
+def arm_requests(
+    path: str = Query(..., description="Request path to profile, e.g. /api/aspects/analyze-batch"),
+    mode: str = "cprofile",
+    count: int = Query(1, ge=1, le=100)
+):
+    """Profile the next count requests to a path, without a header on the client side"""
+    require_profiling()
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(PROFILE_MODES)}")
+    profile_arming.arm(path, mode, count)
+    return profile_arming.armed()
+
+@router.post("/window", response_model=Dict[str, Any])
+def start_window(seconds: float = Query(30, gt=0)):
+    """Sample every busy thread of this worker for a number of seconds"""
+    require_profiling()
+    if seconds > PROFILE_MAX_WINDOW_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {PROFILE_MAX_WINDOW_SECONDS:g}")
+    try:
+        profile_window.start(seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profile_window.state()
+
+@router.post("/window/stop", response_model=Dict[str, Any])
+def stop_window():
+    """End the running window early and store its samples"""
+    require_profiling()
+    profile_window.stop()
+    return profile_window.state()
+
+@router.get("/window", response_model=Dict[str, Any])
+def get_window():
+    """State of the profiling window"""
+    require_profiling()
+    return profile_window.state()
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+def get_profiles():
+    """Stored profiles, newest first"""
+    require_profiling()
+    return list_profiles()
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str):
+    """Download a profile: pstats (cprofile) or collapsed stacks (sampling)"""
+    require_profiling()
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.name, media_type="application/octet-stream")
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import csv
-import io
-import pandas as pd
 
-from app.database.database import get_db
+from app.database.database import get_db, SessionLocal
 from app.models import models, schemas
+from app.services.ingestion_service import ingest_reviews_csv, CSVFormatError
+from app.services.analysis_store import delete_aspect_analyses, delete_sentiment_analyses
+from app.services.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.services.review_queries import (
+    filter_reviews, newest_first, after_keyset, with_full_analysis, full_analysis, iter_full_analyses
+)
+from app.services.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/", response_model=schemas.ReviewResponse, status_code=status.HTTP_201_CREATED)
 def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
@@ -25,12 +30,47 @@ def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[schemas.ReviewResponse])
 def get_reviews(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1),
+    source: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    sentiment: Optional[str] = None,
+    skip: int = 0,
     db: Session = Depends(get_db)
 ):
-    """Get all reviews with pagination"""
-    reviews = db.query(models.Review).offset(skip).limit(limit).all()
+    """Get reviews, newest first, with keyset pagination
+
+    Pass the X-Next-Cursor header of a page as ``cursor`` to get the next
+    one; the header is absent on the last page. Seeking on (created_at, id)
+    keeps deep pages as fast as the first. ``skip`` is still accepted for
+    old clients but scans and discards the skipped rows.
+    """
+    query = filter_reviews(
+        db.query(models.Review),
+        source=source, min_rating=min_rating, max_rating=max_rating, sentiment=sentiment
+    )
+
+    # Seek past the last row of the previous page
+    if cursor is not None:
+        try:
+            last_created_at, last_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = after_keyset(query, last_created_at, last_id)
+
+    query = newest_first(query)
+    if cursor is None and skip:
+        query = query.offset(skip)
+
+    # One extra row tells whether there is a next page
+    reviews = query.limit(limit + 1).all()
+
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(reviews[-1].created_at, reviews[-1].id)
+
     return reviews
 
 @router.get("/{review_id}", response_model=schemas.ReviewResponse)
@@ -42,62 +82,39 @@ def get_review(review_id: int, db: Session = Depends(get_db)):
     return review
 
 @router.post("/upload-csv", response_model=schemas.FileUploadResponse)
-async def upload_csv(
+def upload_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Upload and process a CSV file of reviews"""
+    """Upload and process a CSV file of reviews
+
+    The upload is streamed and parsed incrementally and rows are inserted in
+    bounded batches, each committed on its own.
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(
             status_code=400,
             detail="Only CSV files are allowed"
         )
     
-    # Read CSV file
-    contents = await file.read()
-    
     try:
-        # Parse CSV
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Check required columns
-        if 'text' not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail="CSV must contain a 'text' column"
-            )
-        
-        # Process reviews
-        reviews_processed = 0
-        for _, row in df.iterrows():
-            # Get review text (required)
-            text = row['text']
-            
-            # Get rating if available
-            rating = None
-            if 'rating' in df.columns and not pd.isna(row['rating']):
-                rating = float(row['rating'])
-            
-            # Create review
-            db_review = models.Review(
-                text=text,
-                rating=rating,
-                source="csv"
-            )
-            db.add(db_review)
-            reviews_processed += 1
-        
-        # Commit all reviews to database
-        db.commit()
+        # Stream the spooled upload into the database
+        result = ingest_reviews_csv(db, file.file)
         
         return {
             "filename": file.filename,
-            "reviews_processed": reviews_processed,
-            "success": True
+            "success": True,
+            **result
         }
     
+    except CSVFormatError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    
     except Exception as e:
-        # Rollback in case of error
+        # Rollback the batch in progress; earlier batches are already committed
         db.rollback()
         raise HTTPException(
             status_code=500,
@@ -112,8 +129,8 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Review not found")
     
     # Delete related records
-    db.query(models.SentimentAnalysis).filter(models.SentimentAnalysis.review_id == review_id).delete()
-    db.query(models.AspectAnalysis).filter(models.AspectAnalysis.review_id == review_id).delete()
+    delete_sentiment_analyses(db, [review_id])
+    delete_aspect_analyses(db, [review_id])
     db.query(models.ReviewSummary).filter(models.ReviewSummary.review_id == review_id).delete()
     
     # Delete review
@@ -125,13 +142,30 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
 @router.get("/{review_id}/full-analysis", response_model=schemas.ReviewAnalysisResponse)
 def get_review_with_analysis(review_id: int, db: Session = Depends(get_db)):
     """Get a review with its sentiment analysis, aspect analysis, and summary"""
-    review = db.query(models.Review).filter(models.Review.id == review_id).first()
+    review = with_full_analysis(db.query(models.Review)).filter(models.Review.id == review_id).first()
     if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    return {
-        "review": review,
-        "sentiment": review.sentiment_analysis,
-        "aspects": review.aspect_analyses,
-        "summary": review.summary
-    }
+    return full_analysis(review)
+
+@router.post("/full-analysis")
+def export_full_analyses(request: schemas.FullAnalysisRequest):
+    """Stream full analyses of many reviews as NDJSON, one ReviewAnalysisResponse per line
+
+    Selects the given review_ids (in that order), or every review matching
+    the filters (newest first). Reviews are loaded in chunks with two queries
+    per chunk, so memory stays bounded whatever the result size.
+    """
+    filters = request.model_dump(exclude={"review_ids"})
+
+    def lines():
+        db = SessionLocal()
+        try:
+            for analysis in iter_full_analyses(db, review_ids=request.review_ids, **filters):
+                yield schemas.ReviewAnalysisResponse.model_validate(
+                    analysis, from_attributes=True
+                ).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,18 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 from app.database.database import get_db
 from app.models import models, schemas
-from app.services.sentiment_service import sentiment_service
+from app.services.sentiment_service import sentiment_service, sentiment_batcher
+from app.services.analysis_store import store_sentiment_results, store_in_chunks
+from app.services.trend_service import TREND_GRANULARITIES, query_trends
+from app.services.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/analyze", response_model=Dict[str, Any])
 def analyze_text(request: schemas.TextAnalysisRequest):
     """Analyze sentiment of a text without storing in database"""
     try:
-        result = sentiment_service.analyze_sentiment(request.text)
+        if sentiment_batcher is not None:
+            result = sentiment_batcher.submit(request.text)
+        else:
+            result = sentiment_service.analyze_sentiment(request.text)
         return result
     except Exception as e:
         raise HTTPException(
@@ -32,32 +39,15 @@ def analyze_review(review_id: int, db: Session = Depends(get_db)):
         # Analyze sentiment
         result = sentiment_service.analyze_sentiment(review.text)
         
-        # Check if sentiment analysis already exists for this review
-        existing_analysis = db.query(models.SentimentAnalysis).filter(
-            models.SentimentAnalysis.review_id == review_id
-        ).first()
-        
-        if existing_analysis:
-            # Update existing analysis
-            existing_analysis.sentiment_score = result["sentiment_score"]
-            existing_analysis.sentiment_label = result["sentiment_label"]
-            existing_analysis.confidence = result["confidence"]
-            db_analysis = existing_analysis
-        else:
-            # Create new sentiment analysis
-            db_analysis = models.SentimentAnalysis(
-                review_id=review_id,
-                sentiment_score=result["sentiment_score"],
-                sentiment_label=result["sentiment_label"],
-                confidence=result["confidence"]
-            )
-            db.add(db_analysis)
+        # Store result (also updates the trend buckets)
+        store_sentiment_results(db, [review], [result])
         
         # Commit changes
         db.commit()
-        db.refresh(db_analysis)
         
-        return db_analysis
+        return db.query(models.SentimentAnalysis).filter(
+            models.SentimentAnalysis.review_id == review_id
+        ).first()
     
     except Exception as e:
         db.rollback()
@@ -81,32 +71,8 @@ def analyze_batch(request: schemas.BulkAnalysisRequest, db: Session = Depends(ge
         # Analyze sentiment
         results = sentiment_service.analyze_batch(texts)
         
-        # Store results in database
-        for i, review in enumerate(reviews):
-            result = results[i]
-            
-            # Check if sentiment analysis already exists
-            existing_analysis = db.query(models.SentimentAnalysis).filter(
-                models.SentimentAnalysis.review_id == review.id
-            ).first()
-            
-            if existing_analysis:
-                # Update existing analysis
-                existing_analysis.sentiment_score = result["sentiment_score"]
-                existing_analysis.sentiment_label = result["sentiment_label"]
-                existing_analysis.confidence = result["confidence"]
-            else:
-                # Create new sentiment analysis
-                db_analysis = models.SentimentAnalysis(
-                    review_id=review.id,
-                    sentiment_score=result["sentiment_score"],
-                    sentiment_label=result["sentiment_label"],
-                    confidence=result["confidence"]
-                )
-                db.add(db_analysis)
-        
-        # Commit changes
-        db.commit()
+        # Store results in database, committing in bounded chunks
+        store_in_chunks(db, store_sentiment_results, reviews, results)
         
         # Return results
         return results
@@ -120,9 +86,20 @@ def analyze_batch(request: schemas.BulkAnalysisRequest, db: Session = Depends(ge
 
 @router.get("/trends", response_model=List[schemas.ReviewTrendResponse])
 def get_sentiment_trends(
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
-    """Get sentiment trends over time"""
-    trends = db.query(models.ReviewTrend).order_by(models.ReviewTrend.date.desc()).limit(limit).all()
-    return trends
+    """Get sentiment trends over time, newest bucket first
+
+    Buckets are maintained incrementally as analyses are stored; start is
+    inclusive and end exclusive.
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of: {', '.join(TREND_GRANULARITIES)}"
+        )
+    return query_trends(db, granularity=granularity, start=start, end=end, limit=limit)
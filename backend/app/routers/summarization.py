@@ -1,19 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from app.database.database import get_db
 from app.models import models, schemas
-from app.services.summarization_service import summarization_service
+from app.services.summarization_service import summarization_service, summarization_batcher
+from app.services.analysis_store import store_summaries, store_in_chunks
+from app.services.decoding_policy import resolve_policy
+from app.services.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-@router.post("/summarize", response_model=Dict[str, str])
-def summarize_text(request: schemas.TextAnalysisRequest):
-    """Generate a summary for a text without storing in database"""
+def get_policy(name: Optional[str], strategy: Optional[str] = None, max_output_tokens: Optional[int] = None):
+    """Resolve a requested decoding policy (None: the service default), as a 400 when invalid"""
+    if name is None and strategy is None and max_output_tokens is None:
+        return None
     try:
-        summary = summarization_service.generate_summary(request.text)
-        return {"summary": summary}
+        return resolve_policy(
+            name or summarization_service.default_policy.name,
+            strategy=strategy,
+            max_output_tokens=max_output_tokens
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/summarize", response_model=Dict[str, Any])
+def summarize_text(request: schemas.SummarizeRequest):
+    """Generate a summary for a text without storing in database
+
+    The response also reports how the summary was produced: decoding policy
+    and strategy, input and generated token counts, and decode time.
+    """
+    policy = get_policy(request.policy, request.strategy, request.max_output_tokens)
+    try:
+        if summarization_batcher is not None:
+            result = summarization_batcher.submit((request.text, policy))
+        else:
+            result = summarization_service.summarize_batch([request.text], policy)[0]
+        summary = result.pop("summary")
+        return {"summary": summary, "generation": result}
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -21,8 +46,14 @@ def summarize_text(request: schemas.TextAnalysisRequest):
         )
 
 @router.post("/summarize-review/{review_id}", response_model=schemas.ReviewSummaryResponse)
-def summarize_review(review_id: int, db: Session = Depends(get_db)):
+def summarize_review(
+    review_id: int,
+    policy: Optional[str] = Query(None, description="Decoding tier: quality, balanced or fast"),
+    db: Session = Depends(get_db)
+):
     """Generate a summary for a review and store the result"""
+    decoding_policy = get_policy(policy)
+    
     # Get review
     review = db.query(models.Review).filter(models.Review.id == review_id).first()
     if review is None:
@@ -30,30 +61,17 @@ def summarize_review(review_id: int, db: Session = Depends(get_db)):
     
     try:
         # Generate summary
-        summary_text = summarization_service.generate_summary(review.text)
+        summary_text = summarization_service.generate_summary(review.text, decoding_policy)
         
-        # Check if summary already exists
-        existing_summary = db.query(models.ReviewSummary).filter(
-            models.ReviewSummary.review_id == review_id
-        ).first()
-        
-        if existing_summary:
-            # Update existing summary
-            existing_summary.summary_text = summary_text
-            db_summary = existing_summary
-        else:
-            # Create new summary
-            db_summary = models.ReviewSummary(
-                review_id=review_id,
-                summary_text=summary_text
-            )
-            db.add(db_summary)
+        # Store summary
+        store_summaries(db, [review], [summary_text])
         
         # Commit changes
         db.commit()
-        db.refresh(db_summary)
         
-        return db_summary
+        return db.query(models.ReviewSummary).filter(
+            models.ReviewSummary.review_id == review_id
+        ).first()
     
     except Exception as e:
         db.rollback()
@@ -63,41 +81,28 @@ def summarize_review(review_id: int, db: Session = Depends(get_db)):
         )
 
 @router.post("/summarize-batch", response_model=Dict[str, str])
-def summarize_batch(request: schemas.BulkAnalysisRequest, db: Session = Depends(get_db)):
+def summarize_batch(
+    request: schemas.BulkAnalysisRequest,
+    policy: Optional[str] = Query(None, description="Decoding tier: quality, balanced or fast"),
+    db: Session = Depends(get_db)
+):
     """Generate summaries for multiple reviews"""
+    decoding_policy = get_policy(policy)
+    
     # Get reviews
     reviews = db.query(models.Review).filter(models.Review.id.in_(request.review_ids)).all()
     if not reviews:
         raise HTTPException(status_code=404, detail="No reviews found")
     
     try:
-        results = {}
-        
-        for review in reviews:
-            # Generate summary
-            summary_text = summarization_service.generate_summary(review.text)
-            
-            # Check if summary already exists
-            existing_summary = db.query(models.ReviewSummary).filter(
-                models.ReviewSummary.review_id == review.id
-            ).first()
-            
-            if existing_summary:
-                # Update existing summary
-                existing_summary.summary_text = summary_text
-            else:
-                # Create new summary
-                db_summary = models.ReviewSummary(
-                    review_id=review.id,
-                    summary_text=summary_text
-                )
-                db.add(db_summary)
-            
-            # Store result
-            results[str(review.id)] = summary_text
+        # Generate summaries in length-bucketed batches
+        summary_texts = summarization_service.generate_batch_summaries(
+            [review.text for review in reviews], policy=decoding_policy
+        )
         
-        # Commit changes
-        db.commit()
+        # Store results in database, committing in bounded chunks
+        store_in_chunks(db, store_summaries, reviews, summary_texts)
+        results = {str(review.id): summary_text for review, summary_text in zip(reviews, summary_texts)}
         
         return results
     
@@ -0,0 +1,178 @@
+import os
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from typing import Any, Callable, List, Dict
+from dotenv import load_dotenv
+
+from app.models import models
+from app.services.aspect_rollup import apply_rollup_delta, totals_from_results
+from app.services.trend_service import TrendDelta, apply_trend_delta
+
+# Load environment variables
+load_dotenv()
+
+# Reviews written per commit by the batch endpoints
+WRITE_CHUNK_SIZE = int(os.getenv("WRITE_CHUNK_SIZE", "500"))
+
+def store_sentiment_results(db: Session, reviews: List[models.Review], results: List[Dict]):
+    """Insert or update the sentiment analysis of each review and update the trend buckets (caller commits)
+
+    Uses one IN query for the previous results (needed to correct the trends)
+    and one bulk INSERT ... ON CONFLICT (review_id) DO UPDATE for the writes.
+    """
+    if not reviews:
+        return
+
+    created_at = {review.id: review.created_at for review in reviews}
+    previous = db.query(
+        models.SentimentAnalysis.review_id,
+        models.SentimentAnalysis.sentiment_score,
+        models.SentimentAnalysis.sentiment_label
+    ).filter(models.SentimentAnalysis.review_id.in_(list(created_at))).all()
+
+    trend_delta = TrendDelta()
+    # Take the old results out of the trends before overwriting them
+    for review_id, score, label in previous:
+        trend_delta.add_sentiment(created_at[review_id], score, label, sign=-1)
+    for review, result in zip(reviews, results):
+        trend_delta.add_sentiment(review.created_at, result["sentiment_score"], result["sentiment_label"])
+
+    statement = insert(models.SentimentAnalysis)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.SentimentAnalysis.review_id],
+        set_={
+            "sentiment_score": statement.excluded.sentiment_score,
+            "sentiment_label": statement.excluded.sentiment_label,
+            "confidence": statement.excluded.confidence
+        }
+    )
+    db.execute(statement, [
+        {
+            "review_id": review.id,
+            "sentiment_score": result["sentiment_score"],
+            "sentiment_label": result["sentiment_label"],
+            "confidence": result["confidence"]
+        }
+        for review, result in zip(reviews, results)
+    ])
+
+    apply_trend_delta(db, trend_delta)
+
+def delete_sentiment_analyses(db: Session, review_ids: List[int]):
+    """Delete the sentiment analyses of some reviews and subtract them from the trend buckets (caller commits)"""
+    if not review_ids:
+        return
+
+    rows = db.query(
+        models.Review.created_at,
+        models.SentimentAnalysis.sentiment_score,
+        models.SentimentAnalysis.sentiment_label
+    ).join(
+        models.Review, models.Review.id == models.SentimentAnalysis.review_id
+    ).filter(models.SentimentAnalysis.review_id.in_(review_ids)).all()
+
+    trend_delta = TrendDelta()
+    for created_at, score, label in rows:
+        trend_delta.add_sentiment(created_at, score, label, sign=-1)
+    apply_trend_delta(db, trend_delta)
+
+    db.query(models.SentimentAnalysis).filter(
+        models.SentimentAnalysis.review_id.in_(review_ids)
+    ).delete(synchronize_session=False)
+
+def store_aspect_results(
+    db: Session, reviews: List[models.Review], batch_aspects: List[List[Dict]]
+) -> List[models.AspectAnalysis]:
+    """Replace the aspect analyses of each review and update the aspect rollup and trends (caller commits)"""
+    # Take the old analyses out of the rollup and trends before deleting them
+    delete_aspect_analyses(db, [review.id for review in reviews])
+
+    # Create new aspect analyses
+    trend_delta = TrendDelta()
+    db_aspects = []
+    for review, aspects in zip(reviews, batch_aspects):
+        for aspect in aspects:
+            db_aspect = models.AspectAnalysis(
+                review_id=review.id,
+                aspect=aspect["aspect"],
+                sentiment_score=aspect["sentiment_score"],
+                sentiment_label=aspect["sentiment_label"],
+                confidence=aspect["confidence"],
+                relevant_text=aspect["relevant_text"]
+            )
+            db.add(db_aspect)
+            db_aspects.append(db_aspect)
+            trend_delta.add_aspect(review.created_at, aspect["aspect"], aspect["sentiment_score"])
+
+    # Add the new analyses to the rollup and trends
+    apply_rollup_delta(db, totals_from_results(batch_aspects))
+    apply_trend_delta(db, trend_delta)
+
+    return db_aspects
+
+def delete_aspect_analyses(db: Session, review_ids: List[int]):
+    """Delete the aspect analyses of some reviews and subtract them from the rollup and trends (caller commits)"""
+    if not review_ids:
+        return
+
+    # One query feeds both the rollup and the trend deltas
+    rows = db.query(
+        models.Review.created_at,
+        models.AspectAnalysis.aspect,
+        models.AspectAnalysis.sentiment_score,
+        models.AspectAnalysis.sentiment_label
+    ).outerjoin(
+        models.Review, models.Review.id == models.AspectAnalysis.review_id
+    ).filter(models.AspectAnalysis.review_id.in_(review_ids)).all()
+
+    trend_delta = TrendDelta()
+    for created_at, aspect, score, _ in rows:
+        trend_delta.add_aspect(created_at, aspect, score, sign=-1)
+
+    apply_rollup_delta(db, totals_from_results([[
+        {"aspect": aspect, "sentiment_score": score, "sentiment_label": label}
+        for _, aspect, score, label in rows
+    ]]), sign=-1)
+    apply_trend_delta(db, trend_delta)
+
+    db.query(models.AspectAnalysis).filter(
+        models.AspectAnalysis.review_id.in_(review_ids)
+    ).delete(synchronize_session=False)
+
+def store_summaries(db: Session, reviews: List[models.Review], summary_texts: List[str]):
+    """Insert or update the summary of each review with one bulk upsert (caller commits)"""
+    if not reviews:
+        return
+
+    statement = insert(models.ReviewSummary)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.ReviewSummary.review_id],
+        set_={"summary_text": statement.excluded.summary_text}
+    )
+    db.execute(statement, [
+        {"review_id": review.id, "summary_text": summary_text}
+        for review, summary_text in zip(reviews, summary_texts)
+    ])
+
+def store_in_chunks(
+    db: Session,
+    store: Callable[[Session, List[models.Review], List[Any]], Any],
+    reviews: List[models.Review],
+    results: List[Any],
+    chunk_size: int = WRITE_CHUNK_SIZE
+):
+    """Write results with one of the store_* functions, committing every chunk_size reviews
+
+    Keeps statements and transactions bounded for large batches; chunks
+    committed before a failure stay committed.
+    """
+    # The reviews are only read, so keep them loaded across commits instead
+    # of refreshing each one with its own SELECT
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        for start in range(0, len(reviews), chunk_size):
+            store(db, reviews[start:start + chunk_size], results[start:start + chunk_size])
+            db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
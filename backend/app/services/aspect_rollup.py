@@ -0,0 +1,136 @@
+from sqlalchemy import func, case
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+
+from app.models import models
+
+def _sentiment_label(avg_sentiment: float) -> str:
+    """Label an average sentiment score"""
+    if avg_sentiment > 0.3:
+        return "positive"
+    elif avg_sentiment < -0.3:
+        return "negative"
+    return "neutral"
+
+def _empty_totals() -> Dict[str, float]:
+    return {"mention_count": 0, "score_sum": 0.0, "positive_count": 0, "neutral_count": 0, "negative_count": 0}
+
+def _aggregate_columns():
+    """Per-aspect aggregate columns over aspect_analyses"""
+    label = models.AspectAnalysis.sentiment_label
+    return (
+        models.AspectAnalysis.aspect,
+        func.count(models.AspectAnalysis.id),
+        func.sum(models.AspectAnalysis.sentiment_score),
+        func.sum(case((label == "positive", 1), else_=0)),
+        func.sum(case((label == "neutral", 1), else_=0)),
+        func.sum(case((label == "negative", 1), else_=0)),
+    )
+
+def _rows_to_totals(rows) -> Dict[str, Dict[str, float]]:
+    return {
+        aspect: {
+            "mention_count": count,
+            "score_sum": score_sum or 0.0,
+            "positive_count": positive or 0,
+            "neutral_count": neutral or 0,
+            "negative_count": negative or 0
+        }
+        for aspect, count, score_sum, positive, neutral, negative in rows
+    }
+
+def totals_from_results(batch_aspects: List[List[Dict]]) -> Dict[str, Dict[str, float]]:
+    """Per-aspect totals of freshly extracted aspects"""
+    totals = {}
+    for aspects in batch_aspects:
+        for aspect in aspects:
+            entry = totals.setdefault(aspect["aspect"], _empty_totals())
+            entry["mention_count"] += 1
+            entry["score_sum"] += aspect["sentiment_score"]
+            label_key = f"{aspect['sentiment_label']}_count"
+            if label_key in entry:
+                entry[label_key] += 1
+    return totals
+
+def apply_rollup_delta(db: Session, totals: Dict[str, Dict[str, float]], sign: int = 1):
+    """Add (sign=1) or subtract (sign=-1) per-aspect totals with one upsert per aspect (caller commits)"""
+    if not totals:
+        return
+
+    rows = [
+        {"aspect": aspect, **{key: sign * value for key, value in entry.items()}}
+        for aspect, entry in totals.items()
+    ]
+    statement = insert(models.AspectRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.AspectRollup.aspect],
+        set_={
+            "mention_count": models.AspectRollup.mention_count + statement.excluded.mention_count,
+            "score_sum": models.AspectRollup.score_sum + statement.excluded.score_sum,
+            "positive_count": models.AspectRollup.positive_count + statement.excluded.positive_count,
+            "neutral_count": models.AspectRollup.neutral_count + statement.excluded.neutral_count,
+            "negative_count": models.AspectRollup.negative_count + statement.excluded.negative_count,
+            "updated_at": func.current_timestamp()
+        }
+    )
+    db.execute(statement, rows)
+
+def rebuild_aspect_rollup(db: Session) -> int:
+    """Recompute the rollup table from aspect_analyses with one GROUP BY query (commits)"""
+    rows = db.query(*_aggregate_columns()).group_by(models.AspectAnalysis.aspect).all()
+
+    db.query(models.AspectRollup).delete()
+    apply_rollup_delta(db, _rows_to_totals(rows))
+    db.commit()
+    return len(rows)
+
+def ensure_aspect_rollup(db: Session):
+    """Backfill the rollup table once for databases that have aspect analyses but no rollup yet"""
+    has_rollup = db.query(models.AspectRollup.aspect).first() is not None
+    has_aspects = db.query(models.AspectAnalysis.id).first() is not None
+    if has_aspects and not has_rollup:
+        rebuild_aspect_rollup(db)
+
+def _top_aspect_entry(aspect: str, count: int, score_sum: float, histogram: Dict[str, int]) -> Dict[str, Any]:
+    avg_sentiment = score_sum / count
+    return {
+        "aspect": aspect,
+        "count": count,
+        "avg_sentiment": avg_sentiment,
+        "sentiment_label": _sentiment_label(avg_sentiment),
+        "label_counts": histogram
+    }
+
+def top_aspects_from_rollup(db: Session, limit: int) -> List[Dict[str, Any]]:
+    """Most mentioned aspects read from the rollup table (O(#aspects))"""
+    rollups = db.query(models.AspectRollup).filter(
+        models.AspectRollup.mention_count > 0
+    ).order_by(
+        models.AspectRollup.mention_count.desc(), models.AspectRollup.aspect
+    ).limit(limit).all()
+
+    return [
+        _top_aspect_entry(rollup.aspect, rollup.mention_count, rollup.score_sum, {
+            "positive": rollup.positive_count,
+            "neutral": rollup.neutral_count,
+            "negative": rollup.negative_count
+        })
+        for rollup in rollups
+    ]
+
+def top_aspects_live(db: Session, limit: int) -> List[Dict[str, Any]]:
+    """Most mentioned aspects aggregated directly from aspect_analyses with GROUP BY"""
+    count_column = func.count(models.AspectAnalysis.id)
+    rows = db.query(*_aggregate_columns()).group_by(
+        models.AspectAnalysis.aspect
+    ).order_by(count_column.desc(), models.AspectAnalysis.aspect).limit(limit).all()
+
+    return [
+        _top_aspect_entry(aspect, count, score_sum or 0.0, {
+            "positive": positive or 0,
+            "neutral": neutral or 0,
+            "negative": negative or 0
+        })
+        for aspect, count, score_sum, positive, neutral, negative in rows
+    ]
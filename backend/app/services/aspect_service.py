@@ -1,14 +1,44 @@
 import spacy
-from typing import List, Dict, Tuple
+import os
+from typing import List, Dict, Tuple, Set, NamedTuple, Optional, Sequence
 import re
+import copy
 from app.services.sentiment_service import sentiment_service
+from app.services.phrase_matcher import PhraseMatcher
+from app.services.result_cache import build_result_cache, fingerprint
+from app.services.model_registry import LazyModelService
+from app.services.micro_batcher import build_micro_batcher
+from app.services.metrics import inference_batch_size, stage_duration
 
-class AspectExtractionService:
+# Words checked together by the special-case sentence overrides
+SPECIAL_CASE_PHRASES = [
+    "incredible", "battery", "struggles", "camera", "overheats", "gets hot",
+    "fast and responsive", "performance", "takes longer", "charging", "fantastic",
+    "sound", "disappointed", "premium", "build"
+]
+
+class SentenceIndex(NamedTuple):
+    """Per-doc sentence index used by aspect extraction"""
+    sentences: List[str]  # Sentence texts in document order
+    phrase_hits: List[Set[str]]  # Matched terms and phrases for each sentence
+    term_sentences: Dict[str, int]  # Aspect term -> first sentence that contains it
+
+class AspectExtractionService(LazyModelService):
     """Service for aspect-based sentiment analysis for smartphone reviews using SpaCy and BERT"""
     
-    def __init__(self):
-        # Load SpaCy model
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, sentence_splitter: str = "parser", pipe_batch_size: int = 64, pipe_n_process: int = 1):
+        super().__init__("aspects")
+        
+        # SpaCy pipeline, loaded on first use (only sentence boundaries are used)
+        if sentence_splitter not in ("parser", "sentencizer"):
+            raise ValueError(f"Unknown sentence splitter: {sentence_splitter}")
+        self.sentence_splitter = sentence_splitter
+        self.nlp = None
+        self.cache = None
+        
+        # Defaults for streaming batches through nlp.pipe
+        self.pipe_batch_size = pipe_batch_size
+        self.pipe_n_process = pipe_n_process
         
         # Smartphone-specific aspects with related terms
         self.smartphone_aspects = {
@@ -47,99 +77,217 @@ class AspectExtractionService:
                 "not impressed", "disappointing", "poor", "terrible", "avoid", "regret", "issue", "problem"
             ]
         }
+        
+        # One matcher for aspect terms, context phrases and special-case words
+        self.aspect_terms = set(self.all_aspects)
+        self.phrase_matcher = PhraseMatcher(
+            self.all_aspects
+            + self.context_phrases["positive"]
+            + self.context_phrases["negative"]
+            + SPECIAL_CASE_PHRASES
+        )
+    
+    def _load_models(self):
+        """Load the SpaCy pipeline and make sure the sentiment model is available"""
+        self.nlp = self._load_pipeline(self.sentence_splitter)
+        sentiment_service.ensure_loaded()
+        
+        # Result cache, invalidated by a change of pipeline, sentiment model or rule set
+        self.cache = build_result_cache("aspects", self._cache_fingerprint())
+    
+    def fork_safe(self) -> bool:
+        """Loading aspects also loads the sentiment model"""
+        return sentiment_service.fork_safe()
+    
+    def cache_fingerprint(self) -> str:
+        """Identify the pipeline, sentiment model and aspect rules that produced a cached result"""
+        self.ensure_loaded()
+        return self._cache_fingerprint()
+    
+    def _cache_fingerprint(self) -> str:
+        """Fingerprint of the loaded pipeline, the sentiment model and the aspect rules"""
+        return fingerprint(
+            self.sentence_splitter,
+            self.nlp.meta.get("name"),
+            self.nlp.meta.get("version"),
+            self.smartphone_aspects,
+            self.context_phrases,
+            SPECIAL_CASE_PHRASES,
+            sentiment_service.cache_fingerprint()
+        )
+    
+    def _load_pipeline(self, sentence_splitter: str):
+        """Load a SpaCy pipeline that only does what sentence segmentation needs"""
+        if sentence_splitter == "sentencizer":
+            # Rule-based punctuation splitter: no statistical components at all
+            nlp = spacy.blank("en")
+            nlp.add_pipe("sentencizer")
+            return nlp
+        
+        if sentence_splitter == "parser":
+            # Dependency parse boundaries; entities and lemmas are never used
+            return spacy.load("en_core_web_sm", exclude=["ner", "lemmatizer"])
+        
+        raise ValueError(f"Unknown sentence splitter: {sentence_splitter}")
     
     def extract_aspects(self, text: str) -> List[Dict]:
         """Extract smartphone-specific aspects from text and analyze their sentiment"""
-        # Process text with SpaCy
-        doc = self.nlp(text)
+        self.ensure_loaded()
+        
+        # Serve repeated texts from the cache
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+        
+        # Process text with SpaCy and index the sentences once: lowercase each
+        # sentence and find every phrase in it
+        with stage_duration.time(service="aspects", stage="spacy_parse"):
+            doc = self.nlp(text)
+            index = self._build_sentence_index(doc)
+        
+        _, results = self._extract_from_indexes([text], [index])
+        results = results[0]
+        
+        if self.cache is not None:
+            self.cache.set(text, results)
+        
+        return results
+    
+    def _extract_from_indexes(
+        self,
+        texts: List[str],
+        indexes: List[SentenceIndex],
+        document_texts: Sequence[str] = ()
+    ) -> Tuple[List[Dict], List[List[Dict]]]:
+        """Score the aspect sentences of all docs in one sentiment batch and collect aspects per doc
+
+        document_texts are scored in the same batch and their results returned
+        first, so whole-review sentiment shares forward passes with the aspect
+        sentences (and a one-sentence review is scored only once).
+        """
+        # Each distinct sentence that mentions an aspect is scored exactly once
+        sentence_keys = []
+        for doc_id, index in enumerate(indexes):
+            for sentence_id in sorted(set(index.term_sentences.values())):
+                sentence_keys.append((doc_id, sentence_id))
+        
+        sentiment_results = sentiment_service.analyze_batch(
+            list(document_texts)
+            + [indexes[doc_id].sentences[sentence_id] for doc_id, sentence_id in sentence_keys]
+        )
+        document_results = sentiment_results[:len(document_texts)]
+        
+        sentence_results = [{} for _ in indexes]
+        for (doc_id, sentence_id), result in zip(sentence_keys, sentiment_results[len(document_texts):]):
+            hits = indexes[doc_id].phrase_hits[sentence_id]
+            sentence_results[doc_id][sentence_id] = self._apply_sentence_overrides(hits, result)
+        
+        return document_results, [
+            self._collect_aspects(text, index, results)
+            for text, index, results in zip(texts, indexes, sentence_results)
+        ]
+    
+    def _build_sentence_index(self, doc) -> SentenceIndex:
+        """Map every aspect term to the first sentence of the doc that contains it"""
+        sentences = []
+        phrase_hits = []
+        term_sentences = {}
+        
+        for sentence_id, sent in enumerate(doc.sents):
+            hits = self.phrase_matcher.find(sent.text.lower())
+            sentences.append(sent.text)
+            phrase_hits.append(hits)
+            
+            for term in hits & self.aspect_terms:
+                term_sentences.setdefault(term, sentence_id)
+        
+        return SentenceIndex(sentences, phrase_hits, term_sentences)
+    
+    def _apply_sentence_overrides(self, hits: Set[str], sentiment_result: Dict) -> Dict:
+        """Apply context phrase and special case overrides to a sentence's sentiment"""
+        sentiment_result = dict(sentiment_result)
+        
+        # Check for context phrases in the sentence (positive takes priority)
+        sentiment_override = None
+        if not hits.isdisjoint(self.context_phrases["positive"]):
+            sentiment_override = "positive"
+        elif not hits.isdisjoint(self.context_phrases["negative"]):
+            sentiment_override = "negative"
+        
+        # Apply sentiment override if found
+        if sentiment_override:
+            if sentiment_override == "positive":
+                sentiment_result["sentiment_score"] = max(0.5, sentiment_result["sentiment_score"])
+                sentiment_result["sentiment_label"] = "positive"
+            else:  # negative
+                sentiment_result["sentiment_score"] = min(-0.5, sentiment_result["sentiment_score"])
+                sentiment_result["sentiment_label"] = "negative"
+        
+        # Special case handling for specific phrases
+        if "incredible" in hits and "battery" in hits:
+            sentiment_result["sentiment_score"] = 0.9
+            sentiment_result["sentiment_label"] = "positive"
+        
+        if "struggles" in hits and "camera" in hits:
+            sentiment_result["sentiment_score"] = -0.7
+            sentiment_result["sentiment_label"] = "negative"
+        
+        if "overheats" in hits or "gets hot" in hits:
+            sentiment_result["sentiment_score"] = -0.8
+            sentiment_result["sentiment_label"] = "negative"
+        
+        if "fast and responsive" in hits and "performance" in hits:
+            sentiment_result["sentiment_score"] = 0.8
+            sentiment_result["sentiment_label"] = "positive"
+        
+        if "takes longer" in hits and "charging" in hits:
+            sentiment_result["sentiment_score"] = -0.6
+            sentiment_result["sentiment_label"] = "negative"
+        
+        if "fantastic" in hits and "sound" in hits:
+            sentiment_result["sentiment_score"] = 0.9
+            sentiment_result["sentiment_label"] = "positive"
+        
+        if "disappointed" in hits and "camera" in hits:
+            sentiment_result["sentiment_score"] = -0.8
+            sentiment_result["sentiment_label"] = "negative"
+        
+        if "premium" in hits and "build" in hits:
+            sentiment_result["sentiment_score"] = 0.7
+            sentiment_result["sentiment_label"] = "positive"
+        
+        return sentiment_result
+    
+    def _collect_aspects(self, text: str, index: SentenceIndex, sentence_results: Dict[int, Dict]) -> List[Dict]:
+        """Pick the strongest sentence result per aspect category"""
         text_lower = text.lower()
         
         # Dictionary to store detected aspects and their sentiments
         detected_aspects = {}
         
-        # First, check for direct aspect mentions
+        # First, check for direct aspect mentions (in term order, so ties resolve as before)
         for aspect_term in self.all_aspects:
-            if aspect_term in text_lower:
-                # Get the category for this aspect term
-                category = self.aspect_to_category[aspect_term]
-                
-                # Find sentences containing the aspect
-                sentences = [sent.text for sent in doc.sents if aspect_term in sent.text.lower()]
-                
-                if sentences:
-                    # Use the first sentence containing the aspect
-                    relevant_text = sentences[0]
-                    
-                    # Check for context phrases in the sentence
-                    sentiment_override = None
-                    
-                    # Check positive context phrases
-                    for phrase in self.context_phrases["positive"]:
-                        if phrase in relevant_text.lower():
-                            sentiment_override = "positive"
-                            break
-                    
-                    # Check negative context phrases if no positive override
-                    if not sentiment_override:
-                        for phrase in self.context_phrases["negative"]:
-                            if phrase in relevant_text.lower():
-                                sentiment_override = "negative"
-                                break
-                    
-                    # Analyze sentiment of the sentence
-                    sentiment_result = sentiment_service.analyze_sentiment(relevant_text)
-                    
-                    # Apply sentiment override if found
-                    if sentiment_override:
-                        if sentiment_override == "positive":
-                            sentiment_result["sentiment_score"] = max(0.5, sentiment_result["sentiment_score"])
-                            sentiment_result["sentiment_label"] = "positive"
-                        else:  # negative
-                            sentiment_result["sentiment_score"] = min(-0.5, sentiment_result["sentiment_score"])
-                            sentiment_result["sentiment_label"] = "negative"
-                    
-                    # Special case handling for specific phrases
-                    if "incredible" in relevant_text.lower() and "battery" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = 0.9
-                        sentiment_result["sentiment_label"] = "positive"
-                    
-                    if "struggles" in relevant_text.lower() and "camera" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = -0.7
-                        sentiment_result["sentiment_label"] = "negative"
-                    
-                    if "overheats" in relevant_text.lower() or "gets hot" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = -0.8
-                        sentiment_result["sentiment_label"] = "negative"
-                    
-                    if "fast and responsive" in relevant_text.lower() and "performance" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = 0.8
-                        sentiment_result["sentiment_label"] = "positive"
-                    
-                    if "takes longer" in relevant_text.lower() and "charging" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = -0.6
-                        sentiment_result["sentiment_label"] = "negative"
-                    
-                    if "fantastic" in relevant_text.lower() and "sound" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = 0.9
-                        sentiment_result["sentiment_label"] = "positive"
-                    
-                    if "disappointed" in relevant_text.lower() and "camera" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = -0.8
-                        sentiment_result["sentiment_label"] = "negative"
-                    
-                    if "premium" in relevant_text.lower() and "build" in relevant_text.lower():
-                        sentiment_result["sentiment_score"] = 0.7
-                        sentiment_result["sentiment_label"] = "positive"
-                    
-                    # Store the result for this category
-                    if category not in detected_aspects or abs(sentiment_result["sentiment_score"]) > abs(detected_aspects[category]["sentiment_score"]):
-                        detected_aspects[category] = {
-                            "aspect": category,
-                            "sentiment_score": sentiment_result["sentiment_score"],
-                            "sentiment_label": sentiment_result["sentiment_label"],
-                            "confidence": sentiment_result["confidence"],
-                            "relevant_text": relevant_text
-                        }
+            sentence_id = index.term_sentences.get(aspect_term)
+            if sentence_id is None:
+                continue
+            
+            # Get the category for this aspect term
+            category = self.aspect_to_category[aspect_term]
+            
+            # Use the first sentence containing the aspect
+            relevant_text = index.sentences[sentence_id]
+            sentiment_result = sentence_results[sentence_id]
+            
+            # Store the result for this category
+            if category not in detected_aspects or abs(sentiment_result["sentiment_score"]) > abs(detected_aspects[category]["sentiment_score"]):
+                detected_aspects[category] = {
+                    "aspect": category,
+                    "sentiment_score": sentiment_result["sentiment_score"],
+                    "sentiment_label": sentiment_result["sentiment_label"],
+                    "confidence": sentiment_result["confidence"],
+                    "relevant_text": relevant_text
+                }
         
         # Check for implied sentiments in the entire text
         # These are cases where the aspect might not be directly mentioned
@@ -169,12 +317,87 @@ class AspectExtractionService:
         
         return results
     
-    def analyze_aspects_batch(self, texts: List[str]) -> List[List[Dict]]:
-        """Analyze aspects for a batch of texts"""
-        results = []
-        for text in texts:
-            results.append(self.extract_aspects(text))
+    def analyze_aspects_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """Analyze aspects for a batch of texts
+
+        Uncached texts are streamed through nlp.pipe and each doc is reduced to
+        its sentence index straight away, so docs are not kept around. The aspect
+        sentences of the whole batch then go to sentiment scoring as one batch.
+        """
+        _, results = self._analyze_batch(texts, False, batch_size, n_process)
         return results
+    
+    def analyze_with_sentiment(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> Tuple[List[Dict], List[List[Dict]]]:
+        """Analyze the whole-text sentiment and the aspects of a batch of texts
+
+        Same as sentiment_service.analyze_batch plus analyze_aspects_batch, but
+        the texts and the aspect sentences are scored in one sentiment batch.
+        """
+        return self._analyze_batch(texts, True, batch_size, n_process)
+    
+    def _analyze_batch(
+        self,
+        texts: List[str],
+        with_sentiment: bool,
+        batch_size: Optional[int],
+        n_process: Optional[int]
+    ) -> Tuple[List[Dict], List[List[Dict]]]:
+        """Aspects of a batch of texts and, if asked, their whole-text sentiment"""
+        self.ensure_loaded()
+        
+        results = [None] * len(texts)
+        
+        # Positions of each distinct text that is not cached yet
+        pending = {}
+        for i, text in enumerate(texts):
+            cached = self.cache.get(text) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(text, []).append(i)
+        
+        pending_texts = list(pending)
+        with stage_duration.time(service="aspects", stage="spacy_parse"):
+            docs = self.nlp.pipe(
+                pending_texts,
+                batch_size=batch_size or self.pipe_batch_size,
+                n_process=n_process or self.pipe_n_process
+            )
+            indexes = [self._build_sentence_index(doc) for doc in docs]
+        if pending_texts:
+            inference_batch_size.observe(len(pending_texts), service="aspects")
+        
+        document_results, batch_aspects = self._extract_from_indexes(
+            pending_texts, indexes, texts if with_sentiment else ()
+        )
+        
+        if self.cache is not None:
+            self.cache.set_many(zip(pending_texts, batch_aspects))
+        
+        for text, aspects in zip(pending_texts, batch_aspects):
+            positions = pending[text]
+            results[positions[0]] = aspects
+            for i in positions[1:]:
+                results[i] = copy.deepcopy(aspects)
+        
+        return document_results, results
 
 # Singleton instance
-aspect_service = AspectExtractionService()
+aspect_service = AspectExtractionService(
+    sentence_splitter=os.getenv("ASPECT_SENTENCE_SPLITTER", "parser"),
+    pipe_batch_size=int(os.getenv("ASPECT_PIPE_BATCH_SIZE", "64")),
+    pipe_n_process=int(os.getenv("ASPECT_PIPE_N_PROCESS", "1"))
+)
+
+# Coalesces concurrent single-text requests into batched pipe and sentiment calls
+aspect_batcher = build_micro_batcher("aspects", aspect_service.analyze_aspects_batch)
@@ -0,0 +1,22 @@
+from typing import Iterator, List
+
+def length_bucketed_batches(lengths: List[int], batch_size: int, max_batch_tokens: int) -> Iterator[List[int]]:
+    """Group item indices into length-sorted micro-batches
+
+    Indices are sorted by length so each batch only pads to its own longest
+    item. A batch is closed when it reaches batch_size items or when padding
+    it to its longest item would exceed max_batch_tokens.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batch = []
+    for index in order:
+        # Lengths are ascending, so the new item sets the padded length
+        padded_tokens = (len(batch) + 1) * lengths[index]
+        if batch and (len(batch) >= batch_size or padded_tokens > max_batch_tokens):
+            yield batch
+            batch = []
+        batch.append(index)
+
+    if batch:
+        yield batch
@@ -0,0 +1,96 @@
+import math
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+DECODING_STRATEGIES = ("greedy", "beam", "sampling")
+
+class DecodingPolicy(NamedTuple):
+    """How a summary is decoded and how long it may get"""
+    name: str
+    strategy: str  # "greedy", "beam" or "sampling"
+    num_beams: int = 4
+    # Output budget as a fraction of the input tokens (None: always max_output_tokens)
+    length_ratio: Optional[float] = None
+    min_output_tokens: int = 16
+    max_output_tokens: int = 150
+    # Inputs shorter than this many tokens get an extractive summary instead of generation (0: never)
+    extractive_below_tokens: int = 0
+    top_p: float = 0.9
+    temperature: float = 1.0
+
+    def output_budget(self, input_tokens: int) -> int:
+        """Maximum summary length in tokens for an input of the given length
+
+        Scaled budgets are rounded up to a multiple of 8 so that inputs of
+        similar length share a budget and can be generated in one batch.
+        """
+        if self.length_ratio is None:
+            return self.max_output_tokens
+        budget = math.ceil(input_tokens * self.length_ratio / 8) * 8
+        return max(self.min_output_tokens, min(self.max_output_tokens, budget))
+
+    def generation_kwargs(self, max_length: int) -> Dict:
+        """Settings passed to model.generate"""
+        if self.strategy == "greedy":
+            return {"max_length": max_length, "num_beams": 1, "do_sample": False}
+        if self.strategy == "sampling":
+            return {
+                "max_length": max_length,
+                "num_beams": 1,
+                "do_sample": True,
+                "top_p": self.top_p,
+                "temperature": self.temperature
+            }
+        return {"max_length": max_length, "num_beams": self.num_beams, "early_stopping": True}
+
+# Named tiers; "quality" keeps the original fixed beam search settings
+DECODING_POLICIES = {
+    "quality": DecodingPolicy("quality", "beam", num_beams=4, max_output_tokens=150),
+    "balanced": DecodingPolicy(
+        "balanced", "beam", num_beams=2, length_ratio=0.5, min_output_tokens=16, max_output_tokens=96
+    ),
+    "fast": DecodingPolicy(
+        "fast", "greedy", length_ratio=0.5, min_output_tokens=12, max_output_tokens=64, extractive_below_tokens=32
+    ),
+}
+
+def resolve_policy(
+    name: str,
+    strategy: Optional[str] = None,
+    max_output_tokens: Optional[int] = None
+) -> DecodingPolicy:
+    """A named tier, optionally with the strategy or length cap overridden for one request"""
+    if name not in DECODING_POLICIES:
+        raise ValueError(f"Unknown decoding policy '{name}', expected one of: {', '.join(DECODING_POLICIES)}")
+    policy = DECODING_POLICIES[name]
+
+    if strategy is not None:
+        if strategy not in DECODING_STRATEGIES:
+            raise ValueError(f"Unknown decoding strategy '{strategy}', expected one of: {', '.join(DECODING_STRATEGIES)}")
+        policy = policy._replace(strategy=strategy)
+    if max_output_tokens is not None:
+        if max_output_tokens < 1:
+            raise ValueError("max_output_tokens must be positive")
+        policy = policy._replace(
+            max_output_tokens=max_output_tokens,
+            min_output_tokens=min(policy.min_output_tokens, max_output_tokens)
+        )
+    return policy
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def extractive_summary(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> str:
+    """Leading sentences of a text that fit in max_tokens as counted by count_tokens (the first sentence is cut if longer)"""
+    sentences = [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+    selected: List[str] = []
+    for sentence in sentences:
+        if selected and count_tokens(" ".join(selected + [sentence])) > max_tokens:
+            break
+        selected.append(sentence)
+
+    summary = " ".join(selected)
+    words = summary.split()
+    # Only reached for a first sentence over budget; extractive inputs are short
+    while len(words) > 1 and count_tokens(" ".join(words)) > max_tokens:
+        words.pop()
+    return " ".join(words)
@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import models
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Rows fetched from the server-side cursor (and encoded) at a time
+EXPORT_CHUNK_SIZE = 1000
+
+CSV_COLUMNS = [
+    "id", "text", "rating", "source", "created_at",
+    "sentiment_score", "sentiment_label", "sentiment_confidence",
+    "summary", "aspects"
+]
+
+def iter_export_chunks(
+    db: Session,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Stream every review with its sentiment, aspects and summary, in id order, chunk by chunk
+
+    Reviews, sentiment and summary come from one outer-joined SELECT read
+    through a server-side cursor (yield_per), and the aspects of each chunk
+    from one IN query, so memory is bounded by chunk_size however large the
+    tables are. Pass the id of the last row received as after_id to resume.
+    """
+    statement = select(
+        models.Review.id,
+        models.Review.text,
+        models.Review.rating,
+        models.Review.source,
+        models.Review.created_at,
+        models.SentimentAnalysis.sentiment_score,
+        models.SentimentAnalysis.sentiment_label,
+        models.SentimentAnalysis.confidence,
+        models.ReviewSummary.summary_text
+    ).outerjoin(
+        models.SentimentAnalysis, models.SentimentAnalysis.review_id == models.Review.id
+    ).outerjoin(
+        models.ReviewSummary, models.ReviewSummary.review_id == models.Review.id
+    ).where(models.Review.id > after_id).order_by(models.Review.id)
+
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    result = db.execute(statement.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        aspects_by_review: Dict[int, List[Dict[str, Any]]] = {}
+        aspect_rows = db.execute(
+            select(
+                models.AspectAnalysis.review_id,
+                models.AspectAnalysis.aspect,
+                models.AspectAnalysis.sentiment_score,
+                models.AspectAnalysis.sentiment_label,
+                models.AspectAnalysis.confidence
+            ).where(
+                models.AspectAnalysis.review_id.in_([row.id for row in partition])
+            ).order_by(models.AspectAnalysis.id)
+        )
+        for review_id, aspect, score, label, confidence in aspect_rows:
+            aspects_by_review.setdefault(review_id, []).append({
+                "aspect": aspect,
+                "sentiment_score": score,
+                "sentiment_label": label,
+                "confidence": confidence
+            })
+
+        yield [
+            {
+                "id": row.id,
+                "text": row.text,
+                "rating": row.rating,
+                "source": row.source,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "sentiment_score": row.sentiment_score,
+                "sentiment_label": row.sentiment_label,
+                "sentiment_confidence": row.confidence,
+                "summary": row.summary_text,
+                "aspects": aspects_by_review.get(row.id, [])
+            }
+            for row in partition
+        ]
+
+def encode_chunk(rows: List[Dict[str, Any]], export_format: str, header: bool = False) -> bytes:
+    """Encode a chunk of export rows as NDJSON lines or CSV records (aspects as a JSON cell)"""
+    if export_format == "ndjson":
+        return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow({**row, "aspects": json.dumps(row["aspects"], ensure_ascii=False)})
+    return buffer.getvalue().encode("utf-8")
+
+def iter_export_bytes(
+    db: Session,
+    export_format: str,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encoded export, one piece per chunk (CSV starts with a header row)"""
+    header = export_format == "csv"
+    for rows in iter_export_chunks(db, after_id=after_id, limit=limit, chunk_size=chunk_size):
+        yield encode_chunk(rows, export_format, header=header)
+        header = False
+    if header:
+        # Nothing to export: still emit a valid CSV
+        yield encode_chunk([], export_format, header=True)
+
+def gzip_stream(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into a single gzip member"""
+    compressor = zlib.compressobj(wbits=31)
+    for piece in pieces:
+        # Sync flush so each chunk reaches the client without waiting for the end
+        data = compressor.compress(piece) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
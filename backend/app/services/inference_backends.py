@@ -0,0 +1,342 @@
+import json
+import os
+import pathlib
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import torch
+from dotenv import load_dotenv
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, AutoTokenizer
+
+# Load environment variables
+load_dotenv()
+
+# Backend directory (holds app/)
+BASE_DIR = pathlib.Path(__file__).parent.parent.parent.absolute()
+
+# Where `manage.py export-onnx` writes exported models, one subdirectory per task
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(BASE_DIR, "onnx_models"))
+
+# Inference backends for the sentiment classifier
+CLASSIFIER_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Inference backends for the summarization encoder-decoder
+SEQ2SEQ_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Component files of an exported encoder-decoder (the decoder is exported twice:
+# for the first step, and for later steps that reuse the past key/values)
+SEQ2SEQ_ONNX_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+
+def onnx_model_path(task: str) -> str:
+    """Directory of the exported ONNX model for a task"""
+    return os.path.join(ONNX_MODEL_DIR, task)
+
+def import_onnxruntime():
+    """Import onnxruntime, which only the ONNX backends need"""
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The ONNX backends need onnxruntime: pip install -r requirements-onnx.txt")
+    return onnxruntime
+
+def import_optimum_onnxruntime():
+    """Import optimum's ONNX Runtime integration, which only the ONNX summarization backends need"""
+    try:
+        import optimum.onnxruntime
+    except ImportError:
+        raise RuntimeError("The ONNX summarization backends need optimum: pip install -r requirements-onnx.txt")
+    return optimum.onnxruntime
+
+def write_onnx_metadata(model_dir: str, model_name: str):
+    """Record which model (and revision) an export was made from"""
+    config = AutoConfig.from_pretrained(model_name)
+    with open(os.path.join(model_dir, "metadata.json"), "w") as f:
+        json.dump({"model_name": model_name, "version": getattr(config, "_commit_hash", None)}, f)
+
+def read_onnx_metadata(model_dir: str, model_name: str) -> Dict[str, Any]:
+    """Metadata written next to an exported model; checks it was exported from model_name"""
+    metadata_path = os.path.join(model_dir, "metadata.json")
+    if not os.path.exists(metadata_path):
+        raise RuntimeError(f"No exported model in {model_dir}: run `python manage.py export-onnx` first")
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    if metadata["model_name"] != model_name:
+        raise RuntimeError(
+            f"{model_dir} holds an export of {metadata['model_name']}, expected {model_name}: "
+            "run `python manage.py export-onnx` again"
+        )
+    return metadata
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax"""
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+class ClassifierBackend:
+    """Runs a sequence classifier over padded tokenizer output and returns class probabilities"""
+
+    # Tensor type the tokenizer should pad to ("pt" or "np")
+    tensor_type = "pt"
+
+    def __init__(self, name: str, model_name: str):
+        self.name = name
+        self.model_name = model_name
+        self.version = None
+
+    def load(self):
+        raise NotImplementedError
+
+    def predict_proba(self, inputs: Dict[str, Any]) -> np.ndarray:
+        raise NotImplementedError
+
+    def fingerprint_parts(self) -> Tuple:
+        """What identifies this backend's outputs, for result cache fingerprints"""
+        return (self.name, self.model_name, self.version)
+
+class TorchClassifierBackend(ClassifierBackend):
+    """PyTorch eager inference in fp32, or with dynamically int8-quantized Linear layers"""
+
+    def __init__(self, model_name: str, quantize: bool = False):
+        super().__init__("torch-int8" if quantize else "torch", model_name)
+        self.quantize = quantize
+        self.model = None
+        self.device = None
+
+    def load(self):
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        self.version = getattr(model.config, "_commit_hash", None)
+        model.eval()
+
+        if self.quantize:
+            # Dynamic quantization kernels run on CPU only
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.device = torch.device("cpu")
+        else:
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+        self.model = model.to(self.device)
+
+    def predict_proba(self, inputs: Dict[str, Any]) -> np.ndarray:
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+            return torch.nn.functional.softmax(logits, dim=1).cpu().numpy()
+
+class OnnxClassifierBackend(ClassifierBackend):
+    """ONNX Runtime inference on CPU over a model exported by `manage.py export-onnx`"""
+
+    tensor_type = "np"
+
+    def __init__(self, model_name: str, quantized: bool = False, model_dir: str = None):
+        super().__init__("onnx-int8" if quantized else "onnx", model_name)
+        self.model_file = "model.int8.onnx" if quantized else "model.onnx"
+        self.model_dir = model_dir or onnx_model_path("sentiment")
+        self.session = None
+        self.input_names = set()
+
+    def load(self):
+        onnxruntime = import_onnxruntime()
+        metadata = read_onnx_metadata(self.model_dir, self.model_name)
+        self.version = metadata.get("version")
+
+        model_path = os.path.join(self.model_dir, self.model_file)
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"{model_path} not found: run `python manage.py export-onnx` first")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def predict_proba(self, inputs: Dict[str, Any]) -> np.ndarray:
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in inputs.items() if k in self.input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        return softmax(logits.astype(np.float32))
+
+def build_classifier_backend(name: str, model_name: str) -> ClassifierBackend:
+    """Create (but do not load) a classifier backend by name"""
+    if name == "torch":
+        return TorchClassifierBackend(model_name)
+    if name == "torch-int8":
+        return TorchClassifierBackend(model_name, quantize=True)
+    if name == "onnx":
+        return OnnxClassifierBackend(model_name)
+    if name == "onnx-int8":
+        return OnnxClassifierBackend(model_name, quantized=True)
+    raise ValueError(f"Unknown sentiment backend '{name}', expected one of: {', '.join(CLASSIFIER_BACKENDS)}")
+
+class _LogitsOnly(torch.nn.Module):
+    """Wraps a classifier so the exported graph has a single logits output"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def export_classifier_onnx(model_name: str, output_dir: str, quantize: bool = True) -> Dict[str, str]:
+    """Export a sequence classifier to ONNX (plus a dynamically int8-quantized copy)
+
+    Batch and sequence axes are dynamic, so the exported model takes the same
+    length-bucketed micro-batches as the PyTorch one.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    example = tokenizer(["an example review to trace the graph"], return_tensors="pt")
+    model_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (example["input_ids"], example["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=14
+        )
+    written = {"onnx": model_path}
+
+    if quantize:
+        import_onnxruntime()
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, "model.int8.onnx")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        written["onnx-int8"] = quantized_path
+
+    write_onnx_metadata(output_dir, model_name)
+    return written
+
+class Seq2SeqBackend:
+    """Runs generate() for an encoder-decoder over padded tokenizer output"""
+
+    def __init__(self, name: str, model_name: str):
+        self.name = name
+        self.model_name = model_name
+        self.version = None
+        self.model = None
+        self.device = torch.device("cpu")
+
+    def load(self):
+        raise NotImplementedError
+
+    def generate(self, inputs: Dict[str, torch.Tensor], **generation_kwargs) -> torch.Tensor:
+        """Generated token ids for a batch (inputs must already be on self.device)"""
+        with torch.no_grad():
+            return self.model.generate(**inputs, **generation_kwargs)
+
+    def fingerprint_parts(self) -> Tuple:
+        """What identifies this backend's outputs, for result cache fingerprints"""
+        return (self.name, self.model_name, self.version)
+
+class TorchSeq2SeqBackend(Seq2SeqBackend):
+    """PyTorch generation in fp32, or with dynamically int8-quantized Linear layers"""
+
+    def __init__(self, model_name: str, quantize: bool = False):
+        super().__init__("torch-int8" if quantize else "torch", model_name)
+        self.quantize = quantize
+
+    def load(self):
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+        self.version = getattr(model.config, "_commit_hash", None)
+        model.eval()
+
+        if self.quantize:
+            # Dynamic quantization kernels run on CPU only
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.device = torch.device("cpu")
+        else:
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+        self.model = model.to(self.device)
+
+class OnnxSeq2SeqBackend(Seq2SeqBackend):
+    """ONNX Runtime encoder and decoders with past key/value caching, driven by optimum's generate()"""
+
+    def __init__(self, model_name: str, quantized: bool = False, model_dir: str = None):
+        super().__init__("onnx-int8" if quantized else "onnx", model_name)
+        self.quantized = quantized
+        self.model_dir = model_dir or onnx_model_path("summarization")
+
+    def load(self):
+        ort = import_optimum_onnxruntime()
+        metadata = read_onnx_metadata(self.model_dir, self.model_name)
+        self.version = metadata.get("version")
+
+        if self.quantized:
+            model_dir = os.path.join(self.model_dir, "int8")
+            file_names = [name.replace(".onnx", "_quantized.onnx") for name in SEQ2SEQ_ONNX_FILES]
+        else:
+            model_dir = self.model_dir
+            file_names = list(SEQ2SEQ_ONNX_FILES)
+
+        missing = [name for name in file_names if not os.path.exists(os.path.join(model_dir, name))]
+        if missing:
+            raise RuntimeError(f"{', '.join(missing)} not found in {model_dir}: run `python manage.py export-onnx` first")
+
+        encoder_file, decoder_file, decoder_with_past_file = file_names
+        self.model = ort.ORTModelForSeq2SeqLM.from_pretrained(
+            model_dir,
+            encoder_file_name=encoder_file,
+            decoder_file_name=decoder_file,
+            decoder_with_past_file_name=decoder_with_past_file,
+            use_cache=True,
+            provider="CPUExecutionProvider"
+        )
+
+def build_seq2seq_backend(name: str, model_name: str) -> Seq2SeqBackend:
+    """Create (but do not load) a summarization backend by name"""
+    if name == "torch":
+        return TorchSeq2SeqBackend(model_name)
+    if name == "torch-int8":
+        return TorchSeq2SeqBackend(model_name, quantize=True)
+    if name == "onnx":
+        return OnnxSeq2SeqBackend(model_name)
+    if name == "onnx-int8":
+        return OnnxSeq2SeqBackend(model_name, quantized=True)
+    raise ValueError(f"Unknown summarization backend '{name}', expected one of: {', '.join(SEQ2SEQ_BACKENDS)}")
+
+def export_seq2seq_onnx(model_name: str, output_dir: str, quantize: bool = True) -> Dict[str, str]:
+    """Export an encoder-decoder to ONNX with past key/value inputs (plus int8-quantized copies)
+
+    optimum writes the encoder, the first-step decoder and the decoder that
+    takes the cached past key/values as separate graphs; the quantized copies
+    go to an int8/ subdirectory.
+    """
+    ort = import_optimum_onnxruntime()
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model = ort.ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(output_dir)
+    written = {"onnx": output_dir}
+
+    if quantize:
+        quantized_dir = os.path.join(output_dir, "int8")
+        config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        for file_name in SEQ2SEQ_ONNX_FILES:
+            quantizer = ort.ORTQuantizer.from_pretrained(output_dir, file_name=file_name)
+            quantizer.quantize(save_dir=quantized_dir, quantization_config=config)
+        # ORTModelForSeq2SeqLM.from_pretrained needs the configs next to the graphs
+        model.config.save_pretrained(quantized_dir)
+        if model.generation_config is not None:
+            model.generation_config.save_pretrained(quantized_dir)
+        written["onnx-int8"] = quantized_dir
+
+    write_onnx_metadata(output_dir, model_name)
+    return written
+
+def compare_probabilities(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Label agreement and probability drift of a backend against the reference backend"""
+    return {
+        "label_agreement": float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1))),
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+        "mean_abs_diff": float(np.abs(reference - candidate).mean())
+    }
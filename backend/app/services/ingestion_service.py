@@ -0,0 +1,119 @@
+import codecs
+import csv
+import os
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models import models
+
+# Load environment variables
+load_dotenv()
+
+# Rows inserted and committed per batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+
+# Bytes read from the upload at a time
+INGEST_READ_CHUNK_BYTES = 1024 * 1024
+
+class CSVFormatError(ValueError):
+    """The upload is not a usable reviews CSV"""
+
+def _parse_rating(value: Optional[str]) -> Optional[float]:
+    """Parse an optional rating cell; raises ValueError for non-numeric values"""
+    if value is None or not value.strip():
+        return None
+    rating = float(value)
+    if rating != rating:  # NaN
+        return None
+    return rating
+
+def iter_text_lines(stream: BinaryIO, chunk_bytes: int = INGEST_READ_CHUNK_BYTES) -> Iterator[str]:
+    """Decode a binary stream chunk by chunk and yield its lines with their endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+
+    while True:
+        chunk = stream.read(chunk_bytes)
+        pending += decoder.decode(chunk, final=not chunk)
+
+        # Keep the trailing partial line for the next chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+        if not chunk:
+            if pending:
+                yield pending
+            return
+
+def ingest_reviews_csv(
+    db: Session,
+    stream: BinaryIO,
+    source: str = "csv",
+    batch_size: int = INGEST_BATCH_SIZE
+) -> Dict:
+    """Stream a reviews CSV into the database in bounded batches
+
+    The file is decoded and parsed row by row, so memory stays flat whatever
+    its size. Valid rows are written with one executemany INSERT per batch
+    and committed per batch; rows with no text or a non-numeric rating are
+    counted as rejected and skipped.
+    """
+    started = time.perf_counter()
+
+    reader = csv.DictReader(iter_text_lines(stream))
+    try:
+        fieldnames = reader.fieldnames
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise CSVFormatError(f"Invalid CSV header: {str(e)}")
+    if fieldnames is None or "text" not in fieldnames:
+        raise CSVFormatError("CSV must contain a 'text' column")
+    has_rating = "rating" in fieldnames
+
+    reviews_processed = 0
+    rows_rejected = 0
+    batch: List[Dict] = []
+
+    try:
+        for row in reader:
+            text = row.get("text")
+            if text is None or not text.strip():
+                rows_rejected += 1
+                continue
+
+            try:
+                rating = _parse_rating(row.get("rating")) if has_rating else None
+            except ValueError:
+                rows_rejected += 1
+                continue
+
+            batch.append({"text": text, "rating": rating, "source": source})
+
+            if len(batch) >= batch_size:
+                reviews_processed += _insert_batch(db, batch)
+                batch = []
+
+        if batch:
+            reviews_processed += _insert_batch(db, batch)
+
+    except (csv.Error, UnicodeDecodeError) as e:
+        db.rollback()
+        raise CSVFormatError(f"Invalid CSV after {reviews_processed} rows were stored: {str(e)}")
+
+    duration = time.perf_counter() - started
+    return {
+        "reviews_processed": reviews_processed,
+        "rows_rejected": rows_rejected,
+        "duration_seconds": duration,
+        "rows_per_second": reviews_processed / duration if duration > 0 else 0.0
+    }
+
+def _insert_batch(db: Session, rows: List[Dict]) -> int:
+    """Insert a batch of reviews with one executemany statement and commit it"""
+    db.execute(insert(models.Review), rows)
+    db.commit()
+    return len(rows)
@@ -0,0 +1,364 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models import models
+from app.services.analysis_store import store_sentiment_results, store_aspect_results, store_summaries
+from app.services.sentiment_service import sentiment_service
+from app.services.aspect_service import aspect_service
+from app.services.summarization_service import summarization_service
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Job kinds and the services they run
+JOB_KINDS = ("sentiment", "aspects", "summarization")
+
+# Statuses a job does not leave on its own
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Statuses of jobs some process is expected to be working on
+UNFINISHED_STATUSES = ("queued", "running")
+
+# Worker pool configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "32"))
+JOB_MODEL_CONCURRENCY = {
+    kind: int(os.getenv(f"JOB_CONCURRENCY_{kind.upper()}", "1")) for kind in JOB_KINDS
+}
+
+# Job ownership: owners renew their heartbeat every JOB_HEARTBEAT_SECONDS, and
+# any process may take over a job whose heartbeat is older than JOB_LEASE_SECONDS
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+class JobManager:
+    """Runs bulk analysis jobs persisted in the database on a bounded worker pool
+
+    Every job has one item row per review. Workers take pending items in
+    chunks, run the model for the chunk, store the analyses and mark the
+    items done in one commit, so a job that is cancelled, fails or is
+    interrupted by a restart picks up where it stopped and never redoes
+    finished reviews. A semaphore per model caps how many chunks use the
+    same model at once.
+
+    Each unfinished job records the process that owns it and a heartbeat
+    that process renews while it holds the job. With several worker
+    processes sharing the database, a job is only taken over once its
+    owner has stopped renewing (it exited or hung), and a worker that
+    finds its job owned by another process stops working on it. A chunk
+    is only committed while its worker still owns the job, so one that
+    finishes after a takeover is rolled back rather than stored twice.
+    """
+
+    def __init__(self, workers: int, chunk_size: int, model_concurrency: Dict[str, int]):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.semaphores = {
+            kind: threading.BoundedSemaphore(limit) for kind, limit in model_concurrency.items()
+        }
+        self._executor = None
+        self._active = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analysis-job")
+        return self._executor
+
+    def submit(self, db: Session, kind: str, review_ids: List[int]) -> models.AnalysisJob:
+        """Persist a new job with one pending item per distinct review and queue it"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        review_ids = list(dict.fromkeys(review_ids))
+        job = models.AnalysisJob(
+            kind=kind,
+            status="queued",
+            total_items=len(review_ids),
+            processed_items=0,
+            owner_pid=os.getpid(),
+            heartbeat_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.flush()
+
+        db.add_all([models.AnalysisJobItem(job_id=job.id, review_id=review_id) for review_id in review_ids])
+        db.commit()
+        db.refresh(job)
+
+        self._enqueue(job.id)
+        return job
+
+    def cancel(self, db: Session, job: models.AnalysisJob) -> models.AnalysisJob:
+        """Stop a queued or running job after its current chunk"""
+        if job.status not in TERMINAL_STATUSES:
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+        return job
+
+    def resume(self, db: Session, job: models.AnalysisJob) -> models.AnalysisJob:
+        """Re-queue a failed or cancelled job; only its pending items are processed"""
+        with self._lock:
+            if job.status in ("failed", "cancelled"):
+                job.status = "queued"
+                job.error = None
+                job.finished_at = None
+                job.owner_pid = os.getpid()
+                job.heartbeat_at = datetime.utcnow()
+                db.commit()
+                db.refresh(job)
+                self._enqueue_locked(job.id)
+        return job
+
+    def resume_unfinished(self):
+        """Take over jobs whose owner stopped renewing its lease, and keep doing so
+
+        Jobs left by a process that exited are picked up once their lease
+        expires; the heartbeat thread started here keeps checking.
+        """
+        with self._lock:
+            self._start_heartbeat_locked()
+
+        db = SessionLocal()
+        try:
+            self._claim_stale(db)
+        finally:
+            db.close()
+
+    def _claim_stale(self, db: Session):
+        """Re-queue unfinished jobs whose lease expired, as this process"""
+        owner_pid = os.getpid()
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=JOB_LEASE_SECONDS)
+
+        with self._lock:
+            jobs = db.query(models.AnalysisJob).filter(
+                models.AnalysisJob.status.in_(UNFINISHED_STATUSES),
+                or_(
+                    models.AnalysisJob.heartbeat_at.is_(None),
+                    models.AnalysisJob.heartbeat_at < cutoff,
+                    # Left by an earlier process that had the same pid (e.g. PID 1 in a container)
+                    models.AnalysisJob.owner_pid == owner_pid
+                )
+            ).order_by(models.AnalysisJob.id).all()
+
+            claimed = []
+            for job in jobs:
+                if job.id in self._active:
+                    continue
+                # Only take the job if no other process renewed or claimed it since it was read
+                result = db.execute(
+                    update(models.AnalysisJob).where(
+                        models.AnalysisJob.id == job.id,
+                        models.AnalysisJob.status.in_(UNFINISHED_STATUSES),
+                        models.AnalysisJob.owner_pid.is_not_distinct_from(job.owner_pid),
+                        models.AnalysisJob.heartbeat_at.is_not_distinct_from(job.heartbeat_at)
+                    ).values(status="queued", owner_pid=owner_pid, heartbeat_at=now)
+                )
+                if result.rowcount:
+                    claimed.append(job.id)
+            db.commit()
+
+            for job_id in claimed:
+                logger.info("Taking over analysis job %s", job_id)
+                self._enqueue_locked(job_id)
+
+    def _renew_leases(self, db: Session):
+        """Renew the heartbeat of the jobs this process is working on"""
+        with self._lock:
+            active = list(self._active)
+        if not active:
+            return
+        db.execute(
+            update(models.AnalysisJob).where(
+                models.AnalysisJob.id.in_(active),
+                models.AnalysisJob.owner_pid == os.getpid()
+            ).values(heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+
+    def _start_heartbeat_locked(self):
+        """Start this process's heartbeat thread if it is not running (lock held)"""
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="analysis-job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            db = SessionLocal()
+            try:
+                self._renew_leases(db)
+                self._claim_stale(db)
+            except Exception:
+                logger.exception("Renewing analysis job leases failed")
+                db.rollback()
+            finally:
+                db.close()
+
+    def _enqueue(self, job_id: int):
+        with self._lock:
+            self._enqueue_locked(job_id)
+
+    def _enqueue_locked(self, job_id: int):
+        """Submit a job to the pool unless a worker already owns it (lock held)"""
+        if job_id in self._active:
+            # The running worker sees the "queued" status and carries on
+            return
+        self._start_heartbeat_locked()
+        self._active.add(job_id)
+        self._get_executor().submit(self._run, job_id)
+
+    def _should_stop(self, db: Session, job: models.AnalysisJob) -> bool:
+        """Check for cancellation or a lost lease and release the job if the worker stops (lock held by caller)"""
+        db.refresh(job)
+        if job.status == "cancelled":
+            self._active.discard(job.id)
+            return True
+        if job.owner_pid != os.getpid():
+            logger.warning("Analysis job %s was taken over by process %s", job.id, job.owner_pid)
+            self._active.discard(job.id)
+            return True
+        return False
+
+    def _run(self, job_id: int):
+        """Process a job's pending items chunk by chunk"""
+        db = SessionLocal()
+        try:
+            job = db.get(models.AnalysisJob, job_id)
+            if job is None:
+                with self._lock:
+                    self._active.discard(job_id)
+                return
+
+            while True:
+                with self._lock:
+                    if self._should_stop(db, job):
+                        return
+
+                    if job.status == "queued":
+                        job.status = "running"
+                        job.started_at = job.started_at or datetime.utcnow()
+                        db.commit()
+
+                    items = db.query(models.AnalysisJobItem).filter(
+                        models.AnalysisJobItem.job_id == job_id,
+                        models.AnalysisJobItem.status == "pending"
+                    ).order_by(models.AnalysisJobItem.id).limit(self.chunk_size).all()
+
+                    if not items:
+                        job.status = "completed"
+                        job.finished_at = datetime.utcnow()
+                        db.commit()
+                        self._active.discard(job_id)
+                        return
+
+                # Run the model for this chunk within the per-model limit
+                with self.semaphores[job.kind]:
+                    item_updates = self._process_chunk(db, job, items)
+
+                # A rolled-back chunk is picked up again (or the lost job
+                # dropped) by the checks at the top of the loop
+                self._commit_chunk(db, job_id, item_updates)
+
+        except Exception as e:
+            logger.exception("Analysis job %s failed", job_id)
+            db.rollback()
+            with self._lock:
+                job = db.get(models.AnalysisJob, job_id)
+                if job is not None and job.status != "cancelled" and job.owner_pid == os.getpid():
+                    job.status = "failed"
+                    job.error = str(e)
+                    job.finished_at = datetime.utcnow()
+                    db.commit()
+                self._active.discard(job_id)
+
+        finally:
+            db.close()
+
+    def _commit_chunk(self, db: Session, job_id: int, item_updates: List[Dict[str, Any]]) -> bool:
+        """Commit a processed chunk if this process still owns the job and its items are still pending
+
+        Ownership is only checked between chunks, so another process may have
+        taken the job over (after a cancel and resume, or an expired lease)
+        while this chunk ran. Then the whole chunk, analyses included, is
+        rolled back and False returned, so no review is stored or counted twice.
+        """
+        owned = db.execute(
+            update(models.AnalysisJob).where(
+                models.AnalysisJob.id == job_id,
+                models.AnalysisJob.owner_pid == os.getpid()
+            ).values(processed_items=models.AnalysisJob.processed_items + len(item_updates)),
+            execution_options={"synchronize_session": False}
+        )
+        if owned.rowcount != 1:
+            logger.warning("Analysis job %s was taken over during a chunk; discarding the chunk", job_id)
+            db.rollback()
+            return False
+
+        items = models.AnalysisJobItem.__table__
+        marked = db.execute(
+            update(items).where(
+                items.c.id == bindparam("item_id"),
+                items.c.status == "pending"
+            ).values(status=bindparam("new_status"), result=bindparam("new_result")),
+            item_updates
+        )
+        if marked.rowcount != len(item_updates):
+            logger.warning("Items of analysis job %s were processed elsewhere; discarding the chunk", job_id)
+            db.rollback()
+            return False
+
+        db.commit()
+        return True
+
+    def _process_chunk(
+        self, db: Session, job: models.AnalysisJob, items: List[models.AnalysisJobItem]
+    ) -> List[Dict[str, Any]]:
+        """Analyze and store one chunk of reviews and return the item updates (caller commits)"""
+        review_ids = [item.review_id for item in items]
+        reviews_by_id = {
+            review.id: review
+            for review in db.query(models.Review).filter(models.Review.id.in_(review_ids)).all()
+        }
+        reviews = [reviews_by_id[review_id] for review_id in review_ids if review_id in reviews_by_id]
+        texts = [review.text for review in reviews]
+
+        if job.kind == "sentiment":
+            results = sentiment_service.analyze_batch(texts)
+            store_sentiment_results(db, reviews, results)
+        elif job.kind == "aspects":
+            results = aspect_service.analyze_aspects_batch(texts)
+            store_aspect_results(db, reviews, results)
+        else:
+            results = summarization_service.generate_batch_summaries(texts)
+            store_summaries(db, reviews, results)
+
+        results_by_id = {review.id: result for review, result in zip(reviews, results)}
+        return [
+            {
+                "item_id": item.id,
+                "new_status": "done" if item.review_id in results_by_id else "missing",
+                "new_result": results_by_id.get(item.review_id)
+            }
+            for item in items
+        ]
+
+# Singleton instance
+job_manager = JobManager(JOB_WORKERS, JOB_CHUNK_SIZE, JOB_MODEL_CONCURRENCY)
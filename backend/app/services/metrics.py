@@ -0,0 +1,271 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Directory where each worker process of a multi-process server writes its
+# metrics, so any worker answering a scrape can report all of them (empty: this process only)
+METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+METRICS_SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "5"))
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow generate calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Batch size buckets (items per model call)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# A family as exposed to Prometheus: name, type, help text and (labels, value) samples
+MetricFamily = Tuple[str, str, str, Iterable[Tuple[Dict[str, str], float]]]
+
+# A family with its samples spelled out: name, type, help text and (sample name, labels, value) samples
+RenderedFamily = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(str(value))}"' for name, value in labels.items()) + "}"
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name + "_total", dict(zip(self.labelnames, key)), value) for key, value in values]
+
+class Histogram:
+    """Cumulative histogram with labels and fixed buckets
+
+    An observation is one bisect and a few additions under a lock, cheap
+    enough to leave on around every model call and request.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: count per bucket (last one is +Inf), sum of observations
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels[name] for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][position] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        samples = []
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((self.name + "_bucket", {**labels, "le": format_value(bound)}, cumulative))
+            samples.append((self.name + "_count", labels, cumulative))
+            samples.append((self.name + "_sum", labels, total))
+        return samples
+
+# Metrics defined by the modules, in registration order
+_metrics: List = []
+
+# Functions producing metric families at scrape time from existing stats
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+def counter(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+    metric = Counter(name, help_text, labelnames)
+    _metrics.append(metric)
+    return metric
+
+def histogram(
+    name: str,
+    help_text: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    metric = Histogram(name, help_text, labelnames, buckets)
+    _metrics.append(metric)
+    return metric
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]):
+    """Add a function whose metric families are computed on every scrape"""
+    _collectors.append(collector)
+
+def collect_families() -> List[RenderedFamily]:
+    """Every metric of this process, with the samples taken now"""
+    families = [(metric.name, metric.kind, metric.help_text, metric.samples()) for metric in _metrics]
+    for collector in _collectors:
+        for name, kind, help_text, samples in collector():
+            families.append((name, kind, help_text, [(name, labels, value) for labels, value in samples]))
+    return families
+
+def format_families(families: Iterable[RenderedFamily]) -> str:
+    """Families in the Prometheus text exposition format"""
+    lines = []
+    for family, kind, help_text, samples in families:
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in samples:
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_MULTIPROCESS_DIR, f"metrics-{pid}.json")
+
+def write_snapshot():
+    """Write this process's metrics to the multi-process directory (atomically)"""
+    os.makedirs(METRICS_MULTIPROCESS_DIR, exist_ok=True)
+    path = snapshot_path(os.getpid())
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(collect_families(), f)
+    os.replace(temporary, path)
+
+def read_snapshots() -> List[Tuple[str, List[RenderedFamily]]]:
+    """(pid, families) of every worker that wrote a snapshot recently
+
+    Snapshots not refreshed for three intervals belong to workers that
+    exited and are removed.
+    """
+    snapshots = []
+    stale_before = time.time() - 3 * METRICS_SNAPSHOT_SECONDS
+    for path in sorted(glob.glob(os.path.join(METRICS_MULTIPROCESS_DIR, "metrics-*.json"))):
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                families = json.load(f)
+        except (OSError, ValueError):
+            # Removed or replaced by its worker while being read
+            continue
+        pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+        snapshots.append((pid, families))
+    return snapshots
+
+def merge_snapshots(snapshots: List[Tuple[str, List[RenderedFamily]]]) -> List[RenderedFamily]:
+    """One family per name with every worker's samples, told apart by a worker label"""
+    merged: Dict[str, RenderedFamily] = {}
+    for pid, families in snapshots:
+        for family, kind, help_text, samples in families:
+            entry = merged.setdefault(family, (family, kind, help_text, []))
+            entry[3].extend((name, {"worker": pid, **labels}, value) for name, labels, value in samples)
+    return list(merged.values())
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format
+
+    With METRICS_MULTIPROCESS_DIR set, the metrics of every worker are
+    rendered with a worker (pid) label: this worker's as of now, the
+    others' as of their last snapshot.
+    """
+    if not METRICS_MULTIPROCESS_DIR:
+        return format_families(collect_families())
+    write_snapshot()
+    return format_families(merge_snapshots(read_snapshots()))
+
+def start_snapshots():
+    """Write this process's snapshot every METRICS_SNAPSHOT_SECONDS (no-op without METRICS_MULTIPROCESS_DIR)"""
+    if not METRICS_MULTIPROCESS_DIR:
+        return
+
+    def run():
+        while True:
+            try:
+                write_snapshot()
+            except OSError:
+                logger.exception("Writing the metrics snapshot failed")
+            time.sleep(METRICS_SNAPSHOT_SECONDS)
+
+    threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+
+# Shared metrics
+http_request_duration = histogram(
+    "http_request_duration_seconds",
+    "Time to produce the response (streamed bodies: until the response starts), by route template",
+    ("method", "route", "status")
+)
+stage_duration = histogram(
+    "inference_stage_duration_seconds",
+    "Time spent in each processing stage: tokenize, forward, generate, spacy_parse, db_commit",
+    ("service", "stage")
+)
+inference_batch_size = histogram(
+    "inference_batch_size",
+    "Items per model call (forward pass, generate call or spaCy pipe)",
+    ("service",),
+    buckets=BATCH_SIZE_BUCKETS
+)
+sentiment_decisions = counter(
+    "sentiment_decisions",
+    "Sentiment results by path: rule (keyword rules decided), model (classifier ran) or cache",
+    ("path",)
+)
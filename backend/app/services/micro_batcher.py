@@ -0,0 +1,197 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.metrics import BATCH_SIZE_BUCKETS, histogram, register_collector
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching configuration
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+MICROBATCH_MAX_BATCH_SIZE = int(os.getenv("MICROBATCH_MAX_BATCH_SIZE", "32"))
+
+microbatch_size = histogram(
+    "microbatch_size", "Requests coalesced into each micro-batch", ("batcher",), buckets=BATCH_SIZE_BUCKETS
+)
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched calls
+
+    Callers block in submit() while a dispatcher thread collects requests
+    until max_batch_size items are waiting or max_wait_ms has passed since
+    the first one arrived, runs batch_fn once for the whole group and hands
+    each caller its own result. If a batch fails, its items are retried one
+    by one so a single bad input only fails its own request. Any other error
+    fails the callers of the batch at hand; the dispatcher keeps running.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_wait_ms: float = 5,
+        max_batch_size: int = 32
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self.batch_sizes: Counter = Counter()
+        self.items = 0
+        self.total_wait_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def submit(self, item: Any) -> Any:
+        """Queue an item and block until its result is ready"""
+        self._ensure_started()
+
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            with self._metrics_lock:
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+
+        return future.result()
+
+    def _ensure_started(self):
+        """Start the dispatcher thread on first use"""
+        if self._dispatcher is not None:
+            return
+        with self._start_lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name=f"micro-batcher-{self.name}", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _collect_batch(self) -> List:
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = []
+            try:
+                batch = self._collect_batch()
+                dispatched = time.perf_counter()
+
+                with self._metrics_lock:
+                    self.batch_sizes[len(batch)] += 1
+                    self.items += len(batch)
+                    self.total_wait_seconds += sum(dispatched - enqueued for _, _, enqueued in batch)
+                microbatch_size.observe(len(batch), batcher=self.name)
+
+                self._run_batch(batch)
+            except Exception as e:
+                # Never leave callers blocked on a batch the dispatcher gave up on
+                logger.exception("Micro-batcher %s failed to dispatch a batch", self.name)
+                self._fail(batch, e)
+
+    @staticmethod
+    def _fail(batch: List, error: BaseException):
+        """Resolve every caller of the batch still waiting with the error"""
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _run_batch(self, batch: List):
+        """Run batch_fn and resolve each caller's future"""
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.batch_fn(items)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Isolate the failing input(s)
+            for entry in batch:
+                self._run_batch([entry])
+            return
+
+        if len(results) != len(batch):
+            self._fail(batch, RuntimeError(
+                f"Micro-batcher {self.name}: batch function returned {len(results)} results for {len(batch)} items"
+            ))
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size distribution"""
+        with self._metrics_lock:
+            batches = sum(self.batch_sizes.values())
+            return {
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": batches,
+                "items": self.items,
+                "avg_batch_size": self.items / batches if batches else 0.0,
+                "avg_wait_ms": self.total_wait_seconds / self.items * 1000 if self.items else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())}
+            }
+
+# Batchers created by the services, by name
+_batchers: Dict[str, MicroBatcher] = {}
+
+def build_micro_batcher(name: str, batch_fn: Callable[[List[Any]], List[Any]]) -> Optional[MicroBatcher]:
+    """Create a batcher from environment configuration (None when micro-batching is disabled)"""
+    if not MICROBATCH_ENABLED:
+        return None
+
+    batcher = MicroBatcher(
+        name,
+        batch_fn,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+        max_batch_size=MICROBATCH_MAX_BATCH_SIZE
+    )
+    _batchers[name] = batcher
+    return batcher
+
+def get_batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every active batcher"""
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
+
+def batcher_metric_families():
+    """Queue depth of every active batcher, for /metrics"""
+    return [
+        ("microbatch_queue_depth", "gauge", "Requests waiting for a micro-batch", [
+            ({"batcher": name}, batcher._queue.qsize()) for name, batcher in _batchers.items()
+        ])
+    ]
+
+register_collector(batcher_metric_families)
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyModelService:
+    """Base class for services whose models are loaded on first use
+
+    Subclasses put their heavy loading in _load_models and call ensure_loaded
+    at the top of every public method. Loading is thread-safe: concurrent
+    first calls block on one lock and the models are loaded exactly once.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.load_state = "not_loaded"  # "not_loaded", "loading", "loaded" or "failed"
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        _services[name] = self
+
+    def _load_models(self):
+        """Load models and anything derived from them"""
+        raise NotImplementedError
+
+    def ensure_loaded(self):
+        """Load the models if that has not happened yet"""
+        if self.load_state == "loaded":
+            return
+
+        with self._load_lock:
+            if self.load_state == "loaded":
+                return
+
+            self.load_state = "loading"
+            started = time.perf_counter()
+            try:
+                self._load_models()
+            except Exception as e:
+                self.load_state = "failed"
+                self.load_error = str(e)
+                raise
+
+            self.load_seconds = time.perf_counter() - started
+            self.load_error = None
+            self.load_state = "loaded"
+            logger.info("Loaded %s models in %.1fs", self.name, self.load_seconds)
+
+    def fork_safe(self) -> bool:
+        """Whether models loaded by this service can be inherited by forked worker processes"""
+        return True
+    
+    def load_status(self) -> Dict[str, Any]:
+        """Current load state of this service's models"""
+        return {
+            "state": self.load_state,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error
+        }
+
+# Lazily loaded services, by name
+_services: Dict[str, LazyModelService] = {}
+
+# Background warm-up state: "idle" (no warm-up requested), "running" or "finished"
+_warmup = {"state": "idle", "services": []}
+
+def get_model_status() -> Dict[str, Dict[str, Any]]:
+    """Load state of every registered service"""
+    return {name: service.load_status() for name, service in _services.items()}
+
+def get_warmup_state() -> str:
+    """State of the background warm-up phase"""
+    return _warmup["state"]
+
+def get_warmup_services() -> List[str]:
+    """Services the warm-up phase loads"""
+    return list(_warmup["services"])
+
+def resolve_services(names: List[str]) -> List[str]:
+    """Validate service names ("all" stands for every registered service)"""
+    if "all" in names:
+        return list(_services)
+
+    unknown = [name for name in names if name not in _services]
+    if unknown:
+        raise ValueError(f"Unknown services: {', '.join(unknown)}")
+    return list(names)
+
+def get_service(name: str) -> LazyModelService:
+    return _services[name]
+
+def start_warmup(names: List[str]) -> Optional[threading.Thread]:
+    """Load the named services in a background thread ("all" loads every service)"""
+    names = resolve_services(names)
+
+    if not names:
+        return None
+
+    _warmup["state"] = "running"
+    _warmup["services"] = list(names)
+
+    def warm_up():
+        for name in names:
+            try:
+                _services[name].ensure_loaded()
+            except Exception:
+                # The failure is recorded in the service's load status
+                logger.exception("Warm-up of %s failed", name)
+        _warmup["state"] = "finished"
+
+    thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
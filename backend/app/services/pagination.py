@@ -0,0 +1,21 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor that was not issued by this API"""
+
+def encode_cursor(created_at: datetime, review_id: int) -> str:
+    """Opaque token for the keyset position after the given row"""
+    payload = json.dumps([created_at.isoformat(), review_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Keyset position (created_at, id) stored in a cursor token"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, review_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(review_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
@@ -0,0 +1,68 @@
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+class PhraseMatcher:
+    """Aho-Corasick automaton that finds every phrase occurring in a text in one pass
+
+    Matching uses plain substring semantics, exactly like ``phrase in text``:
+    overlapping phrases and phrases nested inside longer ones are all reported.
+    The automaton is compiled into a full transition table at construction so
+    scanning costs one dictionary lookup per character.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = sorted(set(phrases))
+
+        # Build the trie
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[str]] = [set()]
+        for phrase in self.phrases:
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append(set())
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].add(phrase)
+
+        # Breadth-first pass to compute failure links and the full transition table
+        failure = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict() for _ in goto]
+        transitions[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            if state:
+                # Inherit the failure state's transitions, then override with our own edges
+                transitions[state] = dict(transitions[failure[state]])
+                transitions[state].update(goto[state])
+            for char, next_state in goto[state].items():
+                failure[next_state] = transitions[failure[state]].get(char, 0) if state else 0
+                outputs[next_state] |= outputs[failure[next_state]]
+                queue.append(next_state)
+
+        self._transitions = transitions
+        self._outputs: List[Optional[FrozenSet[str]]] = [
+            frozenset(output) if output else None for output in outputs
+        ]
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of phrases that occur in text"""
+        transitions = self._transitions
+        outputs = self._outputs
+
+        # Record accepting states during the scan and expand them afterwards
+        state = 0
+        hits = []
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state] is not None:
+                hits.append(state)
+
+        found = set()
+        for state in set(hits):
+            found |= outputs[state]
+        return found
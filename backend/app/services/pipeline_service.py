@@ -0,0 +1,116 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models import models
+from app.services.analysis_store import store_sentiment_results, store_aspect_results, store_summaries
+from app.services.aspect_service import aspect_service
+from app.services.decoding_policy import DecodingPolicy
+from app.services.sentiment_service import sentiment_service
+from app.services.summarization_service import summarization_service
+
+# Load environment variables
+load_dotenv()
+
+# Analysis stages in the order their results are reported
+PIPELINE_STAGES = ("sentiment", "aspects", "summary")
+
+# Threads running the summary stage next to the sentiment and aspect stages
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "2"))
+
+def resolve_stages(stages: Optional[Sequence[str]]) -> List[str]:
+    """Validate requested stages (None: all of them) and put them in pipeline order"""
+    if stages is None:
+        return list(PIPELINE_STAGES)
+    unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage '{unknown[0]}', expected any of: {', '.join(PIPELINE_STAGES)}")
+    if not stages:
+        raise ValueError("At least one pipeline stage is required")
+    return [stage for stage in PIPELINE_STAGES if stage in stages]
+
+class PipelineRunner:
+    """Runs several analysis stages over the same texts in one pass
+
+    Sentiment and aspects share one spaCy pass and one sentiment batch (the
+    whole texts are scored together with the aspect sentences). The summary
+    stage does not depend on them, so it runs on a worker thread at the
+    same time; the model libraries release the GIL during inference.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline")
+            return self._executor
+
+    def analyze(
+        self,
+        texts: List[str],
+        stages: Optional[Sequence[str]] = None,
+        policy: Optional[DecodingPolicy] = None
+    ) -> List[Dict[str, Any]]:
+        """Run the selected stages over texts; one dict per text keyed by stage name"""
+        stages = resolve_stages(stages)
+        results = [{} for _ in texts]
+        if not texts:
+            return results
+
+        # Start the summary stage first so it overlaps with the others
+        summaries = None
+        if "summary" in stages:
+            summaries = self._get_executor().submit(
+                summarization_service.generate_batch_summaries, texts, policy=policy
+            )
+
+        try:
+            if "aspects" in stages:
+                if "sentiment" in stages:
+                    sentiments, batch_aspects = aspect_service.analyze_with_sentiment(texts)
+                    for result, sentiment in zip(results, sentiments):
+                        result["sentiment"] = sentiment
+                else:
+                    batch_aspects = aspect_service.analyze_aspects_batch(texts)
+                for result, aspects in zip(results, batch_aspects):
+                    result["aspects"] = aspects
+            elif "sentiment" in stages:
+                for result, sentiment in zip(results, sentiment_service.analyze_batch(texts)):
+                    result["sentiment"] = sentiment
+        except BaseException:
+            # Never leave the summary stage running unobserved, but report the
+            # error that stopped the other stages rather than its own
+            if summaries is not None and not summaries.cancel():
+                wait([summaries])
+            raise
+
+        if summaries is not None:
+            for result, summary_text in zip(results, summaries.result()):
+                result["summary"] = summary_text
+
+        return results
+
+def store_pipeline_results(db: Session, reviews: List[models.Review], results: List[Dict[str, Any]]):
+    """Store every stage result of a pipeline run (caller commits once for all stages)"""
+    if not reviews:
+        return
+
+    stages = results[0].keys()
+    if "sentiment" in stages:
+        store_sentiment_results(db, reviews, [result["sentiment"] for result in results])
+    if "aspects" in stages:
+        store_aspect_results(db, reviews, [result["aspects"] for result in results])
+    if "summary" in stages:
+        store_summaries(db, reviews, [result["summary"] for result in results])
+
+# Singleton instance
+pipeline_runner = PipelineRunner(PIPELINE_WORKERS)
@@ -0,0 +1,286 @@
+import contextvars
+import cProfile
+import functools
+import inspect
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi.routing import APIRoute
+
+# Load environment variables
+load_dotenv()
+
+BASE_DIR = pathlib.Path(__file__).parent.parent.parent.absolute()
+
+# Profiling configuration (off unless enabled: the header would let any client profile)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = pathlib.Path(os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles")))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_WINDOW_SECONDS = float(os.getenv("PROFILE_MAX_WINDOW_SECONDS", "300"))
+
+# Request header selecting a profiler for one request
+PROFILE_HEADER = "X-Profile"
+
+# cprofile: deterministic, saved as pstats; sampling: stack samples, saved as collapsed stacks
+PROFILE_MODES = ("cprofile", "sampling")
+PROFILE_EXTENSIONS = {"cprofile": ".pstats", "sampling": ".collapsed"}
+
+# Threads that run inference on behalf of request handlers: the micro-batcher
+# dispatchers and the pipeline's summary stage
+HELPER_THREAD_PREFIXES = ("micro-batcher-", "pipeline")
+
+# Modules whose functions at the top of a stack mean the thread is idle (waiting for work)
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures", "thread.py"))
+
+class RequestProfile:
+    """Profiling requested for the current request; the handler thread fills in profile_id"""
+
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.profile_id: Optional[str] = None
+
+# Set by the middleware; copied into the threadpool thread that runs a sync handler
+current_request_profile: contextvars.ContextVar = contextvars.ContextVar("current_request_profile", default=None)
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+class SamplingProfiler:
+    """Samples Python stacks of other threads from a background thread
+
+    Every interval the stacks of the watched threads (all threads but the
+    sampler when thread_ids is None, skipping idle ones) are recorded and
+    counted, giving flamegraph-compatible collapsed stacks. Threads whose
+    name starts with one of thread_prefixes are watched as well while they
+    are busy, under a root frame naming the thread. The watched threads are
+    not slowed down apart from the GIL the sampler takes.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+        thread_ids: Optional[Set[int]] = None,
+        thread_prefixes: Tuple[str, ...] = ()
+    ):
+        self.interval = interval_ms / 1000
+        self.thread_ids = thread_ids
+        self.thread_prefixes = thread_prefixes
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if self.thread_prefixes else {}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                helper = names.get(thread_id, "").startswith(self.thread_prefixes) if self.thread_prefixes else False
+                selected = self.thread_ids is None or thread_id in self.thread_ids
+                if not selected and not helper:
+                    continue
+                if (self.thread_ids is None or helper) and frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                if helper and self.thread_ids is not None:
+                    stack.append(f"thread:{names[thread_id]}")
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One "frame;frame;frame count" line per distinct stack (flamegraph.pl / speedscope input)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def save_profile(mode: str, label: str, write: Callable[[str], None]) -> str:
+    """Store a profile under a new id and drop the oldest beyond PROFILE_MAX_STORED"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:60] or "profile"
+    profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{mode}-{slug}"
+    write(str(PROFILE_DIR / (profile_id + PROFILE_EXTENSIONS[mode])))
+
+    stored = sorted(PROFILE_DIR.glob("*-*-*.*"))
+    for path in stored[:max(0, len(stored) - PROFILE_MAX_STORED)]:
+        path.unlink(missing_ok=True)
+    return profile_id
+
+def write_text(content: str) -> Callable[[str], None]:
+    def write(path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    return write
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first"""
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.iterdir(), reverse=True):
+        parts = path.stem.split("-", 2)
+        if len(parts) != 3 or parts[1] not in PROFILE_MODES:
+            continue
+        profiles.append({
+            "id": path.stem,
+            "mode": parts[1],
+            "label": parts[2],
+            "format": "pstats" if parts[1] == "cprofile" else "collapsed",
+            "bytes": path.stat().st_size
+        })
+    return profiles
+
+def profile_path(profile_id: str) -> Optional[pathlib.Path]:
+    """File of a stored profile (None when unknown)"""
+    for profile in list_profiles():
+        if profile["id"] == profile_id:
+            return PROFILE_DIR / (profile_id + PROFILE_EXTENSIONS[profile["mode"]])
+    return None
+
+def run_profiled(request_profile: RequestProfile, call: Callable[[], Any]) -> Any:
+    """Run a handler under the requested profiler in the current thread and store the result
+
+    cProfile only sees the handler's thread. The micro-batched single-text
+    endpoints and the pipeline's summary stage run their models on helper
+    threads, where a cprofile profile shows only the wait for the result.
+    The sampling profiler also samples those helper threads while the
+    request runs, including the work they do for other requests that
+    joined the same batch.
+    """
+    if request_profile.mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call)
+        finally:
+            request_profile.profile_id = save_profile("cprofile", request_profile.label, profiler.dump_stats)
+
+    sampler = SamplingProfiler(thread_ids={threading.get_ident()}, thread_prefixes=HELPER_THREAD_PREFIXES)
+    sampler.start()
+    try:
+        return call()
+    finally:
+        sampler.stop()
+        request_profile.profile_id = save_profile("sampling", request_profile.label, write_text(sampler.collapsed()))
+
+def profiled_endpoint(endpoint: Callable) -> Callable:
+    """Wrap a sync handler so it runs under the profiler its request asked for"""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        request_profile = current_request_profile.get()
+        if request_profile is None:
+            return endpoint(*args, **kwargs)
+        return run_profiled(request_profile, lambda: endpoint(*args, **kwargs))
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """Route whose sync handler can be profiled per request
+
+    Sync handlers run in a threadpool thread, where a profiler started by
+    the middleware would see nothing, so the wrapper starts it in the
+    handler's own thread. Async handlers are left as they are.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router rebuilds routes from already wrapped endpoints
+        if getattr(endpoint, "__profiled__", False):
+            endpoint = endpoint.__wrapped__
+        if PROFILING_ENABLED and not inspect.iscoroutinefunction(endpoint):
+            endpoint = profiled_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+class ProfileArming:
+    """Profile the next requests to a path, as armed through the admin endpoint"""
+
+    def __init__(self):
+        self._armed: Dict[str, List] = {}  # path -> [mode, requests left]
+        self._lock = threading.Lock()
+
+    def arm(self, path: str, mode: str, count: int):
+        with self._lock:
+            self._armed[path] = [mode, count]
+
+    def take(self, path: str) -> Optional[str]:
+        """Profiler mode for a request to this path, if one is armed"""
+        if not self._armed:
+            return None
+        with self._lock:
+            armed = self._armed.get(path)
+            if armed is None:
+                return None
+            armed[1] -= 1
+            if armed[1] <= 0:
+                del self._armed[path]
+            return armed[0]
+
+    def armed(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {path: {"mode": mode, "remaining": count} for path, (mode, count) in self._armed.items()}
+
+class ProfileWindow:
+    """Samples every busy thread of the process for a time window"""
+
+    def __init__(self):
+        self._sampler: Optional[SamplingProfiler] = None
+        self._timer: Optional[threading.Timer] = None
+        self._ends_at: Optional[float] = None
+        self._last_profile_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self, seconds: float):
+        """Start a window; raises RuntimeError if one is already running"""
+        with self._lock:
+            if self._sampler is not None:
+                raise RuntimeError("A profiling window is already running")
+            self._sampler = SamplingProfiler()
+            self._sampler.start()
+            self._ends_at = time.time() + seconds
+            self._timer = threading.Timer(seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self) -> Optional[str]:
+        """End the running window early or on its timer and store the samples"""
+        with self._lock:
+            sampler, self._sampler = self._sampler, None
+            if sampler is None:
+                return None
+            self._timer.cancel()
+            sampler.stop()
+            self._last_profile_id = save_profile("sampling", "window", write_text(sampler.collapsed()))
+            return self._last_profile_id
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._sampler is not None,
+                "seconds_left": max(0.0, self._ends_at - time.time()) if self._sampler is not None else 0.0,
+                "last_profile_id": self._last_profile_id
+            }
+
+# Singleton instances
+profile_arming = ProfileArming()
+profile_window = ProfileWindow()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.services.metrics import register_collector
+
+# Load environment variables
+load_dotenv()
+
+# Cache configuration
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_SQLITE_PATH = os.getenv("RESULT_CACHE_SQLITE_PATH", "")
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of model names, versions and rule sets"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def value_size(value: str) -> int:
+    """Bytes a serialized value takes in memory, as counted against max_bytes"""
+    return len(value.encode("utf-8"))
+
+class ResultCache:
+    """Content-addressed cache for inference results
+
+    Keys are a hash of the namespace, the fingerprint (model name/version and
+    rule set) and the input text as the service passes it (after whatever
+    preprocessing its results depend on), so changing the model or rules
+    makes every old entry unreachable. Values must be JSON-serializable; they
+    are stored serialized, which also gives callers private copies on read.
+
+    The in-process tier is an LRU bounded by entry count and total UTF-8 bytes. An
+    optional SQLite tier keeps results across restarts; rows written under a
+    different fingerprint are purged when the cache opens.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        fingerprint: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        sqlite_path: Optional[str] = None
+    ):
+        self.namespace = namespace
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Hit/miss counters
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.sqlite_path = sqlite_path
+        self._db = None
+        if sqlite_path:
+            self._open_persistent_tier(sqlite_path)
+
+    def _open_persistent_tier(self, sqlite_path: str):
+        """Open the SQLite tier and drop entries from other model/rule versions"""
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, fingerprint TEXT NOT NULL, value TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "DELETE FROM result_cache WHERE namespace = ? AND fingerprint != ?",
+            (self.namespace, self.fingerprint)
+        )
+        self._db.commit()
+
+    def reopen_after_fork(self):
+        """Give a forked process its own SQLite connection (one must not be shared across processes)"""
+        if self._db is not None:
+            # Abandon the inherited connection without closing it under the parent
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+    
+    def make_key(self, text: str) -> str:
+        """Hash the text, exactly as given, together with the namespace and fingerprint"""
+        digest = hashlib.sha256()
+        digest.update(f"{self.namespace}\0{self.fingerprint}\0".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the cached result for text, or None on a miss"""
+        key = self.make_key(text)
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(value)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM result_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.persistent_hits += 1
+                    self._store_in_memory(key, row[0])
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def set(self, text: str, result: Any):
+        """Store the result for text in every tier"""
+        self.set_many([(text, result)])
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]):
+        """Store (text, result) pairs in every tier, writing the SQLite tier in one transaction"""
+        rows = [(self.make_key(text), json.dumps(result)) for text, result in items]
+        if not rows:
+            return
+
+        with self._lock:
+            for key, value in rows:
+                self._store_in_memory(key, value)
+
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO result_cache (key, namespace, fingerprint, value) VALUES (?, ?, ?, ?)",
+                    [(key, self.namespace, self.fingerprint, value) for key, value in rows]
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key: str, value: str):
+        """Insert into the LRU tier and evict until it is within its limits (lock held)"""
+        size = value_size(value)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= value_size(previous)
+
+        self._entries[key] = value
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= value_size(evicted)
+            self.evictions += 1
+
+    def invalidate(self, fingerprint: Optional[str] = None):
+        """Drop all entries, optionally switching to a new model/rule fingerprint"""
+        with self._lock:
+            if fingerprint is not None:
+                self.fingerprint = fingerprint
+
+            self._entries.clear()
+            self._bytes = 0
+
+            if self._db is not None:
+                self._db.execute("DELETE FROM result_cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "fingerprint": self.fingerprint,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0
+            }
+
+# Caches created by the services, by namespace
+_caches: Dict[str, ResultCache] = {}
+
+def build_result_cache(namespace: str, fingerprint: str) -> Optional[ResultCache]:
+    """Create the cache for a service from environment configuration (None when disabled)"""
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    cache = ResultCache(
+        namespace,
+        fingerprint,
+        max_entries=RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=RESULT_CACHE_MAX_BYTES,
+        sqlite_path=RESULT_CACHE_SQLITE_PATH or None
+    )
+    _caches[namespace] = cache
+    return cache
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every active cache"""
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
+
+def reopen_caches_after_fork():
+    """Reopen the persistent tiers of every active cache in a forked worker"""
+    for cache in _caches.values():
+        cache.reopen_after_fork()
+
+def clear_caches():
+    """Drop every entry from every active cache"""
+    for cache in _caches.values():
+        cache.invalidate()
+
+def cache_metric_families():
+    """Lookup outcomes, hit ratio and size of every active cache, for /metrics"""
+    stats = get_cache_stats().values()
+    return [
+        ("result_cache_lookups_total", "counter", "Result cache lookups by outcome", [
+            ({"namespace": cache["namespace"], "outcome": outcome}, cache[outcome])
+            for cache in stats
+            for outcome in ("memory_hits", "persistent_hits", "misses")
+        ]),
+        ("result_cache_hit_ratio", "gauge", "Share of result cache lookups served from the cache", [
+            ({"namespace": cache["namespace"]}, cache["hit_ratio"]) for cache in stats
+        ]),
+        ("result_cache_entries", "gauge", "Entries in the in-process result cache", [
+            ({"namespace": cache["namespace"]}, cache["entries"]) for cache in stats
+        ])
+    ]
+
+register_collector(cache_metric_families)
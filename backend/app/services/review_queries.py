@@ -0,0 +1,94 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+
+from app.models import models
+
+# Reviews loaded per query when streaming many reviews
+REVIEW_CHUNK_SIZE = 500
+
+def filter_reviews(
+    query: Query,
+    source: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    sentiment: Optional[str] = None
+) -> Query:
+    """Apply the review listing filters to a query over reviews"""
+    if source is not None:
+        query = query.filter(models.Review.source == source)
+    if min_rating is not None:
+        query = query.filter(models.Review.rating >= min_rating)
+    if max_rating is not None:
+        query = query.filter(models.Review.rating <= max_rating)
+    if sentiment is not None:
+        query = query.join(
+            models.SentimentAnalysis, models.SentimentAnalysis.review_id == models.Review.id
+        ).filter(models.SentimentAnalysis.sentiment_label == sentiment)
+    return query
+
+def newest_first(query: Query) -> Query:
+    """Order reviews by the keyset pagination key, newest first"""
+    return query.order_by(models.Review.created_at.desc(), models.Review.id.desc())
+
+def after_keyset(query: Query, created_at, review_id: int) -> Query:
+    """Keep the reviews that come after (created_at, id) in newest-first order"""
+    return query.filter(tuple_(models.Review.created_at, models.Review.id) < tuple_(created_at, review_id))
+
+def with_full_analysis(query: Query) -> Query:
+    """Eager-load every analysis of the reviews: one joined query plus one IN query for aspects"""
+    return query.options(
+        joinedload(models.Review.sentiment_analysis),
+        joinedload(models.Review.summary),
+        selectinload(models.Review.aspect_analyses)
+    )
+
+def full_analysis(review: models.Review) -> Dict[str, Any]:
+    """A review with its analyses, shaped like ReviewAnalysisResponse"""
+    return {
+        "review": review,
+        "sentiment": review.sentiment_analysis,
+        "aspects": review.aspect_analyses,
+        "summary": review.summary
+    }
+
+def iter_full_analyses(
+    db: Session,
+    review_ids: Optional[List[int]] = None,
+    chunk_size: int = REVIEW_CHUNK_SIZE,
+    **filters
+) -> Iterator[Dict[str, Any]]:
+    """Stream full analyses chunk by chunk, two queries per chunk
+
+    With review_ids the reviews come in the given order (missing IDs are
+    skipped); otherwise every review matching the filters comes newest
+    first. The session is cleared after each chunk so memory stays bounded.
+    """
+    if review_ids is not None:
+        for start in range(0, len(review_ids), chunk_size):
+            chunk_ids = review_ids[start:start + chunk_size]
+            reviews = with_full_analysis(
+                filter_reviews(db.query(models.Review), **filters)
+            ).filter(models.Review.id.in_(chunk_ids)).all()
+
+            by_id = {review.id: review for review in reviews}
+            for review_id in chunk_ids:
+                if review_id in by_id:
+                    yield full_analysis(by_id[review_id])
+            db.expunge_all()
+        return
+
+    last = None
+    while True:
+        query = filter_reviews(db.query(models.Review), **filters)
+        if last is not None:
+            query = after_keyset(query, *last)
+        reviews = with_full_analysis(newest_first(query)).limit(chunk_size).all()
+        if not reviews:
+            return
+
+        for review in reviews:
+            yield full_analysis(review)
+        last = (reviews[-1].created_at, reviews[-1].id)
+        db.expunge_all()
@@ -0,0 +1,88 @@
+from collections import Counter
+from typing import Dict, List, NamedTuple
+
+from app.services.phrase_matcher import PhraseMatcher
+
+# Bump when the rule logic in check_rule_based_sentiment changes, so cached results are invalidated
+RULES_REVISION = 1
+
+# Positive and negative keywords for rule-based adjustments
+POSITIVE_KEYWORDS = [
+    "incredible", "amazing", "excellent", "great", "good", "love", "best", "perfect",
+    "fantastic", "impressive", "outstanding", "superb", "brilliant", "awesome", 
+    "wonderful", "exceptional", "superior", "terrific", "solid", "reliable", "quality",
+    "premium", "fast", "quick", "responsive", "smooth", "clear", "crisp", "bright",
+    "sharp", "beautiful", "impressed", "satisfied", "happy", "pleased", "recommend",
+    "worth", "value", "efficient", "powerful", "convenient", "easy", "comfortable",
+    "durable", "sturdy", "robust", "long-lasting"
+]
+
+NEGATIVE_KEYWORDS = [
+    "bad", "poor", "terrible", "awful", "worst", "disappointing", "slow", "cheap",
+    "horrible", "mediocre", "subpar", "inadequate", "inferior", "weak", "frustrating",
+    "annoying", "useless", "waste", "regret", "avoid", "problem", "issue", "defect",
+    "flaw", "broken", "fails", "failure", "struggles", "laggy", "lag", "sluggish",
+    "unresponsive", "blurry", "grainy", "dim", "dull", "uncomfortable", "difficult",
+    "hard", "heavy", "bulky", "fragile", "flimsy", "cheap", "overpriced", "expensive",
+    "not worth", "disappointed", "unhappy", "dissatisfied", "complaint", "expected better",
+    "not the best", "could be better", "not impressed", "drains", "hot", "overheats"
+]
+
+# Context phrases that imply sentiment
+CONTEXT_PHRASES = {
+    "positive": [
+        "all day without", "lasts all day", "long battery", "bright and clear", 
+        "under direct sunlight", "fast and responsive", "no lag", "haven't experienced any lag", 
+        "apps open quickly", "feels premium", "impressed", "incredible", "fantastic", 
+        "amazing", "love", "best", "excellent", "great", "perfect", "worth", "recommend", 
+        "satisfied", "happy", "pleased"
+    ],
+    "negative": [
+        "battery drain", "drains quickly", "drains fast", "charge twice", "have to charge",
+        "scratches easily", "low light", "blurry", "not the best", "not up to par",
+        "takes longer", "too long to", "not happy with", "gets hot", "overheats",
+        "disappointed with", "struggles", "not worth", "expected better", "could be better",
+        "not impressed", "disappointing", "poor", "terrible", "avoid", "regret", "issue", "problem"
+    ]
+}
+
+class KeywordMatch(NamedTuple):
+    """Keyword and context phrase hits for one lowercased text"""
+    has_positive_context: bool
+    has_negative_context: bool
+    positive_count: int
+    negative_count: int
+
+class SentimentKeywordMatcher:
+    """Evaluates the whole sentiment lexicon against a text in a single scan
+
+    Produces the same answers as testing each phrase with ``phrase in text``:
+    a context group matches if any of its phrases occurs, and keyword counts
+    count list entries (duplicates included) whose keyword occurs.
+    """
+
+    def __init__(
+        self,
+        positive_keywords: List[str],
+        negative_keywords: List[str],
+        context_phrases: Dict[str, List[str]]
+    ):
+        self.positive_weights = Counter(positive_keywords)
+        self.negative_weights = Counter(negative_keywords)
+        self.positive_context = frozenset(context_phrases["positive"])
+        self.negative_context = frozenset(context_phrases["negative"])
+
+        self.matcher = PhraseMatcher(
+            list(self.positive_weights) + list(self.negative_weights)
+            + list(self.positive_context) + list(self.negative_context)
+        )
+
+    def match(self, text_lower: str) -> KeywordMatch:
+        """Scan a lowercased text once and summarize the lexicon hits"""
+        found = self.matcher.find(text_lower)
+        return KeywordMatch(
+            has_positive_context=not self.positive_context.isdisjoint(found),
+            has_negative_context=not self.negative_context.isdisjoint(found),
+            positive_count=sum(self.positive_weights[phrase] for phrase in found if phrase in self.positive_weights),
+            negative_count=sum(self.negative_weights[phrase] for phrase in found if phrase in self.negative_weights)
+        )
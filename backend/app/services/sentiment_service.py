@@ -1,62 +1,85 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+from transformers import AutoTokenizer
 import numpy as np
+import os
 import re
-from typing import Dict, Tuple, List
+import copy
+from typing import Dict, Tuple, List, Optional
 
-class SentimentAnalysisService:
+from app.services.batching import length_bucketed_batches
+from app.services.inference_backends import CLASSIFIER_BACKENDS, ClassifierBackend, build_classifier_backend
+from app.services.model_registry import LazyModelService
+from app.services.metrics import inference_batch_size, sentiment_decisions, stage_duration
+from app.services.micro_batcher import build_micro_batcher
+from app.services.result_cache import build_result_cache, fingerprint
+from app.services.sentiment_rules import (
+    POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, CONTEXT_PHRASES, RULES_REVISION, KeywordMatch, SentimentKeywordMatcher
+)
+
+class SentimentAnalysisService(LazyModelService):
     """Service for sentiment analysis of smartphone reviews using a pre-trained BERT model"""
     
-    def __init__(self):
-        # Load pre-trained model and tokenizer
+    def __init__(self, batch_size: int = 32, max_batch_tokens: int = 8192, backend: str = "torch"):
+        super().__init__("sentiment")
+        
+        if backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{backend}', expected one of: {', '.join(CLASSIFIER_BACKENDS)}")
+        
+        # Pre-trained model (loaded on first use) and the backend that runs it
         self.model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+        self.backend_name = backend
+        self.backend: Optional[ClassifierBackend] = None
+        self.tokenizer = None
+        self.cache = None
+        
+        # Maximum input length for the model
+        self.max_input_length = 512
+        
+        # Micro-batch limits for batched inference (items and padded tokens per forward pass)
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
         
         # Define sentiment labels
         self.labels = ["negative", "positive"]
         
-        # Define positive and negative keywords for rule-based adjustments
-        self.positive_keywords = [
-            "incredible", "amazing", "excellent", "great", "good", "love", "best", "perfect",
-            "fantastic", "impressive", "outstanding", "superb", "brilliant", "awesome", 
-            "wonderful", "exceptional", "superior", "terrific", "solid", "reliable", "quality",
-            "premium", "fast", "quick", "responsive", "smooth", "clear", "crisp", "bright",
-            "sharp", "beautiful", "impressed", "satisfied", "happy", "pleased", "recommend",
-            "worth", "value", "efficient", "powerful", "convenient", "easy", "comfortable",
-            "durable", "sturdy", "robust", "long-lasting"
-        ]
-        
-        self.negative_keywords = [
-            "bad", "poor", "terrible", "awful", "worst", "disappointing", "slow", "cheap",
-            "horrible", "mediocre", "subpar", "inadequate", "inferior", "weak", "frustrating",
-            "annoying", "useless", "waste", "regret", "avoid", "problem", "issue", "defect",
-            "flaw", "broken", "fails", "failure", "struggles", "laggy", "lag", "sluggish",
-            "unresponsive", "blurry", "grainy", "dim", "dull", "uncomfortable", "difficult",
-            "hard", "heavy", "bulky", "fragile", "flimsy", "cheap", "overpriced", "expensive",
-            "not worth", "disappointed", "unhappy", "dissatisfied", "complaint", "expected better",
-            "not the best", "could be better", "not impressed", "drains", "hot", "overheats"
-        ]
-        
-        # Define context phrases that imply sentiment
-        self.context_phrases = {
-            "positive": [
-                "all day without", "lasts all day", "long battery", "bright and clear", 
-                "under direct sunlight", "fast and responsive", "no lag", "haven't experienced any lag", 
-                "apps open quickly", "feels premium", "impressed", "incredible", "fantastic", 
-                "amazing", "love", "best", "excellent", "great", "perfect", "worth", "recommend", 
-                "satisfied", "happy", "pleased"
-            ],
-            "negative": [
-                "battery drain", "drains quickly", "drains fast", "charge twice", "have to charge",
-                "scratches easily", "low light", "blurry", "not the best", "not up to par",
-                "takes longer", "too long to", "not happy with", "gets hot", "overheats",
-                "disappointed with", "struggles", "not worth", "expected better", "could be better",
-                "not impressed", "disappointing", "poor", "terrible", "avoid", "regret", "issue", "problem"
-            ]
-        }
+        # Keywords and context phrases for rule-based adjustments
+        self.positive_keywords = POSITIVE_KEYWORDS
+        self.negative_keywords = NEGATIVE_KEYWORDS
+        self.context_phrases = CONTEXT_PHRASES
+        
+        # Single-pass matcher over the whole lexicon
+        self.keyword_matcher = SentimentKeywordMatcher(
+            self.positive_keywords, self.negative_keywords, self.context_phrases
+        )
+        
+    
+    def _load_models(self):
+        """Load the tokenizer and the model through the configured inference backend"""
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        backend = build_classifier_backend(self.backend_name, self.model_name)
+        backend.load()
+        self.backend = backend
+        
+        # Result cache, invalidated by a change of model version, backend or rule set
+        self.cache = build_result_cache("sentiment", self._cache_fingerprint())
+    
+    def fork_safe(self) -> bool:
+        """ONNX Runtime sessions own thread pools that do not survive a fork"""
+        return self.backend_name.startswith("torch")
+    
+    def cache_fingerprint(self) -> str:
+        """Identify the model version, backend and rule set that produced a cached result"""
+        self.ensure_loaded()
+        return self._cache_fingerprint()
+    
+    def _cache_fingerprint(self) -> str:
+        """Fingerprint of the loaded model, its backend and the rule set"""
+        return fingerprint(
+            *self.backend.fingerprint_parts(),
+            RULES_REVISION,
+            self.positive_keywords,
+            self.negative_keywords,
+            self.context_phrases
+        )
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for sentiment analysis"""
@@ -64,26 +87,30 @@ class SentimentAnalysisService:
         text = text.lower().strip()
         return text
     
-    def check_rule_based_sentiment(self, text: str) -> Dict:
+    def match_keywords(self, text: str) -> KeywordMatch:
+        """Find all keyword and context phrase hits in a text with a single scan"""
+        return self.keyword_matcher.match(text.lower())
+    
+    def check_rule_based_sentiment(self, text: str, keyword_match: Optional[KeywordMatch] = None) -> Dict:
         """Apply rule-based sentiment analysis for smartphone reviews"""
         text_lower = text.lower()
+        if keyword_match is None:
+            keyword_match = self.match_keywords(text_lower)
         
         # Check for context phrases first (they have higher priority)
-        for phrase in self.context_phrases["positive"]:
-            if phrase in text_lower:
-                return {
-                    "sentiment_score": 0.8,
-                    "sentiment_label": "positive",
-                    "rule_based": True
-                }
-        
-        for phrase in self.context_phrases["negative"]:
-            if phrase in text_lower:
-                return {
-                    "sentiment_score": -0.8,
-                    "sentiment_label": "negative",
-                    "rule_based": True
-                }
+        if keyword_match.has_positive_context:
+            return {
+                "sentiment_score": 0.8,
+                "sentiment_label": "positive",
+                "rule_based": True
+            }
+        
+        if keyword_match.has_negative_context:
+            return {
+                "sentiment_score": -0.8,
+                "sentiment_label": "negative",
+                "rule_based": True
+            }
         
         # Check for specific smartphone review patterns
         
@@ -152,8 +179,8 @@ class SentimentAnalysisService:
             }
         
         # Count positive and negative keywords
-        positive_count = sum(1 for word in self.positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in self.negative_keywords if word in text_lower)
+        positive_count = keyword_match.positive_count
+        negative_count = keyword_match.negative_count
         
         # If there's a clear winner in the keyword count
         if positive_count > negative_count + 2:
@@ -176,38 +203,79 @@ class SentimentAnalysisService:
     
     def analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of a given text with enhanced smartphone review understanding"""
+        self.ensure_loaded()
+        
         # Preprocess text
         text = self.preprocess_text(text)
         
+        # Serve repeated texts from the cache
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                sentiment_decisions.inc(path="cache")
+                return cached
+        
+        result = self._analyze_preprocessed(text)
+        
+        if self.cache is not None:
+            self.cache.set(text, result)
+        
+        return result
+    
+    def _analyze_preprocessed(self, text: str) -> Dict:
+        """Run the rules and, if they are inconclusive, the model on a preprocessed text"""
+        # Scan for keywords once; both the rules and the score adjustment use the hits
+        keyword_match = self.match_keywords(text)
+        
         # First check rule-based sentiment
-        rule_based_result = self.check_rule_based_sentiment(text)
+        rule_based_result = self.check_rule_based_sentiment(text, keyword_match)
         
         # If we have a rule-based result, use it
         if rule_based_result.get("rule_based", False):
-            # Add confidence and raw probabilities for API consistency
-            rule_based_result["confidence"] = 0.9
-            rule_based_result["raw_probabilities"] = {
-                "negative": 0.5 - rule_based_result["sentiment_score"] / 2,
-                "positive": 0.5 + rule_based_result["sentiment_score"] / 2
-            }
-            # Remove the rule_based flag
-            del rule_based_result["rule_based"]
-            return rule_based_result
+            sentiment_decisions.inc(path="rule")
+            return self._finalize_rule_based_result(rule_based_result)
         
         # Otherwise, use the model
-        # Tokenize text
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        sentiment_decisions.inc(path="model")
+        probs = self._predict_probabilities([text])[0]
+        return self._score_model_prediction(text, probs, keyword_match)
+    
+    def _finalize_rule_based_result(self, rule_based_result: Dict) -> Dict:
+        """Convert a rule-based decision into the API result format"""
+        # Add confidence and raw probabilities for API consistency
+        rule_based_result["confidence"] = 0.9
+        rule_based_result["raw_probabilities"] = {
+            "negative": 0.5 - rule_based_result["sentiment_score"] / 2,
+            "positive": 0.5 + rule_based_result["sentiment_score"] / 2
+        }
+        # Remove the rule_based flag
+        del rule_based_result["rule_based"]
+        return rule_based_result
+    
+    def _predict_probabilities(self, texts: List[str]) -> np.ndarray:
+        """Run the model over preprocessed texts and return class probabilities in input order"""
+        # Tokenize without padding; each micro-batch is padded to its own longest text
+        with stage_duration.time(service="sentiment", stage="tokenize"):
+            encodings = self.tokenizer(texts, truncation=True, max_length=self.max_input_length)
+        lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
         
-        # Get model prediction
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            probabilities = torch.nn.functional.softmax(logits, dim=1)
+        probabilities = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
         
-        # Convert to numpy for easier handling
-        probs = probabilities.cpu().numpy()[0]
+        for batch in length_bucketed_batches(lengths, self.batch_size, self.max_batch_tokens):
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch]
+            inputs = self.tokenizer.pad(features, return_tensors=self.backend.tensor_type)
+            
+            # Get model predictions for the whole micro-batch and scatter back to the original positions
+            with stage_duration.time(service="sentiment", stage="forward"):
+                probabilities[batch] = self.backend.predict_proba(dict(inputs))
+            inference_batch_size.observe(len(batch), service="sentiment")
         
+        return probabilities
+    
+    def _score_model_prediction(
+        self, text: str, probs: np.ndarray, keyword_match: Optional[KeywordMatch] = None
+    ) -> Dict:
+        """Turn model probabilities for a text into a keyword-adjusted sentiment result"""
         # Get predicted label and confidence
         predicted_class = np.argmax(probs)
         confidence = probs[predicted_class]
@@ -218,11 +286,12 @@ class SentimentAnalysisService:
         sentiment_score = (2 * probs[1] - 1)  # Maps [0,1] to [-1,1]
         
         # Adjust sentiment score based on keywords
-        text_lower = text.lower()
+        if keyword_match is None:
+            keyword_match = self.match_keywords(text)
         
         # Count positive and negative keywords for fine-tuning
-        positive_count = sum(1 for word in self.positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in self.negative_keywords if word in text_lower)
+        positive_count = keyword_match.positive_count
+        negative_count = keyword_match.negative_count
         
         # Adjust sentiment score based on keyword counts (smaller adjustment than rule-based)
         if positive_count > negative_count:
@@ -249,11 +318,68 @@ class SentimentAnalysisService:
         }
     
     def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """Analyze sentiment for a batch of texts"""
-        results = []
-        for text in texts:
-            results.append(self.analyze_sentiment(text))
+        """Analyze sentiment for a batch of texts
+
+        Cached and duplicate texts are resolved first; rule-based decisions are
+        made per distinct text and the remaining texts share batched forward
+        passes. Results are returned in input order.
+        """
+        self.ensure_loaded()
+        
+        results = [None] * len(texts)
+        
+        # Positions of each distinct text that is not cached yet
+        pending = {}
+        
+        for i, text in enumerate(texts):
+            text = self.preprocess_text(text)
+            cached = self.cache.get(text) if self.cache is not None else None
+            
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(text, []).append(i)
+        
+        if len(pending) < len(texts):
+            sentiment_decisions.inc(len(texts) - sum(len(positions) for positions in pending.values()), path="cache")
+        
+        computed = {}
+        
+        # Texts that need the model, as (preprocessed text, keyword hits)
+        model_inputs = []
+        
+        for text in pending:
+            keyword_match = self.match_keywords(text)
+            rule_based_result = self.check_rule_based_sentiment(text, keyword_match)
+            
+            if rule_based_result.get("rule_based", False):
+                computed[text] = self._finalize_rule_based_result(rule_based_result)
+            else:
+                model_inputs.append((text, keyword_match))
+        
+        # Counted per input position, like cache hits, so duplicates weigh the same on every path
+        sentiment_decisions.inc(sum(len(pending[text]) for text in computed), path="rule")
+        sentiment_decisions.inc(sum(len(pending[text]) for text, _ in model_inputs), path="model")
+        
+        if model_inputs:
+            probabilities = self._predict_probabilities([text for text, _ in model_inputs])
+            for (text, keyword_match), probs in zip(model_inputs, probabilities):
+                computed[text] = self._score_model_prediction(text, probs, keyword_match)
+        
+        # Cache new results and hand every position its own copy
+        if self.cache is not None:
+            self.cache.set_many(computed.items())
+        
+        for text, result in computed.items():
+            positions = pending[text]
+            results[positions[0]] = result
+            for i in positions[1:]:
+                results[i] = copy.deepcopy(result)
+        
         return results
 
 # Singleton instance
-sentiment_service = SentimentAnalysisService()
+sentiment_service = SentimentAnalysisService(backend=os.getenv("SENTIMENT_BACKEND", "torch"))
+
+# Coalesces concurrent single-text requests into batched forward passes
+sentiment_batcher = build_micro_batcher("sentiment", sentiment_service.analyze_batch)
@@ -0,0 +1,62 @@
+import gc
+import logging
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.database.database import engine
+from app.services.metrics import start_snapshots
+from app.services.model_registry import get_service, resolve_services
+from app.services.result_cache import reopen_caches_after_fork
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Services the pre-fork master loads before starting workers ("all", a comma-separated list, or empty)
+SERVING_PRELOAD_MODELS = os.getenv("SERVING_PRELOAD_MODELS", "all")
+
+# Torch intra-op threads per worker (0: CPU cores divided among the workers)
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+
+def preload_models(names: Optional[List[str]] = None) -> List[str]:
+    """Load models in the pre-fork master so every worker shares their weights copy-on-write
+
+    Services whose models cannot cross a fork (ONNX Runtime sessions) are
+    skipped and load in each worker on first use. Returns the loaded names.
+    """
+    if names is None:
+        names = [name.strip() for name in SERVING_PRELOAD_MODELS.split(",") if name.strip()]
+
+    loaded = []
+    for name in resolve_services(names):
+        service = get_service(name)
+        if not service.fork_safe():
+            logger.warning("Not preloading %s: its backend cannot be shared across a fork", name)
+            continue
+        service.ensure_loaded()
+        loaded.append(name)
+
+    # Move everything allocated so far out of the collector's reach: a
+    # collection in a worker would otherwise write to the headers of these
+    # objects and copy the pages holding them
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+def after_fork(workers: int):
+    """Reset per-process state a forked worker must not share with its master"""
+    # Pooled SQLite connections belong to the master; drop them without closing
+    engine.dispose(close=False)
+    reopen_caches_after_fork()
+    # Each worker has its own metrics; publish them for scrapes answered by the others
+    start_snapshots()
+
+    try:
+        import torch
+    except ImportError:
+        return
+    threads = TORCH_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // max(1, workers))
+    torch.set_num_threads(threads)
@@ -1,23 +1,79 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration
+from transformers import T5Tokenizer
 import torch
-from typing import List, Dict
+import json
+import os
+import time
+from typing import Any, List, Dict, Optional
 
-class SummarizationService:
+from app.services.batching import length_bucketed_batches
+from app.services.decoding_policy import DECODING_POLICIES, DecodingPolicy, extractive_summary
+from app.services.metrics import inference_batch_size, stage_duration
+from app.services.inference_backends import SEQ2SEQ_BACKENDS, Seq2SeqBackend, build_seq2seq_backend
+from app.services.model_registry import LazyModelService
+from app.services.micro_batcher import build_micro_batcher
+from app.services.result_cache import build_result_cache, fingerprint
+
+class SummarizationService(LazyModelService):
     """Service for generating summaries of reviews using T5"""
     
-    def __init__(self):
-        # Load pre-trained model and tokenizer
+    def __init__(
+        self,
+        batch_size: int = 16,
+        max_batch_tokens: int = 4096,
+        backend: str = "torch",
+        default_policy: str = "quality"
+    ):
+        super().__init__("summarization")
+        
+        if backend not in SEQ2SEQ_BACKENDS:
+            raise ValueError(f"Unknown summarization backend '{backend}', expected one of: {', '.join(SEQ2SEQ_BACKENDS)}")
+        if default_policy not in DECODING_POLICIES:
+            raise ValueError(f"Unknown decoding policy '{default_policy}', expected one of: {', '.join(DECODING_POLICIES)}")
+        
+        # Pre-trained model (loaded on first use) and the backend that runs it
         self.model_name = "t5-small"  # Can be upgraded to t5-base or t5-large for better quality
-        self.tokenizer = T5Tokenizer.from_pretrained(self.model_name)
-        self.model = T5ForConditionalGeneration.from_pretrained(self.model_name)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+        self.backend_name = backend
+        self.backend: Optional[Seq2SeqBackend] = None
+        self.tokenizer = None
+        self.device = None
+        self.cache = None
         
         # Maximum input length for T5
         self.max_input_length = 512
         
-        # Maximum output length for summary
-        self.max_output_length = 150
+        # Decoding policy used when a request does not choose one
+        self.default_policy = DECODING_POLICIES[default_policy]
+        
+        # Default limits for batched generation (items and padded input tokens per generate call)
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+    
+    def _load_models(self):
+        """Load the tokenizer and the model through the configured inference backend"""
+        self.tokenizer = T5Tokenizer.from_pretrained(self.model_name)
+        backend = build_seq2seq_backend(self.backend_name, self.model_name)
+        backend.load()
+        self.backend = backend
+        self.device = backend.device
+        
+        # Result cache, invalidated by a change of model version or backend (the decoding policy is part of each key)
+        self.cache = build_result_cache("summary", self._cache_fingerprint())
+    
+    def fork_safe(self) -> bool:
+        """ONNX Runtime sessions own thread pools that do not survive a fork"""
+        return self.backend_name.startswith("torch")
+    
+    def cache_fingerprint(self) -> str:
+        """Identify the model version and backend that produced a cached summary"""
+        self.ensure_loaded()
+        return self._cache_fingerprint()
+    
+    def _cache_fingerprint(self) -> str:
+        """Fingerprint of the loaded model and its backend"""
+        return fingerprint(
+            *self.backend.fingerprint_parts(),
+            self.max_input_length
+        )
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for summarization"""
@@ -25,40 +81,173 @@ class SummarizationService:
         text = "summarize: " + text.strip()
         return text
     
-    def generate_summary(self, text: str) -> str:
+    def generate_summary(self, text: str, policy: Optional[DecodingPolicy] = None) -> str:
         """Generate a summary for the given text"""
-        # Preprocess text
-        text = self.preprocess_text(text)
-        
-        # Tokenize text
-        inputs = self.tokenizer(
-            text, 
-            return_tensors="pt", 
-            max_length=self.max_input_length, 
-            truncation=True
-        )
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        # Generate summary
-        with torch.no_grad():
-            output = self.model.generate(
-                **inputs,
-                max_length=self.max_output_length,
-                num_beams=4,
-                early_stopping=True
-            )
+        return self.summarize_batch([text], policy)[0]["summary"]
+    
+    def generate_batch_summaries(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        policy: Optional[DecodingPolicy] = None
+    ) -> List[str]:
+        """Generate summaries for a batch of texts"""
+        results = self.summarize_batch(texts, policy, batch_size=batch_size, max_batch_tokens=max_batch_tokens)
+        return [result["summary"] for result in results]
+    
+    def summarize_requests(self, requests: List[tuple]) -> List[Dict[str, Any]]:
+        """Summarize (text, policy) pairs, one summarize_batch call per distinct policy (micro-batcher entry point)"""
+        results = [None] * len(requests)
+        by_policy = {}
+        for i, (_, policy) in enumerate(requests):
+            by_policy.setdefault(policy, []).append(i)
         
-        # Decode summary
-        summary = self.tokenizer.decode(output[0], skip_special_tokens=True)
+        for policy, positions in by_policy.items():
+            batch_results = self.summarize_batch([requests[i][0] for i in positions], policy)
+            for i, result in zip(positions, batch_results):
+                results[i] = result
         
-        return summary
+        return results
     
-    def generate_batch_summaries(self, texts: List[str]) -> List[str]:
-        """Generate summaries for a batch of texts"""
-        summaries = []
-        for text in texts:
-            summaries.append(self.generate_summary(text))
-        return summaries
+    def _generate(self, inputs: Dict[str, torch.Tensor], policy: DecodingPolicy, max_length: int) -> torch.Tensor:
+        """Run generation for a tokenized (and possibly padded) batch"""
+        return self.backend.generate(inputs, **policy.generation_kwargs(max_length))
+    
+    def _count_tokens(self, text: str) -> int:
+        """Tokens of a text as the model would see them in its output (no special tokens)"""
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+    
+    def _cache_key(self, text: str, policy: DecodingPolicy) -> str:
+        """Cache key of a preprocessed text under a decoding policy"""
+        return json.dumps(policy._asdict(), sort_keys=True) + "\0" + text
+    
+    def summarize_batch(
+        self,
+        texts: List[str],
+        policy: Optional[DecodingPolicy] = None,
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Summarize a batch of texts and report how each summary was produced
+
+        Each result holds the summary, its input and generated token counts,
+        the time of the generate call it was part of (decode_ms, shared by
+        the batch_size texts of that call), and whether it came from the
+        cache or the extractive shortcut.
+
+        Inputs are grouped into length buckets, split further so that every
+        generate call has one output budget, and each group is padded to its
+        longest input. The attention mask keeps padding out of the encoder
+        and cross-attention, so each summary matches what generate_summary
+        returns for the same text.
+        """
+        self.ensure_loaded()
+        
+        policy = policy or self.default_policy
+        batch_size = batch_size or self.batch_size
+        max_batch_tokens = max_batch_tokens or self.max_batch_tokens
+        # Sampled summaries differ on every call, so they are not cached
+        cache = self.cache if policy.strategy != "sampling" else None
+        
+        # Preprocess all texts and serve repeated ones from the cache
+        texts = [self.preprocess_text(text) for text in texts]
+        results = [None] * len(texts)
+        
+        # Positions of each distinct text that is not cached yet
+        pending = {}
+        for i, text in enumerate(texts):
+            cached = cache.get(self._cache_key(text, policy)) if cache is not None else None
+            if cached is not None:
+                results[i] = {**cached, "policy": policy.name, "decode_ms": 0.0, "batch_size": 0, "cached": True}
+            else:
+                pending.setdefault(text, []).append(i)
+        
+        if not pending:
+            return results
+        
+        # New results waiting to be cached, written once per generate call
+        to_cache = []
+        
+        def finish(text: str, result: Dict[str, Any]):
+            to_cache.append((self._cache_key(text, policy), {
+                key: result[key] for key in ("summary", "input_tokens", "generated_tokens", "extractive")
+            }))
+            for position in pending[text]:
+                results[position] = {**result, "policy": policy.name, "cached": False}
+        
+        # Tokenize the remaining texts once, without padding
+        pending_texts = list(pending)
+        with stage_duration.time(service="summarization", stage="tokenize"):
+            encodings = self.tokenizer(pending_texts, max_length=self.max_input_length, truncation=True)
+        lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+        budgets = [policy.output_budget(length) for length in lengths]
+        
+        # Short inputs skip generation
+        to_generate = []
+        for i, text in enumerate(pending_texts):
+            if lengths[i] < policy.extractive_below_tokens:
+                finish(text, {
+                    "summary": extractive_summary(text[len("summarize: "):], budgets[i], self._count_tokens),
+                    "input_tokens": lengths[i],
+                    "generated_tokens": 0,
+                    "decode_ms": 0.0,
+                    "batch_size": 0,
+                    "extractive": True
+                })
+            else:
+                to_generate.append(i)
+        
+        if cache is not None:
+            cache.set_many(to_cache)
+        to_cache.clear()
+        
+        pad_token_id = self.tokenizer.pad_token_id
+        for bucket in length_bucketed_batches([lengths[i] for i in to_generate], batch_size, max_batch_tokens):
+            # One output budget per generate call
+            by_budget = {}
+            for j in bucket:
+                by_budget.setdefault(budgets[to_generate[j]], []).append(to_generate[j])
+            
+            for budget, batch in by_budget.items():
+                features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch]
+                inputs = self.tokenizer.pad(features, return_tensors="pt")
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                
+                # Generate and decode the whole group at once
+                started = time.perf_counter()
+                output = self._generate(inputs, policy, budget)
+                decode_ms = (time.perf_counter() - started) * 1000
+                stage_duration.observe(decode_ms / 1000, service="summarization", stage="generate")
+                inference_batch_size.observe(len(batch), service="summarization")
+                decoded = self.tokenizer.batch_decode(output, skip_special_tokens=True)
+                # Non-padding output tokens per row (the decoder start token is the pad token)
+                generated = (output != pad_token_id).sum(dim=1).tolist()
+                
+                # Put summaries back in input order
+                for i, summary, generated_tokens in zip(batch, decoded, generated):
+                    finish(pending_texts[i], {
+                        "summary": summary,
+                        "input_tokens": lengths[i],
+                        "generated_tokens": generated_tokens,
+                        "decode_ms": decode_ms,
+                        "batch_size": len(batch),
+                        "extractive": False
+                    })
+                
+                if cache is not None:
+                    cache.set_many(to_cache)
+                to_cache.clear()
+        
+        return results
 
 # Singleton instance
-summarization_service = SummarizationService()
+summarization_service = SummarizationService(
+    batch_size=int(os.getenv("SUMMARIZATION_BATCH_SIZE", "16")),
+    max_batch_tokens=int(os.getenv("SUMMARIZATION_MAX_BATCH_TOKENS", "4096")),
+    backend=os.getenv("SUMMARIZATION_BACKEND", "torch"),
+    default_policy=os.getenv("SUMMARIZATION_POLICY", "quality")
+)
+
+# Coalesces concurrent single-text requests, given as (text, policy) pairs, into batched generate calls
+summarization_batcher = build_micro_batcher("summarization", summarization_service.summarize_requests)
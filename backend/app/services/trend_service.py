@@ -0,0 +1,218 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import models
+
+# Bucket sizes maintained for every review
+TREND_GRANULARITIES = ("hour", "day")
+
+# Aspects kept in each bucket's top_aspects list
+TOP_ASPECTS_PER_BUCKET = 5
+
+SENTIMENT_LABELS = ("positive", "neutral", "negative")
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown trend granularity: {granularity}")
+
+class TrendDelta:
+    """Changes to trend buckets collected by a write path and applied in one go
+
+    Buckets are keyed by the creation time of the review, so re-analyzing a
+    review moves its contribution within the same buckets: the old result is
+    subtracted and the new one added.
+    """
+
+    def __init__(self):
+        # (granularity, bucket) -> review count, score sum and label counts
+        self.sentiment: Dict[Tuple[str, datetime], Dict[str, float]] = {}
+        # (granularity, bucket, aspect) -> mention count and score sum
+        self.aspects: Dict[Tuple[str, datetime, str], Dict[str, float]] = {}
+
+    def add_sentiment(self, created_at: Optional[datetime], score: float, label: str, sign: int = 1):
+        """Count (sign=1) or uncount (sign=-1) one review's sentiment"""
+        if created_at is None:
+            return
+        for granularity in TREND_GRANULARITIES:
+            key = (granularity, bucket_start(created_at, granularity))
+            totals = self.sentiment.setdefault(key, {
+                "total_reviews": 0, "sentiment_sum": 0.0,
+                "positive_count": 0, "neutral_count": 0, "negative_count": 0
+            })
+            totals["total_reviews"] += sign
+            totals["sentiment_sum"] += sign * score
+            if label in SENTIMENT_LABELS:
+                totals[f"{label}_count"] += sign
+
+    def add_aspect(self, created_at: Optional[datetime], aspect: str, score: float, sign: int = 1):
+        """Count (sign=1) or uncount (sign=-1) one aspect mention"""
+        if created_at is None:
+            return
+        for granularity in TREND_GRANULARITIES:
+            key = (granularity, bucket_start(created_at, granularity), aspect)
+            totals = self.aspects.setdefault(key, {"mention_count": 0, "score_sum": 0.0})
+            totals["mention_count"] += sign
+            totals["score_sum"] += sign * score
+
+def apply_trend_delta(db: Session, delta: TrendDelta):
+    """Write a delta to the trend tables and refresh the derived columns of touched buckets (caller commits)
+
+    Counters are changed with INSERT ... ON CONFLICT DO UPDATE increments, so
+    concurrent writers never lose updates; the derived averages, distribution
+    and top aspects are then recomputed from the counters of touched buckets
+    only.
+    """
+    keys = set(delta.sentiment) | {(granularity, date) for granularity, date, _ in delta.aspects}
+    if not keys:
+        return
+
+    counter_columns = ("total_reviews", "sentiment_sum", "positive_count", "neutral_count", "negative_count")
+    empty = dict.fromkeys(counter_columns, 0)
+
+    # Bucket counters (creates missing buckets, including aspect-only ones)
+    statement = insert(models.ReviewTrend)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.ReviewTrend.granularity, models.ReviewTrend.date],
+        set_={
+            column: getattr(models.ReviewTrend, column) + getattr(statement.excluded, column)
+            for column in counter_columns
+        }
+    )
+    db.execute(statement, [
+        {
+            "granularity": granularity,
+            "date": date,
+            "avg_sentiment": 0.0,
+            "sentiment_distribution": {},
+            "top_aspects": [],
+            **delta.sentiment.get((granularity, date), empty)
+        }
+        for granularity, date in keys
+    ])
+
+    # Per-aspect counters
+    if delta.aspects:
+        statement = insert(models.TrendAspectBucket)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                models.TrendAspectBucket.granularity,
+                models.TrendAspectBucket.date,
+                models.TrendAspectBucket.aspect
+            ],
+            set_={
+                "mention_count": models.TrendAspectBucket.mention_count + statement.excluded.mention_count,
+                "score_sum": models.TrendAspectBucket.score_sum + statement.excluded.score_sum
+            }
+        )
+        db.execute(statement, [
+            {"granularity": granularity, "date": date, "aspect": aspect, **totals}
+            for (granularity, date, aspect), totals in delta.aspects.items()
+        ])
+
+    refresh_trend_buckets(db, list(keys))
+
+def refresh_trend_buckets(db: Session, keys: List[Tuple[str, datetime]]):
+    """Recompute avg_sentiment, sentiment_distribution and top_aspects from the counters (caller commits)"""
+    trends = db.query(models.ReviewTrend).filter(
+        tuple_(models.ReviewTrend.granularity, models.ReviewTrend.date).in_(keys)
+    ).populate_existing().all()
+
+    aspect_buckets = db.query(models.TrendAspectBucket).filter(
+        tuple_(models.TrendAspectBucket.granularity, models.TrendAspectBucket.date).in_(keys),
+        models.TrendAspectBucket.mention_count > 0
+    ).populate_existing().all()
+
+    aspects_by_key = {}
+    for bucket in aspect_buckets:
+        aspects_by_key.setdefault((bucket.granularity, bucket.date), []).append(bucket)
+
+    for trend in trends:
+        total = trend.total_reviews
+        trend.avg_sentiment = trend.sentiment_sum / total if total > 0 else 0.0
+        trend.sentiment_distribution = {
+            "positive": trend.positive_count,
+            "neutral": trend.neutral_count,
+            "negative": trend.negative_count
+        }
+
+        top = sorted(
+            aspects_by_key.get((trend.granularity, trend.date), []),
+            key=lambda bucket: (-bucket.mention_count, bucket.aspect)
+        )[:TOP_ASPECTS_PER_BUCKET]
+        trend.top_aspects = [
+            {
+                "aspect": bucket.aspect,
+                "count": bucket.mention_count,
+                "avg_sentiment": bucket.score_sum / bucket.mention_count
+            }
+            for bucket in top
+        ]
+
+def rebuild_trends(db: Session, chunk_size: int = 10000) -> int:
+    """Backfill all trend buckets from existing analyses (commits)
+
+    Streams the analyses in chunks and applies one delta per chunk, so memory
+    is bounded by the number of buckets touched by a chunk.
+    """
+    db.query(models.TrendAspectBucket).delete()
+    db.query(models.ReviewTrend).delete()
+
+    processed = 0
+
+    sentiment_rows = db.query(
+        models.Review.created_at,
+        models.SentimentAnalysis.sentiment_score,
+        models.SentimentAnalysis.sentiment_label
+    ).join(
+        models.Review, models.Review.id == models.SentimentAnalysis.review_id
+    ).execution_options(yield_per=chunk_size)
+
+    delta = TrendDelta()
+    for created_at, score, label in sentiment_rows:
+        delta.add_sentiment(created_at, score, label)
+        processed += 1
+        if processed % chunk_size == 0:
+            apply_trend_delta(db, delta)
+            delta = TrendDelta()
+
+    aspect_rows = db.query(
+        models.Review.created_at,
+        models.AspectAnalysis.aspect,
+        models.AspectAnalysis.sentiment_score
+    ).join(
+        models.Review, models.Review.id == models.AspectAnalysis.review_id
+    ).execution_options(yield_per=chunk_size)
+
+    for created_at, aspect, score in aspect_rows:
+        delta.add_aspect(created_at, aspect, score)
+        processed += 1
+        if processed % chunk_size == 0:
+            apply_trend_delta(db, delta)
+            delta = TrendDelta()
+
+    apply_trend_delta(db, delta)
+    db.commit()
+    return processed
+
+def query_trends(
+    db: Session,
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 10
+) -> List[models.ReviewTrend]:
+    """Trend buckets of one granularity in a date window, newest first"""
+    query = db.query(models.ReviewTrend).filter(models.ReviewTrend.granularity == granularity)
+    if start is not None:
+        query = query.filter(models.ReviewTrend.date >= bucket_start(start, granularity))
+    if end is not None:
+        query = query.filter(models.ReviewTrend.date < end)
+    return query.order_by(models.ReviewTrend.date.desc()).limit(limit).all()
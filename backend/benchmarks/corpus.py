@@ -0,0 +1,127 @@
+"""Synthetic smartphone review corpus for the benchmarks
+
+Reviews are assembled from sentence templates that mention the aspects the
+aspect extractor knows about, with positive, negative and neutral wording,
+so every code path (rule hits, model-scored texts, aspect overrides) gets
+exercised. The same seed always gives the same corpus.
+
+    python -m benchmarks.corpus --count 10000 --output reviews.csv
+"""
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ASPECT_NOUNS = {
+    "battery life": ["battery", "battery life", "charge"],
+    "screen quality": ["screen", "display", "brightness"],
+    "camera quality": ["camera", "photo quality", "selfie camera", "zoom"],
+    "performance": ["performance", "processor", "app switching"],
+    "sound quality": ["speaker", "sound", "audio"],
+    "charging speed": ["charging", "fast charging", "charger"],
+    "overheating": ["temperature", "heat"],
+    "build quality": ["build", "design", "glass back", "metal frame"],
+}
+
+POSITIVE_TEMPLATES = [
+    "The {noun} is excellent and I love it.",
+    "I am really impressed with the {noun}.",
+    "Honestly the {noun} is the best I have had on any phone.",
+    "The {noun} works great, no complaints at all.",
+    "Very happy with the {noun} after two weeks of use.",
+]
+
+NEGATIVE_TEMPLATES = [
+    "The {noun} is disappointing for the price.",
+    "I have had a constant problem with the {noun}.",
+    "The {noun} is poor and I expected better.",
+    "After a month the {noun} started giving me issues.",
+    "Not impressed with the {noun} at all.",
+]
+
+NEUTRAL_TEMPLATES = [
+    "The {noun} is about what you would expect.",
+    "I have not used the {noun} much yet.",
+    "The {noun} is similar to my previous phone.",
+    "Nothing special to say about the {noun}.",
+]
+
+FILLER_SENTENCES = [
+    "I bought it for my daughter as a birthday gift.",
+    "Delivery took four days and the box was intact.",
+    "Setup took about ten minutes including the data transfer.",
+    "I mostly use it for messages, maps and the occasional video.",
+    "My previous phone was three years old.",
+    "The price dropped a week after I ordered it.",
+]
+
+SOURCES = ["web", "app", "csv", "partner"]
+
+def generate_review(rng: random.Random, sentences: Tuple[int, int]) -> Tuple[str, float]:
+    """One review text and a rating consistent with its overall tone"""
+    tone = rng.choice(["positive", "negative", "mixed", "neutral"])
+    parts = []
+    balance = 0
+    for _ in range(rng.randint(*sentences)):
+        if rng.random() < 0.25:
+            parts.append(rng.choice(FILLER_SENTENCES))
+            continue
+
+        noun = rng.choice(ASPECT_NOUNS[rng.choice(list(ASPECT_NOUNS))])
+        if tone == "mixed":
+            sentiment = rng.choice(["positive", "negative"])
+        elif tone == "neutral" or rng.random() < 0.15:
+            sentiment = "neutral"
+        else:
+            sentiment = tone
+
+        templates = {"positive": POSITIVE_TEMPLATES, "negative": NEGATIVE_TEMPLATES, "neutral": NEUTRAL_TEMPLATES}
+        parts.append(rng.choice(templates[sentiment]).format(noun=noun))
+        balance += {"positive": 1, "negative": -1, "neutral": 0}[sentiment]
+
+    rating = max(1.0, min(5.0, 3.0 + balance + rng.choice([-0.5, 0.0, 0.5])))
+    return " ".join(parts), rating
+
+def iter_reviews(
+    count: int,
+    sentences: Tuple[int, int] = (2, 6),
+    seed: int = 42,
+    start: Optional[datetime] = None
+) -> Iterator[Dict]:
+    """count reviews with text, rating, source and created_at spread over 90 days from start"""
+    rng = random.Random(seed)
+    start = start or datetime(2024, 1, 1)
+    for _ in range(count):
+        text, rating = generate_review(rng, sentences)
+        yield {
+            "text": text,
+            "rating": rating,
+            "source": rng.choice(SOURCES),
+            "created_at": start + timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        }
+
+def generate_reviews(count: int, sentences: Tuple[int, int] = (2, 6), seed: int = 42) -> List[Dict]:
+    return list(iter_reviews(count, sentences, seed))
+
+def write_csv(path: str, reviews: Iterable[Dict]):
+    """Write reviews in the upload-csv format (text, rating)"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["text", "rating"])
+        for review in reviews:
+            writer.writerow([review["text"], review["rating"]])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--min-sentences", type=int, default=2)
+    parser.add_argument("--max-sentences", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="reviews.csv")
+    args = parser.parse_args()
+
+    write_csv(args.output, iter_reviews(args.count, (args.min_sentences, args.max_sentences), args.seed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Microbenchmark: single-pass keyword matcher vs. per-phrase substring scans
+
+Run from the backend directory:
+
+    python -m benchmarks.keyword_matching [--repeat 2000]
+
+Checks that SentimentKeywordMatcher reproduces the original loops exactly on
+the sample corpus, then reports the time per text for both approaches.
+"""
+import argparse
+import timeit
+
+from app.services.sentiment_rules import (
+    POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, CONTEXT_PHRASES, KeywordMatch, SentimentKeywordMatcher
+)
+
+SAMPLE_REVIEWS = [
+    "The battery lasts all day without any problem and the screen is bright and clear.",
+    "Camera struggles in low light, photos are blurry. Not worth the price.",
+    "It's okay. The phone arrived on time and setup was simple.",
+    "Laggy, cheap plastic, overheats when gaming and the charging takes longer than expected.",
+    "I have been using this phone for a week now. The display is fine and the software has some quirks, "
+    "though nothing that stops me from getting work done. Packaging was nice.",
+]
+
+def legacy_match(text_lower: str) -> KeywordMatch:
+    """The original per-phrase loops, as they ran before the matcher was introduced"""
+    return KeywordMatch(
+        has_positive_context=any(phrase in text_lower for phrase in CONTEXT_PHRASES["positive"]),
+        has_negative_context=any(phrase in text_lower for phrase in CONTEXT_PHRASES["negative"]),
+        positive_count=sum(1 for word in POSITIVE_KEYWORDS if word in text_lower),
+        negative_count=sum(1 for word in NEGATIVE_KEYWORDS if word in text_lower)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="Iterations per text")
+    args = parser.parse_args()
+
+    matcher = SentimentKeywordMatcher(POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, CONTEXT_PHRASES)
+    texts = [review.lower() for review in SAMPLE_REVIEWS]
+
+    # Parity check before timing anything
+    for text in texts:
+        assert matcher.match(text) == legacy_match(text), text
+
+    print(f"{'chars':>6} {'legacy (us)':>12} {'matcher (us)':>13} {'speedup':>8}")
+    for text in texts:
+        # analyze_sentiment used to run the keyword counts twice per model-scored text
+        legacy = timeit.timeit(lambda: (legacy_match(text), legacy_match(text)), number=args.repeat)
+        single_pass = timeit.timeit(lambda: matcher.match(text), number=args.repeat)
+        print(
+            f"{len(text):>6} {legacy / args.repeat * 1e6:>12.1f} "
+            f"{single_pass / args.repeat * 1e6:>13.1f} {legacy / single_pass:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
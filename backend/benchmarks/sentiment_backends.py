@@ -0,0 +1,98 @@
+"""Parity check and benchmark of the sentiment inference backends
+
+Run from the backend directory (the onnx backends need `python manage.py
+export-onnx` first):
+
+    python -m benchmarks.sentiment_backends [--backends torch torch-int8 onnx onnx-int8] [--batch 256]
+
+Every backend is compared with fp32 torch on the sample corpus: class
+probabilities (label agreement, largest drift) and the final API labels after
+the rule and keyword adjustments. Then single-text latency and batched
+throughput of the model path are reported. Exits with status 1 if a backend
+disagrees with fp32 on more labels than --min-agreement allows.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.inference_backends import CLASSIFIER_BACKENDS, compare_probabilities
+from app.services.sentiment_service import SentimentAnalysisService
+from benchmarks.keyword_matching import SAMPLE_REVIEWS
+
+PARITY_TEXTS = SAMPLE_REVIEWS + [
+    "Honestly the best phone I have owned, everything about it feels right.",
+    "Stopped working after two weeks and support never answered.",
+    "The screen is nice but I expected more for this price.",
+    "Works as described.",
+    "Terrible. Returned it the next day.",
+    "Photos look great in daylight, the night mode is hit and miss.",
+]
+
+def load_service(backend):
+    service = SentimentAnalysisService(backend=backend)
+    started = time.perf_counter()
+    service.ensure_loaded()
+    load_seconds = time.perf_counter() - started
+    # Measure the model, not the result cache
+    service.cache = None
+    return service, load_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(CLASSIFIER_BACKENDS), choices=CLASSIFIER_BACKENDS)
+    parser.add_argument("--batch", type=int, default=256, help="Texts per throughput run")
+    parser.add_argument("--repeat", type=int, default=20, help="Single-text latency samples per text")
+    parser.add_argument("--min-agreement", type=float, default=1.0, help="Required label agreement with fp32")
+    args = parser.parse_args()
+
+    texts = [text.lower() for text in PARITY_TEXTS]
+    batch_texts = [texts[i % len(texts)] for i in range(args.batch)]
+
+    reference, _ = load_service("torch")
+    reference_probs = reference._predict_probabilities(texts)
+    reference_labels = [result["sentiment_label"] for result in reference.analyze_batch(texts)]
+
+    failed = False
+    print(
+        f"{'backend':>10} {'load s':>7} {'agree':>6} {'max diff':>9} {'api agree':>10} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'texts/s':>8}"
+    )
+    for backend in args.backends:
+        try:
+            service, load_seconds = (reference, 0.0) if backend == "torch" else load_service(backend)
+        except RuntimeError as e:
+            print(f"{backend:>10} skipped: {e}")
+            continue
+
+        # Parity
+        parity = compare_probabilities(reference_probs, service._predict_probabilities(texts))
+        labels = [result["sentiment_label"] for result in service.analyze_batch(texts)]
+        api_agreement = float(np.mean([a == b for a, b in zip(reference_labels, labels)]))
+        if min(parity["label_agreement"], api_agreement) < args.min_agreement:
+            failed = True
+
+        # Single-text latency
+        latencies = []
+        for text in texts:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                service._predict_probabilities([text])
+                latencies.append(time.perf_counter() - started)
+
+        # Batched throughput
+        started = time.perf_counter()
+        service._predict_probabilities(batch_texts)
+        throughput = len(batch_texts) / (time.perf_counter() - started)
+
+        print(
+            f"{backend:>10} {load_seconds:>7.1f} {parity['label_agreement']:>6.2f} {parity['max_abs_diff']:>9.4f} "
+            f"{api_agreement:>10.2f} {np.percentile(latencies, 50) * 1000:>7.1f} "
+            f"{np.percentile(latencies, 95) * 1000:>7.1f} {throughput:>8.1f}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Concurrent read/write benchmark: SQLite tuning profiles
+
+Run from the backend directory:
+
+    python -m benchmarks.sqlite_profiles [--writers 4] [--readers 8] [--seconds 5] [--reviews-per-write 10]
+
+For each profile, builds a fresh database in a temporary directory, then
+runs writer threads (small review + sentiment upsert transactions, like the
+batch endpoints) next to reader threads (recent-reviews page and trend
+query) for a fixed time. Reports throughput, p95 latency and how many
+operations failed with "database is locked".
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base, SQLITE_PROFILES, create_database_engine
+from app.models import models
+from app.services.analysis_store import store_sentiment_results
+from app.services.trend_service import query_trends
+
+SEED_REVIEWS = 5000
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def _writer(Session, stop, stats, reviews_per_write):
+    while not stop.is_set():
+        started = time.perf_counter()
+        db = Session()
+        try:
+            reviews = [
+                models.Review(text="Benchmark review", source="benchmark", created_at=datetime.utcnow())
+                for _ in range(reviews_per_write)
+            ]
+            db.add_all(reviews)
+            db.flush()
+            store_sentiment_results(db, reviews, [
+                {"sentiment_score": 0.5, "sentiment_label": "positive", "confidence": 0.9}
+            ] * len(reviews))
+            db.commit()
+            stats["write_latencies"].append(time.perf_counter() - started)
+        except OperationalError:
+            db.rollback()
+            stats["write_errors"] += 1
+        finally:
+            db.close()
+
+def _reader(Session, stop, stats):
+    while not stop.is_set():
+        started = time.perf_counter()
+        db = Session()
+        try:
+            db.query(models.Review).order_by(models.Review.id.desc()).limit(20).all()
+            query_trends(db, "hour", limit=24)
+            stats["read_latencies"].append(time.perf_counter() - started)
+        except OperationalError:
+            stats["read_errors"] += 1
+        finally:
+            db.close()
+
+def run_profile(profile, writers, readers, seconds, reviews_per_write):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_database_engine(
+            f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+            SQLITE_PROFILES[profile],
+            pool_size=writers + readers
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = Session()
+        db.add_all(models.Review(text="Seed review", source="benchmark") for _ in range(SEED_REVIEWS))
+        db.commit()
+        db.close()
+
+        stats = {"write_latencies": [], "read_latencies": [], "write_errors": 0, "read_errors": 0}
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=_writer, args=(Session, stop, stats, reviews_per_write))
+            for _ in range(writers)
+        ]
+        threads += [threading.Thread(target=_reader, args=(Session, stop, stats)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer threads")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reader threads")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration per profile")
+    parser.add_argument("--reviews-per-write", type=int, default=10, help="Reviews written per transaction")
+    args = parser.parse_args()
+
+    print(
+        f"{'profile':>12} {'writes/s':>9} {'write p95 ms':>13} {'locked':>7} "
+        f"{'reads/s':>8} {'read p95 ms':>12} {'locked':>7}"
+    )
+    for profile in SQLITE_PROFILES:
+        stats = run_profile(profile, args.writers, args.readers, args.seconds, args.reviews_per_write)
+        print(
+            f"{profile:>12} {len(stats['write_latencies']) / args.seconds:>9.1f} "
+            f"{_percentile(stats['write_latencies'], 0.95) * 1000:>13.1f} {stats['write_errors']:>7} "
+            f"{len(stats['read_latencies']) / args.seconds:>8.1f} "
+            f"{_percentile(stats['read_latencies'], 0.95) * 1000:>12.1f} {stats['read_errors']:>7}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Benchmark suite: services, batch endpoints and database paths, reported as JSON
+
+Run from the backend directory:
+
+    python -m benchmarks.suite [--groups services endpoints db] [--texts 200] [--sizes 10000 100000 1000000]
+                               [--output results.json] [--baseline previous.json] [--tolerance 0.15]
+
+All inputs come from the seeded synthetic corpus (benchmarks.corpus), so two
+runs on the same machine measure the same work. Groups:
+
+- services: analyze_sentiment, extract_aspects and generate_summary, one
+  text per call, with the result caches off
+- endpoints: the sentiment, aspect and summarization batch endpoints
+  through the test client, against a temporary database
+- db: CSV ingestion, then get_top_aspects (rollup table and live GROUP BY)
+  over that many aspect analyses, for each --sizes entry
+
+The app's database (SQLITE_DB_FILE) is pointed into the run's temporary
+directory before anything from the app is imported, so importing the app
+never migrates or writes to the real database.
+
+Every entry reports p50/p95/p99 latency and throughput. Groups whose models
+cannot be loaded are recorded as skipped. With --baseline, entries whose p95
+grew or throughput dropped by more than --tolerance are listed and the exit
+status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from benchmarks.corpus import ASPECT_NOUNS, generate_reviews, iter_reviews, write_csv
+
+GROUPS = ("services", "endpoints", "db")
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def summarize(latencies: List[float], items: int = None) -> Dict[str, Any]:
+    """Latency percentiles in ms and items per second (one item per call unless given)"""
+    total = sum(latencies)
+    items = len(latencies) if items is None else items
+    return {
+        "calls": len(latencies),
+        "items": items,
+        "throughput_per_s": items / total if total > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000
+    }
+
+def time_calls(call: Callable, inputs: List[Any]) -> List[float]:
+    latencies = []
+    for value in inputs:
+        started = time.perf_counter()
+        call(value)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def temporary_session_factory(directory: str, name: str):
+    """Session factory for a fresh database with the app's schema and SQLite profile"""
+    from sqlalchemy.orm import sessionmaker
+    from app.database.database import Base, SQLITE_PRAGMAS, create_database_engine
+
+    engine = create_database_engine(f"sqlite:///{os.path.join(directory, name)}", SQLITE_PRAGMAS)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def load_services():
+    """The model services with their result caches off, so every call does the work"""
+    from app.services.sentiment_service import sentiment_service
+    from app.services.aspect_service import aspect_service
+    from app.services.summarization_service import summarization_service
+
+    services = {"sentiment": sentiment_service, "aspects": aspect_service, "summarization": summarization_service}
+    loaded = {}
+    for name, service in services.items():
+        try:
+            service.ensure_loaded()
+        except Exception as e:
+            loaded[name] = e
+            continue
+        service.cache = None
+        loaded[name] = service
+    return loaded
+
+def bench_services(args, results: Dict[str, Any]):
+    try:
+        services = load_services()
+    except ImportError as e:
+        for name in ("analyze_sentiment", "extract_aspects", "generate_summary"):
+            results[name] = {"skipped": str(e)}
+        return
+
+    texts = [review["text"] for review in generate_reviews(args.texts, args.sentences, args.seed)]
+    calls = [
+        ("analyze_sentiment", "sentiment", lambda service: service.analyze_sentiment, texts),
+        ("extract_aspects", "aspects", lambda service: service.extract_aspects, texts),
+        ("generate_summary", "summarization", lambda service: service.generate_summary, texts[:args.summary_texts]),
+    ]
+    for name, service_name, method, inputs in calls:
+        service = services[service_name]
+        if isinstance(service, Exception):
+            results[name] = {"skipped": str(service)}
+            continue
+        call = method(service)
+        call(inputs[0])  # Warm-up (lazy allocations, first-call kernels)
+        results[name] = summarize(time_calls(call, inputs))
+
+def bench_endpoints(args, directory: str, results: Dict[str, Any]):
+    endpoints = {
+        "POST /api/sentiment/analyze-batch": "sentiment",
+        "POST /api/aspects/analyze-batch": "aspects",
+        "POST /api/summarization/summarize-batch": "summarization",
+    }
+    try:
+        from fastapi.testclient import TestClient
+        from app.database.database import get_db
+        from app.main import app
+        services = load_services()
+    except ImportError as e:
+        for name in endpoints:
+            results[name] = {"skipped": str(e)}
+        return
+
+    from app.models import models
+
+    Session = temporary_session_factory(directory, "endpoints.db")
+    db = Session()
+    reviews = [models.Review(**review) for review in iter_reviews(args.texts, args.sentences, args.seed)]
+    db.add_all(reviews)
+    db.commit()
+    review_ids = [review.id for review in reviews]
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    batches = [review_ids[start:start + args.batch_size] for start in range(0, len(review_ids), args.batch_size)]
+
+    try:
+        for name, service_name in endpoints.items():
+            if isinstance(services[service_name], Exception):
+                results[name] = {"skipped": str(services[service_name])}
+                continue
+            path = name.split(" ", 1)[1]
+            endpoint_batches = batches[:max(1, args.summary_texts // args.batch_size)] \
+                if service_name == "summarization" else batches
+
+            def post(batch):
+                response = client.post(path, json={"review_ids": batch})
+                response.raise_for_status()
+
+            results[name] = summarize(
+                time_calls(post, endpoint_batches), items=sum(len(batch) for batch in endpoint_batches)
+            )
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+def seed_aspects(db, review_ids: List[int], count: int, seed: int):
+    """Insert count synthetic aspect analyses over the given reviews"""
+    from sqlalchemy import insert
+    from app.models import models
+
+    rng = random.Random(seed)
+    aspects = list(ASPECT_NOUNS)
+    for start in range(0, count, 10000):
+        rows = []
+        for _ in range(min(10000, count - start)):
+            score = rng.uniform(-1, 1)
+            rows.append({
+                "review_id": rng.choice(review_ids),
+                "aspect": rng.choice(aspects),
+                "sentiment_score": score,
+                "sentiment_label": "positive" if score > 0.3 else "negative" if score < -0.3 else "neutral",
+                "confidence": 0.9,
+                "relevant_text": "synthetic"
+            })
+        db.execute(insert(models.AspectAnalysis), rows)
+        db.commit()
+
+def bench_db(args, directory: str, results: Dict[str, Any]):
+    from app.models import models
+    from app.services.aspect_rollup import rebuild_aspect_rollup, top_aspects_from_rollup, top_aspects_live
+    from app.services.ingestion_service import ingest_reviews_csv
+
+    for size in args.sizes:
+        Session = temporary_session_factory(directory, f"db_{size}.db")
+        csv_path = os.path.join(directory, f"reviews_{size}.csv")
+        write_csv(csv_path, iter_reviews(size, args.sentences, args.seed))
+
+        db = Session()
+        with open(csv_path, "rb") as stream:
+            ingest = ingest_reviews_csv(db, stream)
+        results[f"ingest_csv[{size}]"] = {
+            "calls": 1,
+            "items": ingest["reviews_processed"],
+            "throughput_per_s": ingest["rows_per_second"],
+            "seconds": ingest["duration_seconds"]
+        }
+        os.remove(csv_path)
+
+        review_ids = [review_id for review_id, in db.query(models.Review.id)]
+        seed_aspects(db, review_ids, size, args.seed)
+        rebuild_aspect_rollup(db)
+        db.commit()
+
+        for name, query in (("get_top_aspects", top_aspects_from_rollup), ("get_top_aspects_live", top_aspects_live)):
+            query(db, 10)  # Warm the page cache
+            results[f"{name}[{size}]"] = summarize(time_calls(lambda _: query(db, 10), range(args.repeat)))
+        db.close()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Entries that got slower than the baseline by more than tolerance"""
+    regressions = []
+    for name, entry in results.items():
+        previous = baseline.get(name)
+        if previous is None or "skipped" in entry or "skipped" in previous:
+            continue
+        if "p95_ms" in entry and previous.get("p95_ms") and entry["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} ms -> {entry['p95_ms']:.2f} ms")
+        if previous.get("throughput_per_s") and \
+                entry["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_per_s']:.1f}/s -> {entry['throughput_per_s']:.1f}/s"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", nargs="+", default=list(GROUPS), choices=GROUPS)
+    parser.add_argument("--texts", type=int, default=200, help="Corpus size for the service and endpoint groups")
+    parser.add_argument("--summary-texts", type=int, default=20, help="Texts summarized (T5 is much slower)")
+    parser.add_argument("--min-sentences", type=int, default=2)
+    parser.add_argument("--max-sentences", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, default=20, help="Review IDs per batch endpoint call")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000], help="Rows for the db group")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per top-aspects query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown")
+    args = parser.parse_args()
+    args.sentences = (args.min_sentences, args.max_sentences)
+
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Read by app.database.database on import: keep the app off the real database
+        os.environ["SQLITE_DB_FILE"] = os.path.join(directory, "app.db")
+
+        if "services" in args.groups:
+            bench_services(args, results)
+        if "endpoints" in args.groups:
+            bench_endpoints(args, directory, results)
+        if "db" in args.groups:
+            bench_db(args, directory, results)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Quality check and benchmark of the summarization inference backends
+
+Run from the backend directory (the onnx backends need `python manage.py
+export-onnx` first):
+
+    python -m benchmarks.summarization_backends [--backends torch torch-int8 onnx onnx-int8] [--policy quality]
+
+Every backend summarizes a fixed review corpus under one decoding tier and
+is compared with the fp32 torch summaries: exact matches and
+mean ROUGE-L F1 over words. Each backend's batched summaries of a
+mixed-length corpus, generated as one padded batch, are also compared with
+its one-call-per-review summaries. Then single-review latency and
+generated tokens per second (batched and one review at a time) are
+reported. Exits with status 1 if a backend's mean ROUGE-L against fp32 is
+below --min-rouge, or if any batched summary's ROUGE-L against its
+one-at-a-time summary is below --min-batch-rouge.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.decoding_policy import DECODING_POLICIES
+from app.services.inference_backends import SEQ2SEQ_BACKENDS
+from app.services.summarization_service import SummarizationService
+
+CORPUS = [
+    "I have been using this phone for three months. The battery easily lasts a full day with heavy use, "
+    "and the screen is bright enough to read outside. The camera is good in daylight but struggles at night. "
+    "Overall I am happy with it, especially for the price.",
+    "Terrible experience. The phone started overheating after a week, the charging port stopped working "
+    "and customer support kept sending me template answers. I returned it and bought a different brand.",
+    "The design is beautiful and it feels premium in the hand. Performance is smooth for everyday apps "
+    "and games run without lag. The speakers are loud but a bit tinny. Software updates arrive quickly.",
+    "Decent phone. Nothing special. The screen is fine, the camera is fine, the battery is fine. "
+    "It does what I need it to do, which is calls, messages and maps.",
+    "Camera quality is outstanding, portraits look professional and the zoom is sharp. Sadly the battery "
+    "drains fast when using the camera a lot, so I carry a power bank on trips.",
+    "Setup was confusing and the phone came with a lot of preinstalled apps I could not remove. "
+    "After cleaning it up it runs well, but the first impression was bad.",
+    "Fingerprint sensor is fast and accurate, face unlock works in the dark too. The phone is a bit heavy "
+    "and slippery without a case. Charging from zero to full takes about an hour.",
+    "My previous phone was three years old so this is a huge upgrade. Apps open instantly, the display is "
+    "smooth and colorful, and I finally have enough storage for all my photos.",
+]
+
+# Full reviews and their first sentences, so one padded batch mixes short and long inputs
+PARITY_TEXTS = CORPUS + [review.split(". ")[0] + "." for review in CORPUS]
+
+def rouge_l_f1(reference: str, candidate: str) -> float:
+    """ROUGE-L F1 over lowercase words (longest common subsequence)"""
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return float(ref == cand)
+
+    # LCS length by dynamic programming over one row at a time
+    previous = [0] * (len(cand) + 1)
+    for ref_word in ref:
+        current = [0]
+        for j, cand_word in enumerate(cand):
+            current.append(previous[j] + 1 if ref_word == cand_word else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+def load_service(backend, policy):
+    service = SummarizationService(backend=backend, default_policy=policy)
+    started = time.perf_counter()
+    service.ensure_loaded()
+    load_seconds = time.perf_counter() - started
+    # Measure the model, not the result cache
+    service.cache = None
+    return service, load_seconds
+
+def batch_parity(service, texts, policy=None):
+    """Summaries of texts generated one call per text and as a single padded batch"""
+    single = [service.generate_summary(text, policy) for text in texts]
+    batched = service.generate_batch_summaries(
+        texts, batch_size=len(texts), max_batch_tokens=len(texts) * service.max_input_length, policy=policy
+    )
+    return single, batched
+
+def count_tokens(results):
+    """Generated tokens reported by the service (0 for extractive summaries)"""
+    return sum(result["generated_tokens"] for result in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(SEQ2SEQ_BACKENDS), choices=SEQ2SEQ_BACKENDS)
+    parser.add_argument("--policy", default="quality", choices=DECODING_POLICIES, help="Decoding tier")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus")
+    parser.add_argument("--min-rouge", type=float, default=0.8, help="Required mean ROUGE-L F1 against fp32")
+    parser.add_argument(
+        "--min-batch-rouge", type=float, default=0.9,
+        help="Required ROUGE-L F1 of every batched summary against the same backend's one-at-a-time summary"
+    )
+    args = parser.parse_args()
+
+    reference, _ = load_service("torch", args.policy)
+    reference_summaries = reference.generate_batch_summaries(CORPUS)
+
+    failed = False
+    print(
+        f"{'backend':>10} {'load s':>7} {'exact':>6} {'rouge-l':>8} {'b=1 exact':>10} {'b=1 min':>8} "
+        f"{'p50 ms':>8} {'tok/s single':>13} {'tok/s batch':>12}"
+    )
+    for backend in args.backends:
+        try:
+            service, load_seconds = (reference, 0.0) if backend == "torch" else load_service(backend, args.policy)
+        except RuntimeError as e:
+            print(f"{backend:>10} skipped: {e}")
+            continue
+
+        # Quality against fp32
+        summaries = service.generate_batch_summaries(CORPUS)
+        exact = np.mean([a == b for a, b in zip(reference_summaries, summaries)])
+        rouge = np.mean([rouge_l_f1(a, b) for a, b in zip(reference_summaries, summaries)])
+        if rouge < args.min_rouge:
+            failed = True
+
+        # Batched against one call per review: padding must not change the summaries
+        single, batched = batch_parity(service, PARITY_TEXTS)
+        batch_exact = np.mean([a == b for a, b in zip(single, batched)])
+        batch_rouge = min(rouge_l_f1(a, b) for a, b in zip(single, batched))
+        if batch_rouge < args.min_batch_rouge:
+            failed = True
+        for text, a, b in zip(PARITY_TEXTS, single, batched):
+            if a != b:
+                print(f"{backend:>10} batched summary differs for {text[:40]!r}: {a!r} vs {b!r}", file=sys.stderr)
+
+        # One review at a time
+        latencies = []
+        single_tokens = 0
+        for _ in range(args.repeat):
+            for text in CORPUS:
+                started = time.perf_counter()
+                results = service.summarize_batch([text])
+                latencies.append(time.perf_counter() - started)
+                single_tokens += count_tokens(results)
+
+        # Whole corpus in length-bucketed batches
+        batch_seconds = 0.0
+        batch_tokens = 0
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results = service.summarize_batch(CORPUS)
+            batch_seconds += time.perf_counter() - started
+            batch_tokens += count_tokens(results)
+
+        print(
+            f"{backend:>10} {load_seconds:>7.1f} {exact:>6.2f} {rouge:>8.3f} {batch_exact:>10.2f} {batch_rouge:>8.3f} "
+            f"{np.percentile(latencies, 50) * 1000:>8.1f} {single_tokens / sum(latencies):>13.1f} "
+            f"{batch_tokens / batch_seconds:>12.1f}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Pre-fork serving: the master loads the models once, workers share the weights
+
+Run from the backend directory:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The master imports the app and loads the models (SERVING_PRELOAD_MODELS)
+before forking, so the weight tensors live in pages every worker maps
+copy-on-write. Inference only reads them, so they are never copied and
+resident memory grows by each worker's activations and Python objects,
+not by another copy of DistilBERT, T5 and spaCy.
+"""
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Fast tokenizers must not start their thread pool in the master
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# Workers publish their metrics here so /metrics reports all of them, whichever worker answers
+os.environ.setdefault(
+    "METRICS_MULTIPROCESS_DIR", os.path.join(tempfile.gettempdir(), f"review-analysis-metrics-{os.getpid()}")
+)
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app in the master so the workers inherit it
+preload_app = True
+
+# Model loading and batch requests can take longer than gunicorn's default
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+def when_ready(server):
+    """Load the models once, after the app is imported and before any worker is forked"""
+    from app.services.serving import preload_models
+
+    loaded = preload_models()
+    server.log.info("Preloaded models shared by %d workers: %s", workers, ", ".join(loaded) or "none")
+
+def post_fork(server, worker):
+    from app.services.serving import after_fork
+
+    after_fork(workers)
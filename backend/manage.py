@@ -0,0 +1,172 @@
+"""Maintenance commands
+
+Run from the backend directory:
+
+    python manage.py backfill-trends
+    python manage.py dedupe-analyses
+    python manage.py rebuild-aspect-rollup
+    python manage.py export --output reviews.ndjson.gz --gzip [--format csv] [--resume]
+    python manage.py export-onnx [--task sentiment|summarization|all] [--no-quantize]
+"""
+import argparse
+import gzip
+import json
+import os
+
+from app.database.database import SessionLocal, delete_duplicate_rows, engine, ensure_columns, ensure_indexes
+from app.models import models
+
+def backfill_trends(args):
+    from app.services.trend_service import rebuild_trends
+
+    db = SessionLocal()
+    try:
+        processed = rebuild_trends(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Rebuilt trend buckets from {processed} analyses")
+
+def dedupe_analyses(args):
+    from app.services.trend_service import rebuild_trends
+
+    deleted = delete_duplicate_rows()
+    for table, count in deleted.items():
+        print(f"Deleted {count} duplicate rows from {table}")
+    ensure_indexes()
+
+    if any(deleted.values()):
+        # The trend buckets still count the deleted analyses
+        db = SessionLocal()
+        try:
+            processed = rebuild_trends(db, chunk_size=args.chunk_size)
+        finally:
+            db.close()
+        print(f"Rebuilt trend buckets from {processed} analyses")
+
+def rebuild_aspect_rollup(args):
+    from app.services.aspect_rollup import rebuild_aspect_rollup as rebuild
+
+    db = SessionLocal()
+    try:
+        aspects = rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt aspect rollup for {aspects} aspects")
+
+def _write_export_offset(path, after_id, size):
+    """Record the last exported review id and the output size it ends at, atomically"""
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump({"after_id": after_id, "bytes": size}, f)
+    os.replace(temporary, path)
+
+def export(args):
+    from app.services.export_service import iter_export_chunks, encode_chunk
+
+    # The offset file makes the export resumable: after each chunk it holds
+    # the last review id written and the output size at that point
+    offset_path = args.output + ".offset"
+    after_id, size = 0, 0
+    if args.resume and os.path.exists(offset_path) and os.path.exists(args.output):
+        with open(offset_path) as f:
+            state = json.load(f)
+        after_id, size = state["after_id"], state["bytes"]
+
+    exported = 0
+    db = SessionLocal()
+    try:
+        with open(args.output, "r+b" if size else "wb") as output:
+            # Drop anything written after the last recorded chunk
+            output.truncate(size)
+            output.seek(size)
+
+            header = args.format == "csv" and size == 0
+            for rows in iter_export_chunks(db, after_id=after_id, chunk_size=args.chunk_size):
+                data = encode_chunk(rows, args.format, header=header)
+                header = False
+                if args.gzip:
+                    # One gzip member per chunk, so the file can be cut at any chunk boundary
+                    data = gzip.compress(data)
+
+                output.write(data)
+                output.flush()
+                os.fsync(output.fileno())
+
+                after_id = rows[-1]["id"]
+                exported += len(rows)
+                _write_export_offset(offset_path, after_id, output.tell())
+
+            if header:
+                # Nothing to export: still write a valid CSV
+                data = encode_chunk([], args.format, header=True)
+                output.write(gzip.compress(data) if args.gzip else data)
+    finally:
+        db.close()
+    print(f"Exported {exported} reviews to {args.output} (last id {after_id})")
+
+def export_onnx(args):
+    from app.services.inference_backends import export_classifier_onnx, export_seq2seq_onnx, onnx_model_path
+
+    if args.task in ("sentiment", "all"):
+        from app.services.sentiment_service import sentiment_service
+
+        written = export_classifier_onnx(
+            sentiment_service.model_name, onnx_model_path("sentiment"), quantize=not args.no_quantize
+        )
+        for backend, path in written.items():
+            print(f"Wrote the {backend} sentiment model to {path}")
+        print("Check parity and speed with: python -m benchmarks.sentiment_backends")
+
+    if args.task in ("summarization", "all"):
+        from app.services.summarization_service import summarization_service
+
+        written = export_seq2seq_onnx(
+            summarization_service.model_name, onnx_model_path("summarization"), quantize=not args.no_quantize
+        )
+        for backend, path in written.items():
+            print(f"Wrote the {backend} summarization model to {path}")
+        print("Check quality and speed with: python -m benchmarks.summarization_backends")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    trends = commands.add_parser("backfill-trends", help="Recompute hourly and daily trend buckets from stored analyses")
+    trends.add_argument("--chunk-size", type=int, default=10000, help="Analyses applied per write")
+    trends.set_defaults(handler=backfill_trends)
+
+    dedupe = commands.add_parser(
+        "dedupe-analyses",
+        help="Delete duplicate analyses left by older versions (keeping the newest), then create the unique indexes"
+    )
+    dedupe.add_argument("--chunk-size", type=int, default=10000, help="Analyses applied per write when rebuilding trends")
+    dedupe.set_defaults(handler=dedupe_analyses, create_indexes=False)
+
+    rollup = commands.add_parser("rebuild-aspect-rollup", help="Recompute the aspect rollup from stored aspect analyses")
+    rollup.set_defaults(handler=rebuild_aspect_rollup)
+
+    dump = commands.add_parser("export", help="Stream every review with its analyses to an NDJSON or CSV file")
+    dump.add_argument("--output", required=True, help="File to write")
+    dump.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    dump.add_argument("--gzip", action="store_true", help="Gzip-compress the output")
+    dump.add_argument("--resume", action="store_true", help="Continue an interrupted export from its .offset file")
+    dump.add_argument("--chunk-size", type=int, default=1000, help="Rows fetched and written at a time")
+    dump.set_defaults(handler=export)
+
+    onnx = commands.add_parser("export-onnx", help="Export models for the onnx and onnx-int8 backends")
+    onnx.add_argument("--task", choices=["sentiment", "summarization", "all"], default="all")
+    onnx.add_argument("--no-quantize", action="store_true", help="Skip the int8-quantized copies")
+    onnx.set_defaults(handler=export_onnx)
+
+    args = parser.parse_args()
+
+    # Make sure the schema is current before touching it
+    models.Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    if getattr(args, "create_indexes", True):
+        ensure_indexes()
+
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
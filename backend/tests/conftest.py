@@ -0,0 +1,38 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Keep anything that opens the app's default engine off the real database
+os.environ.setdefault("SQLITE_DB_FILE", os.path.join(tempfile.mkdtemp(), "review_analysis.db"))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base, SQLITE_PRAGMAS, create_database_engine
+from app.models import models
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a fresh SQLite database with the app's schema"""
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'test.db'}", SQLITE_PRAGMAS)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def reviews(db):
+    """Eight reviews spread over three hours of one day and one hour of the next"""
+    start = datetime(2024, 3, 1, 9, 15)
+    offsets = [0, 10, 70, 75, 130, 140, 60 * 24, 60 * 24 + 5]
+    rows = [
+        models.Review(text=f"review {i}", source="test", created_at=start + timedelta(minutes=offset))
+        for i, offset in enumerate(offsets)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
@@ -0,0 +1,15 @@
+"""Analysis results shaped like the services return them"""
+
+def sentiment(score: float) -> dict:
+    label = "positive" if score > 0.3 else "negative" if score < -0.3 else "neutral"
+    return {"sentiment_score": score, "sentiment_label": label, "confidence": 0.9}
+
+def aspect(name: str, score: float) -> dict:
+    label = "positive" if score > 0.3 else "negative" if score < -0.3 else "neutral"
+    return {
+        "aspect": name,
+        "sentiment_score": score,
+        "sentiment_label": label,
+        "confidence": 0.8,
+        "relevant_text": f"the {name}"
+    }
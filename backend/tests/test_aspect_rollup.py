@@ -0,0 +1,65 @@
+import pytest
+
+from app.models import models
+from app.services.analysis_store import delete_aspect_analyses, store_aspect_results, store_in_chunks
+from app.services.aspect_rollup import (
+    apply_rollup_delta, rebuild_aspect_rollup, top_aspects_from_rollup, top_aspects_live, totals_from_results
+)
+from tests.factories import aspect
+
+def rollup_state(db):
+    """Counters of every aspect still mentioned (sums rounded: they are added up in a different order)"""
+    db.expire_all()
+    return {
+        rollup.aspect: (
+            rollup.mention_count,
+            round(rollup.score_sum, 9),
+            rollup.positive_count,
+            rollup.neutral_count,
+            rollup.negative_count
+        )
+        for rollup in db.query(models.AspectRollup)
+        if rollup.mention_count != 0
+    }
+
+def rounded(entries):
+    return [{**entry, "avg_sentiment": round(entry["avg_sentiment"], 9)} for entry in entries]
+
+def test_incremental_updates_match_rebuild(db, reviews):
+    store_in_chunks(db, store_aspect_results, reviews, [
+        [aspect("battery life", 0.8), aspect("camera quality", -0.4)],
+        [aspect("battery life", -0.6), aspect("battery life", 0.1)],
+        [],
+        [aspect("screen quality", 0.5)],
+        [aspect("performance", -0.7)],
+        [aspect("camera quality", 0.9)],
+        [aspect("sound quality", 0.3)],
+        [aspect("performance", 0.6)],
+    ], 3)
+
+    # Re-extraction replaces a review's aspects; deletion takes them out
+    store_aspect_results(db, reviews[:2], [[aspect("camera quality", 0.1)], [aspect("build quality", -0.3)]])
+    delete_aspect_analyses(db, [reviews[4].id, reviews[7].id])
+    db.commit()
+
+    incremental = rollup_state(db)
+    top = rounded(top_aspects_from_rollup(db, 10))
+    assert top == rounded(top_aspects_live(db, 10))
+
+    rebuild_aspect_rollup(db)
+    assert rollup_state(db) == incremental
+    assert "performance" not in incremental
+
+def test_subtracting_totals_removes_the_aspect(db):
+    totals = totals_from_results([[aspect("battery life", 0.8), aspect("battery life", -0.5)]])
+    apply_rollup_delta(db, totals)
+    db.commit()
+    assert top_aspects_from_rollup(db, 10)[0]["label_counts"] == {"positive": 1, "neutral": 0, "negative": 1}
+
+    apply_rollup_delta(db, totals, sign=-1)
+    db.commit()
+    db.expire_all()
+    rollup = db.get(models.AspectRollup, "battery life")
+    assert rollup.mention_count == 0
+    assert rollup.score_sum == pytest.approx(0.0)
+    assert top_aspects_from_rollup(db, 10) == []
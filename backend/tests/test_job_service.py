@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("spacy")
+
+from app.models import models
+from app.services.job_service import JobManager
+
+@pytest.fixture
+def job(db, reviews):
+    """Running sentiment job over the first two reviews, owned by this process"""
+    job = models.AnalysisJob(kind="sentiment", status="running", total_items=2, owner_pid=os.getpid())
+    db.add(job)
+    db.flush()
+    db.add_all(models.AnalysisJobItem(job_id=job.id, review_id=review.id) for review in reviews[:2])
+    db.commit()
+    return job
+
+def item_updates(job):
+    return [{"item_id": item.id, "new_status": "done", "new_result": {"label": "positive"}} for item in job.items]
+
+def test_chunk_is_committed_while_the_job_is_owned(db, job):
+    assert JobManager(1, 2, {"sentiment": 1})._commit_chunk(db, job.id, item_updates(job))
+    db.expire_all()
+    assert job.processed_items == 2
+    assert [(item.status, item.result) for item in job.items] == [("done", {"label": "positive"})] * 2
+
+def test_chunk_is_rolled_back_once_the_job_is_taken_over(db, job):
+    updates = item_updates(job)
+    job.owner_pid = os.getpid() + 1
+    db.commit()
+
+    assert not JobManager(1, 2, {"sentiment": 1})._commit_chunk(db, job.id, updates)
+    db.expire_all()
+    assert job.processed_items == 0
+    assert {item.status for item in job.items} == {"pending"}
+
+def test_chunk_is_rolled_back_when_its_items_were_processed_elsewhere(db, job):
+    updates = item_updates(job)
+    job.items[0].status = "done"
+    db.commit()
+
+    assert not JobManager(1, 2, {"sentiment": 1})._commit_chunk(db, job.id, updates)
+    db.expire_all()
+    assert job.processed_items == 0
+    assert job.items[1].status == "pending"
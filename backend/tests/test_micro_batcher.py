@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+def submit_all(batcher, items):
+    """Submit items concurrently so they share batches; results or exceptions in input order"""
+    def submit(item):
+        try:
+            return batcher.submit(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        return list(pool.map(submit, items, timeout=5))
+
+def test_results_go_back_to_their_callers():
+    batcher = MicroBatcher("double", lambda items: [item * 2 for item in items], max_wait_ms=20)
+    assert submit_all(batcher, list(range(8))) == [item * 2 for item in range(8)]
+
+def test_a_bad_input_only_fails_its_own_request():
+    def batch_fn(items):
+        if "bad" in items:
+            raise ValueError("bad input")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher("upper", batch_fn, max_wait_ms=20)
+    results = submit_all(batcher, ["a", "bad", "c"])
+    assert results[0] == "A" and results[2] == "C"
+    assert isinstance(results[1], ValueError)
+
+def test_missing_results_fail_every_caller():
+    batcher = MicroBatcher("short", lambda items: items[:-1], max_wait_ms=20)
+    results = submit_all(batcher, [1, 2, 3])
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_dispatcher_survives_an_unexpected_error(monkeypatch):
+    batcher = MicroBatcher("echo", lambda items: items, max_wait_ms=1)
+    original = batcher._run_batch
+
+    def broken_run_batch(batch):
+        monkeypatch.setattr(batcher, "_run_batch", original)
+        raise RuntimeError("dispatcher bug")
+
+    monkeypatch.setattr(batcher, "_run_batch", broken_run_batch)
+    with pytest.raises(RuntimeError, match="dispatcher bug"):
+        batcher.submit("first")
+    assert batcher.submit("second") == "second"
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("spacy")
+
+from app.services import pipeline_service
+from app.services.pipeline_service import PipelineRunner
+
+def test_stage_error_is_not_masked_by_the_summary_error(monkeypatch):
+    def fail_sentiment(texts):
+        raise ValueError("sentiment failed")
+
+    def fail_summary(texts, policy=None):
+        raise RuntimeError("summary failed")
+
+    monkeypatch.setattr(pipeline_service.sentiment_service, "analyze_batch", fail_sentiment)
+    monkeypatch.setattr(pipeline_service.summarization_service, "generate_batch_summaries", fail_summary)
+
+    with pytest.raises(ValueError, match="sentiment failed"):
+        PipelineRunner(workers=1).analyze(["text"], stages=["sentiment", "summary"])
+
+def test_summary_error_is_raised_when_the_other_stages_succeed(monkeypatch):
+    def fail_summary(texts, policy=None):
+        raise RuntimeError("summary failed")
+
+    monkeypatch.setattr(pipeline_service.sentiment_service, "analyze_batch", lambda texts: [{}] * len(texts))
+    monkeypatch.setattr(pipeline_service.summarization_service, "generate_batch_summaries", fail_summary)
+
+    with pytest.raises(RuntimeError, match="summary failed"):
+        PipelineRunner(workers=1).analyze(["text"], stages=["sentiment", "summary"])
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.decoding_policy import DECODING_POLICIES
+from app.services.summarization_service import SummarizationService
+from benchmarks.summarization_backends import PARITY_TEXTS, batch_parity, rouge_l_f1
+
+@pytest.fixture(scope="module")
+def service():
+    """fp32 torch T5 with the result cache off (skips when the model cannot be loaded)"""
+    service = SummarizationService(backend="torch")
+    try:
+        service.ensure_loaded()
+    except Exception as e:
+        pytest.skip(f"Summarization model unavailable: {e}")
+    service.cache = None
+    return service
+
+def test_greedy_batches_match_one_at_a_time(service):
+    single, batched = batch_parity(service, PARITY_TEXTS, DECODING_POLICIES["fast"])
+    assert batched == single
+
+@pytest.mark.parametrize("policy", ["quality", "balanced"])
+def test_beam_batches_agree_with_one_at_a_time(service, policy):
+    # Padding changes float accumulation order, which can flip near-tied beams,
+    # so beam search is held to close agreement rather than equality
+    single, batched = batch_parity(service, PARITY_TEXTS, DECODING_POLICIES[policy])
+    for text, expected, actual in zip(PARITY_TEXTS, single, batched):
+        assert rouge_l_f1(expected, actual) >= 0.9, text
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import models
+from app.services.analysis_store import (
+    delete_aspect_analyses, delete_sentiment_analyses, store_aspect_results, store_in_chunks, store_sentiment_results
+)
+from app.services.trend_service import TrendDelta, apply_trend_delta, rebuild_trends
+from tests.factories import aspect, sentiment
+
+def trend_state(db):
+    """Every non-empty trend bucket and aspect counter, comparable across runs
+
+    Incremental updates keep buckets whose counts dropped back to zero,
+    which a rebuild never creates, so empty ones are left out. Sums are
+    rounded: they are added up in a different order.
+    """
+    db.expire_all()
+    buckets = {}
+    for trend in db.query(models.ReviewTrend):
+        if trend.total_reviews == 0 and not trend.top_aspects:
+            continue
+        buckets[(trend.granularity, trend.date)] = {
+            "total_reviews": trend.total_reviews,
+            "sentiment_sum": round(trend.sentiment_sum, 9),
+            "avg_sentiment": round(trend.avg_sentiment, 9),
+            "sentiment_distribution": trend.sentiment_distribution,
+            "top_aspects": [
+                {**entry, "avg_sentiment": round(entry["avg_sentiment"], 9)} for entry in trend.top_aspects
+            ]
+        }
+
+    aspects = {
+        (bucket.granularity, bucket.date, bucket.aspect): (bucket.mention_count, round(bucket.score_sum, 9))
+        for bucket in db.query(models.TrendAspectBucket)
+        if bucket.mention_count != 0
+    }
+    return buckets, aspects
+
+def bucket(db, granularity, date):
+    db.expire_all()
+    return db.query(models.ReviewTrend).filter_by(granularity=granularity, date=date).one()
+
+def test_incremental_updates_match_rebuild(db, reviews):
+    # First results, written in chunks like the batch endpoints do
+    store_in_chunks(db, store_sentiment_results, reviews[:6], [sentiment(s) for s in (0.9, -0.8, 0.1, 0.7, -0.5, 0.4)], 4)
+
+    # Re-analysis moves reviews between labels within their buckets
+    store_sentiment_results(db, reviews[1:3], [sentiment(0.6), sentiment(-0.9)])
+    db.commit()
+
+    # Reviews of the second day only ever get aspects
+    store_in_chunks(db, store_aspect_results, reviews, [
+        [aspect("battery life", 0.8), aspect("camera quality", -0.4)],
+        [aspect("battery life", -0.6)],
+        [],
+        [aspect("screen quality", 0.5), aspect("battery life", 0.2)],
+        [aspect("performance", -0.7)],
+        [aspect("camera quality", 0.9)],
+        [aspect("sound quality", 0.3)],
+        [aspect("sound quality", -0.2), aspect("charging speed", 0.6)],
+    ], 3)
+
+    # Replace some aspects, then drop others and a sentiment result
+    store_aspect_results(db, reviews[:2], [[aspect("camera quality", 0.1)], [aspect("build quality", -0.3)]])
+    delete_aspect_analyses(db, [reviews[4].id])
+    delete_sentiment_analyses(db, [reviews[5].id])
+    db.commit()
+
+    incremental = trend_state(db)
+    rebuild_trends(db, chunk_size=3)
+    assert trend_state(db) == incremental
+
+def test_reanalysis_replaces_the_previous_result(db, reviews):
+    store_sentiment_results(db, reviews[:1], [sentiment(0.9)])
+    store_sentiment_results(db, reviews[:1], [sentiment(-0.6)])
+    db.commit()
+
+    trend = bucket(db, "hour", datetime(2024, 3, 1, 9))
+    assert trend.total_reviews == 1
+    assert trend.avg_sentiment == pytest.approx(-0.6)
+    assert trend.sentiment_distribution == {"positive": 0, "neutral": 0, "negative": 1}
+
+def test_aspect_only_bucket(db, reviews):
+    store_aspect_results(db, reviews[6:7], [[aspect("sound quality", 0.5), aspect("sound quality", 0.1)]])
+    db.commit()
+
+    trend = bucket(db, "day", datetime(2024, 3, 2))
+    assert trend.total_reviews == 0
+    assert trend.avg_sentiment == 0.0
+    assert trend.top_aspects == [{"aspect": "sound quality", "count": 2, "avg_sentiment": pytest.approx(0.3)}]
+
+def test_removed_aspects_leave_top_aspects(db, reviews):
+    store_aspect_results(db, reviews[:2], [[aspect("battery life", 0.8)], [aspect("camera quality", -0.4)]])
+    db.commit()
+    delete_aspect_analyses(db, [reviews[0].id])
+    db.commit()
+
+    trend = bucket(db, "day", datetime(2024, 3, 1))
+    assert [entry["aspect"] for entry in trend.top_aspects] == ["camera quality"]
+
+def test_signed_deltas_cancel_out(db):
+    created_at = datetime(2024, 3, 1, 12, 30)
+    delta = TrendDelta()
+    delta.add_sentiment(created_at, 0.7, "positive")
+    delta.add_aspect(created_at, "performance", 0.7)
+    apply_trend_delta(db, delta)
+    db.commit()
+
+    delta = TrendDelta()
+    delta.add_sentiment(created_at, 0.7, "positive", sign=-1)
+    delta.add_aspect(created_at, "performance", 0.7, sign=-1)
+    apply_trend_delta(db, delta)
+    db.commit()
+
+    for granularity, date in (("hour", datetime(2024, 3, 1, 12)), ("day", datetime(2024, 3, 1))):
+        trend = bucket(db, granularity, date)
+        assert trend.total_reviews == 0
+        assert trend.sentiment_sum == pytest.approx(0.0)
+        assert trend.sentiment_distribution == {"positive": 0, "neutral": 0, "negative": 0}
+        assert trend.top_aspects == []